@@ -1,11 +1,15 @@
 """Action generation and conversion"""
 from .generator import ActionGenerator
 from .converter import convert_to_iwa_action
+from .codec import encode_actions, encode_sequence, validate_actions
 from .selectors import create_selector, SelectorStrategy
 
 __all__ = [
     "ActionGenerator",
     "convert_to_iwa_action",
+    "encode_actions",
+    "encode_sequence",
+    "validate_actions",
     "create_selector",
     "SelectorStrategy",
 ]
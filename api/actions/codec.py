@@ -0,0 +1,377 @@
+"""
+IWA action codec - one table-driven implementation of the action contract
+
+Every layer used to carry its own copy of the camelCase rules (converter,
+response encoder, validator, quality enhancer, miner fallbacks). They all go
+through here now:
+
+- encode_action / encode_actions: generator output (action_type, snake_case,
+  string selectors) -> IWA BaseAction dicts
+- canonicalize_action: drop snake_case/webAgentId keys, timeSeconds and
+  caseSensitive always present (never mutates the input)
+- validate_action / validate_actions: check against the IWA schema without
+  touching the actions
+- encode_sequence: convert + canonicalize + validate a whole sequence in one
+  pass, GUARANTEED non-empty
+
+Actions that are already in canonical form (the common case from the second
+layer on) skip the conversion branches and are only shallow-copied.
+"""
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from .selectors import Selector
+
+logger = logging.getLogger(__name__)
+
+# Action type aliases (type/action_type with "Action" stripped, lowercased) -> IWA type
+ACTION_TYPES: Dict[str, str] = {
+    "click": "ClickAction",
+    "type": "TypeAction",
+    "wait": "WaitAction",
+    "navigate": "NavigateAction",
+    "goto": "NavigateAction",
+    "screenshot": "ScreenshotAction",
+    "scroll": "ScrollAction",
+}
+
+# IWA action type -> fields the validator requires
+REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "ClickAction": ("selector",),
+    "TypeAction": ("text", "selector"),
+    "WaitAction": ("timeSeconds",),
+    "NavigateAction": ("url",),
+    "ScreenshotAction": (),
+    "ScrollAction": (),
+}
+
+# IWA selector type -> fields the validator requires
+SELECTOR_REQUIRED_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "tagContainsSelector": ("value",),
+    "attributeValueSelector": ("attribute", "value"),
+    "cssSelector": ("value",),
+    "xpathSelector": ("value",),
+}
+
+# IWA action type -> keys an already-encoded action may carry (copied verbatim by encode_action).
+# ScrollAction is re-derived from 'direction', so it always takes the full path.
+ENCODED_KEYS: Dict[str, frozenset] = {
+    "ClickAction": frozenset(("type", "selector")),
+    "TypeAction": frozenset(("type", "selector", "text")),
+    "WaitAction": frozenset(("type", "selector", "timeSeconds")),
+    "NavigateAction": frozenset(("type", "selector", "url")),
+    "ScreenshotAction": frozenset(("type", "selector")),
+}
+
+SCROLL_DIRECTIONS = ("down", "up", "left", "right")
+
+# Every camelCase key an IWA action can carry
+CANONICAL_KEYS = frozenset(("type", "selector", "text", "url", "timeSeconds") + SCROLL_DIRECTIONS)
+
+# Snake_case / legacy spellings -> camelCase
+_WAIT_ALIASES = ("time_seconds", "duration")
+_FORBIDDEN_KEYS = ("webAgentId",)  # must never leak into the response (playground strict validation)
+
+DEFAULT_WAIT_SECONDS = 1.0
+
+
+def minimal_actions(url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """GUARANTEED minimal action sequence (navigate, wait, screenshot)"""
+    return [
+        {"type": "NavigateAction", "url": url or "https://example.com"},
+        {"type": "WaitAction", "timeSeconds": DEFAULT_WAIT_SECONDS},
+        {"type": "ScreenshotAction"},
+    ]
+
+
+# ---------------------------------------------------------------------------
+# Selectors
+# ---------------------------------------------------------------------------
+
+def _is_canonical_selector(selector: Dict[str, Any]) -> bool:
+    return isinstance(selector, Selector) or (
+        "caseSensitive" in selector and "case_sensitive" not in selector and "webAgentId" not in selector
+    )
+
+
+def encode_selector(selector: Any) -> Dict[str, Any]:
+    """Legacy/string selector -> IWA selector dict (interned Selectors are shared as-is)"""
+    if isinstance(selector, Selector):
+        return selector
+    if isinstance(selector, dict):
+        if "type" in selector:
+            # Already IWA-shaped: camelCase copy
+            encoded = dict(selector)
+            if "case_sensitive" in encoded:
+                encoded["caseSensitive"] = encoded.pop("case_sensitive")
+            elif "caseSensitive" not in encoded:
+                encoded["caseSensitive"] = False
+            return encoded
+        case_sensitive = selector.get("case_sensitive", selector.get("caseSensitive", False))
+        if "attributeValueSelector" in selector:
+            return {
+                "type": "attributeValueSelector",
+                "attribute": selector.get("attribute", "id"),
+                "value": selector.get("value", selector.get("attributeValueSelector", "")),
+                "caseSensitive": case_sensitive,
+            }
+        if "tagContainsSelector" in selector:
+            return {
+                "type": "tagContainsSelector",
+                "value": selector.get("value", selector.get("tagContainsSelector", "")),
+                "caseSensitive": case_sensitive,
+            }
+        return {"type": "attributeValueSelector", "attribute": "id", "value": str(selector), "caseSensitive": False}
+
+    selector_str = str(selector)
+    if selector_str.startswith("#"):
+        return {"type": "attributeValueSelector", "attribute": "id", "value": selector_str[1:], "caseSensitive": False}
+    if selector_str.startswith("."):
+        return {"type": "attributeValueSelector", "attribute": "class", "value": selector_str[1:], "caseSensitive": False}
+    return {"type": "tagContainsSelector", "value": selector_str, "caseSensitive": False}
+
+
+def canonicalize_selector(selector: Dict[str, Any], infer_attribute: bool = False) -> Dict[str, Any]:
+    """
+    camelCase copy of a selector dict (interned Selectors are returned as-is)
+
+    infer_attribute: fill a missing attributeValueSelector attribute from the
+    value ('#x' -> id, '.x' -> class, otherwise name)
+    """
+    if isinstance(selector, Selector):
+        return selector
+    canonical = {k: v for k, v in selector.items() if k != "case_sensitive" and k not in _FORBIDDEN_KEYS}
+    if "case_sensitive" in selector:
+        canonical["caseSensitive"] = selector["case_sensitive"]
+    elif "caseSensitive" not in canonical:
+        canonical["caseSensitive"] = False
+    if infer_attribute and canonical.get("type") == "attributeValueSelector" and not canonical.get("attribute"):
+        value = canonical.get("value", "")
+        if value.startswith("#"):
+            canonical["attribute"], canonical["value"] = "id", value[1:]
+        elif value.startswith("."):
+            canonical["attribute"], canonical["value"] = "class", value[1:]
+        else:
+            canonical["attribute"] = "name"
+    return canonical
+
+
+def validate_selector(selector: Any) -> Tuple[bool, str]:
+    """Validate an IWA selector (accepts snake_case case_sensitive; never mutates)"""
+    if not isinstance(selector, dict):
+        return False, "Selector must be a dictionary"
+    if "type" not in selector:
+        return False, "Selector missing required 'type' field"
+    selector_type = selector["type"]
+    required = SELECTOR_REQUIRED_FIELDS.get(selector_type)
+    if required is None:
+        return False, f"Invalid selector type '{selector_type}'. Must be one of {set(SELECTOR_REQUIRED_FIELDS)}"
+    for field in required:
+        if field not in selector:
+            return False, f"{selector_type} missing required '{field}' field"
+    return True, ""
+
+
+# ---------------------------------------------------------------------------
+# Actions
+# ---------------------------------------------------------------------------
+
+def _resolve_type(action: Dict[str, Any]) -> str:
+    action_type = action.get("type") or action.get("action_type", "")
+    if action_type:
+        action_type = action_type.replace("Action", "").lower()
+    return ACTION_TYPES.get(action_type, "ScreenshotAction")
+
+
+def _is_encoded(action: Dict[str, Any]) -> bool:
+    """True if encode_action would return an equal copy of this action"""
+    allowed = ENCODED_KEYS.get(action.get("type"))
+    if allowed is None or not action.keys() <= allowed:
+        return False
+    if action["type"] == "WaitAction" and "timeSeconds" not in action:
+        return False
+    if "selector" in action:
+        selector = action["selector"]
+        return bool(selector) and isinstance(selector, dict) and "type" in selector and _is_canonical_selector(selector)
+    return True
+
+
+def encode_action(action: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert one generator/LLM action to IWA BaseAction format (never mutates the input)"""
+    if _is_encoded(action):
+        encoded = dict(action)
+        selector = encoded.get("selector")
+        if selector is not None and not isinstance(selector, Selector):
+            encoded["selector"] = dict(selector)
+        return encoded
+
+    iwa_type = _resolve_type(action)
+    encoded: Dict[str, Any] = {"type": iwa_type}
+    if action.get("selector"):
+        encoded["selector"] = encode_selector(action["selector"])
+
+    if iwa_type == "WaitAction":
+        if "timeSeconds" in action:
+            encoded["timeSeconds"] = action["timeSeconds"]
+        else:
+            for alias in _WAIT_ALIASES:
+                if alias in action:
+                    encoded["timeSeconds"] = action[alias]
+                    break
+            else:
+                encoded["timeSeconds"] = DEFAULT_WAIT_SECONDS
+    elif iwa_type == "TypeAction":
+        if "text" in action:
+            encoded["text"] = action["text"]
+    elif iwa_type == "NavigateAction":
+        if "url" in action:
+            encoded["url"] = action["url"]
+    elif iwa_type == "ScrollAction":
+        direction = action.get("direction", "down").lower()
+        if direction in SCROLL_DIRECTIONS:
+            encoded[direction] = True
+    return encoded
+
+
+def encode_actions(
+    actions: Optional[List[Dict[str, Any]]],
+    fallback: Optional[Dict[str, Any]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Batch encode_action
+
+    fallback: action substituted (copied) for one that fails to convert;
+    failed actions are dropped when None
+    """
+    encoded = []
+    for i, action in enumerate(actions or []):
+        try:
+            encoded.append(encode_action(action))
+        except Exception as e:
+            logger.warning(f"⚠️ Failed to convert action {i} ({action!r:.100}): {e}")
+            if fallback is not None:
+                encoded.append(dict(fallback))
+    return encoded
+
+
+def canonicalize_action(action: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Return a camelCase copy of one IWA action (never mutates the input)
+
+    - WaitAction: time_seconds/duration -> timeSeconds (default 1.0)
+    - selector: case_sensitive -> caseSensitive (default False)
+    - drops any other snake_case field and webAgentId
+    """
+    canonical = action.keys() <= CANONICAL_KEYS  # unknown keys take the full path (same result)
+    is_wait = action.get("type") == "WaitAction"
+    if canonical and is_wait:
+        canonical = "timeSeconds" in action and "duration" not in action
+    selector = action.get("selector")
+    has_selector = isinstance(selector, dict)
+    if canonical and has_selector:
+        canonical = _is_canonical_selector(selector)
+
+    if canonical:
+        result = dict(action)
+    else:
+        result = {key: value for key, value in action.items() if "_" not in key and key not in _FORBIDDEN_KEYS}
+        if is_wait:
+            for alias in _WAIT_ALIASES:
+                if alias in action:
+                    result["timeSeconds"] = action[alias]
+                    break
+            result.pop("duration", None)
+            if "timeSeconds" not in result:
+                result["timeSeconds"] = DEFAULT_WAIT_SECONDS
+    if has_selector:
+        result["selector"] = canonicalize_selector(selector)
+    return result
+
+
+def canonicalize_actions(actions: Optional[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Batch canonicalize_action (non-dict entries are dropped; may return an empty list)"""
+    return [canonicalize_action(action) for action in actions or [] if isinstance(action, dict)]
+
+
+def validate_action(action: Any) -> Tuple[bool, str]:
+    """Validate one IWA action (accepts snake_case time_seconds; never mutates)"""
+    if not isinstance(action, dict):
+        return False, "Action must be a dictionary"
+    if "type" not in action:
+        return False, "Action missing required 'type' field"
+    action_type = action["type"]
+    required = REQUIRED_FIELDS.get(action_type)
+    if required is None:
+        return False, f"Invalid action type '{action_type}'. Must be one of {set(REQUIRED_FIELDS)}"
+
+    for field in required:
+        if field == "timeSeconds":
+            value = action.get("timeSeconds", action.get("time_seconds"))
+            if "timeSeconds" not in action and "time_seconds" not in action:
+                return False, "WaitAction missing required 'timeSeconds' field"
+            if not isinstance(value, (int, float)):
+                return False, "WaitAction 'timeSeconds' must be a number"
+        elif field not in action:
+            return False, f"{action_type} missing required '{field}' field"
+        elif field == "selector":
+            selector_valid, selector_error = validate_selector(action["selector"])
+            if not selector_valid:
+                return False, f"{action_type} selector invalid: {selector_error}"
+        elif field == "url" and not isinstance(action["url"], str):
+            return False, "NavigateAction 'url' must be a string"
+
+    if action_type == "ScrollAction" and not any(action.get(d) for d in SCROLL_DIRECTIONS):
+        return False, "ScrollAction must have at least one direction (down, up, left, right)"
+    return True, ""
+
+
+def validate_actions(actions: Any) -> Tuple[bool, List[str]]:
+    """Validate an IWA action sequence; returns (is_valid, errors)"""
+    if not isinstance(actions, list):
+        return False, ["Actions must be a list"]
+    if not actions:
+        return False, ["Actions list cannot be empty"]
+    errors = []
+    for i, action in enumerate(actions):
+        is_valid, error = validate_action(action)
+        if not is_valid:
+            errors.append(f"Action {i}: {error}")
+    return not errors, errors
+
+
+def encode_sequence(
+    actions: Optional[List[Dict[str, Any]]],
+    fallback_url: Optional[str] = None,
+    convert: bool = False,
+) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """
+    Convert (optional), canonicalize and validate a whole sequence in one pass
+
+    Non-dict entries are dropped; an empty result is replaced by
+    minimal_actions(fallback_url), so the sequence is GUARANTEED non-empty.
+
+    Returns:
+        (canonical actions, validation errors - empty when every action is valid)
+    """
+    encoded = []
+    errors = []
+    for i, action in enumerate(actions or []):
+        if not isinstance(action, dict):
+            logger.warning(f"⚠️ Dropping non-dict action {i}: {type(action).__name__}")
+            continue
+        if convert:
+            try:
+                action = encode_action(action)
+            except Exception as e:
+                logger.warning(f"⚠️ Failed to convert action {i} ({action!r:.100}): {e}")
+                continue
+        action = canonicalize_action(action)
+        is_valid, error = validate_action(action)
+        if not is_valid:
+            errors.append(f"Action {len(encoded)}: {error}")
+        encoded.append(action)
+
+    if not encoded:
+        logger.error("🚨 CRITICAL: No actions to encode, using GUARANTEED minimal actions")
+        encoded = minimal_actions(fallback_url)
+    return encoded, errors
@@ -1,14 +1,30 @@
 """Enhanced action sequence generation with expanded patterns"""
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Callable, List, Optional
 from .selectors import SelectorStrategy, create_selector
+from .codec import encode_actions
 from ..utils.classification import TaskClassifier
 from ..utils.keywords import extract_keywords
 from ..utils.task_parser import TaskParser
+from ..utils.task_context import TaskContext
+from ..utils.metrics import stage_timer, record_stage, mark_live_analysis, get_metrics, begin_request
+from ..utils.deadline import Deadline
+from ..utils.selector_map import get_selector_map, page_key
+import asyncio
+import time
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Bump whenever generated actions change for the same task (invalidates the solve cache)
+GENERATOR_VERSION = "1"
+
+# Live-analysis tasks that outlived a hedged request (kept referenced until they finish)
+_late_live_tasks = set()
+
+# Pages whose stale selector map entries are being refreshed (one refresh per page at a time)
+_refreshing_pages = set()
+
 # Import smart wait strategy
 try:
     from ..utils.smart_waits import smart_wait
@@ -54,9 +70,9 @@ except ImportError:
 
 # SIMPLIFIED: Removed action_optimizer (Dynamic Zero: efficiency doesn't matter, focus on completion)
 
-# Import Live Analyzer (basic HTTP fetching)
+# Import Live Analyzer (static HTML fetching - tried before the browser)
 try:
-    from ..utils.live_analyzer import live_analyzer
+    from ..utils.live_analyzer import live_analyzer, needs_browser
 except ImportError:
     live_analyzer = None
 
@@ -68,6 +84,35 @@ except ImportError:
     PLAYWRIGHT_AVAILABLE = False
 
 
+# Action target substring -> live candidate role it asks for
+TARGET_ROLES = (
+    ("user", "username"),
+    ("pass", "password"),
+    ("submit", "submit"),
+    ("apply", "apply_button"),
+)
+
+
+def live_selectors_by_role(live_selectors: List[Dict[str, Any]]) -> Dict[str, tuple]:
+    """Role -> (rank, first live candidate with that role); untagged candidates fall back to their type"""
+    best_by_role = {}
+    for rank, live in enumerate(live_selectors):
+        role = live.get("role") or live.get("type", "unknown")
+        if role != "unknown" and role not in best_by_role:
+            best_by_role[role] = (rank, live)
+    return best_by_role
+
+
+def best_role_match(best_by_role: Dict[str, tuple], action_target: str) -> Optional[Dict[str, Any]]:
+    """Highest-ranked live candidate whose role the action target names (None if none does)"""
+    matches = [
+        best_by_role[role]
+        for word, role in TARGET_ROLES
+        if word in action_target and role in best_by_role
+    ]
+    return min(matches, key=lambda match: match[0])[1] if matches else None
+
+
 class ActionGenerator:
     """Generate action sequences based on task - Enhanced with more patterns"""
     
@@ -133,8 +178,21 @@ class ActionGenerator:
         
         return self._safe_fallback(prompt)
     
-    async def generate(self, prompt: str, url: str, task_id: str = None) -> List[Dict[str, Any]]:
-        """Generate action sequence based on prompt - Enhanced patterns with context awareness, multi-step planning, and website-specific intelligence"""
+    async def generate(
+        self,
+        prompt: str,
+        url: str,
+        task_id: str = None,
+        task_context: Optional[TaskContext] = None,
+        on_late_plan: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Generate action sequence based on prompt - Enhanced patterns with context awareness, multi-step planning, and website-specific intelligence
+        
+        task_context: parse-once context built by the endpoint (built here if not given)
+        on_late_plan: hedged mode only - receives the browser-augmented plan when it lands
+            after the heuristic plan was already returned (e.g. to refresh caches)
+        """
         # CRITICAL FIX: Ensure url is always a string (not a dict)
         # This prevents 'dict' object has no attribute 'startswith' errors
         if url is None:
@@ -145,21 +203,29 @@ class ActionGenerator:
         elif not isinstance(url, str):
             url = str(url) if url else ""
         
-        actions = []
-        prompt_lower = prompt.lower()
+        # Parse once: reuse the caller's context unless it describes a different task
+        if task_context is None or task_context.prompt != prompt or task_context.url != url:
+            degradation = task_context.degradation if task_context is not None else 0
+            task_context = TaskContext.build(prompt, url, degradation=degradation)
+        deadline = task_context.budget()  # every await below stays inside the request budget
+        
+        prompt_lower = task_context.prompt_lower
         
         # DYNAMIC ZERO: Time doesn't matter, but we skip slow operations for test requests
         is_test_request = task_id and (task_id.startswith("test-") or task_id.startswith("cache-test-"))
+        # Under load (admission degradation level 2+) the optional enrichers are skipped too
+        enrich = task_context.allows_enrichers
         
         # Detect website (if website detector available)
         # Skip for test requests (faster local testing)
         detected_website = None
         website_strategy = None
-        if not is_test_request and website_detector:
-            detected_website = website_detector.detect_website(url, prompt)
-            if detected_website:
-                website_strategy = website_detector.get_site_specific_strategy()
-                logger.info(f"Detected website: {detected_website}")
+        if not is_test_request and enrich and website_detector:
+            with stage_timer("context_detection"):
+                detected_website = website_detector.detect_website(url, prompt)
+                if detected_website:
+                    website_strategy = website_detector.get_site_specific_strategy()
+                    logger.info(f"Detected website: {detected_website}")
         
         # Check if this is a multi-step task (if task planner available)
         # BUT: Skip for registration/login/retrieve tasks - they need specific handlers
@@ -167,6 +233,7 @@ class ActionGenerator:
         execution_plan = None
         skip_task_planner = (
             is_test_request or  # Skip for test requests
+            not enrich or  # Skip under load
             "register" in prompt_lower or 
             "login" in prompt_lower or 
             "sign in" in prompt_lower or
@@ -180,25 +247,26 @@ class ActionGenerator:
             execution_plan = task_planner.generate_execution_plan(prompt, url)
             if execution_plan.get("is_multi_step"):
                 # Handle multi-step task
-                return self._generate_multistep_actions_from_plan(execution_plan, context_aware, detected_website, website_strategy)
+                return self._generate_multistep_actions_from_plan(execution_plan, context_aware, detected_website, website_strategy, task_context)
         
-        # Parse task to extract all information FIRST (needed for context and analysis)
-        # OPTIMIZATION: Use simple parsing for test requests (faster)
+        # Parsed task information comes from the context (parsed once per request)
+        # Test requests keep the generic fast path
         if is_test_request:
-            parsed = {"task_type": "generic"}  # Skip full parsing for test requests
+            parsed = {"task_type": "generic"}
             task_type = "generic"
         else:
-            parsed = self.task_parser.parse_task(prompt, url)
-            task_type = parsed.get("task_type", "generic")
+            parsed = task_context.parsed
+            task_type = task_context.task_type
         
         # Detect context (if context-aware agent available)
         # OPTIMIZATION: Skip for test requests (faster)
         context = None
         strategy = None
-        if not is_test_request and context_aware:
-            context = context_aware.detect_context(url, prompt)
-            strategy = context_aware.adapt_strategy(context, task_type)
-            context_aware.track_context(context)
+        if not is_test_request and enrich and context_aware:
+            with stage_timer("context_detection"):
+                context = context_aware.detect_context(url, prompt)
+                strategy = context_aware.adapt_strategy(context, task_type)
+                context_aware.track_context(context)
             
             # Merge website strategy with context strategy
             if website_strategy and strategy:
@@ -209,96 +277,301 @@ class ActionGenerator:
         # LIVE ANALYSIS: Fetch and analyze page if URL is provided
         # Priority: Browser Automation (Playwright) > Basic HTTP Fetching > Heuristics
         # OPTIMIZATION: Skip ALL live analysis for test requests (much faster response)
+        # and under load (admission degradation level 1+)
+        plan_inputs = {
+            "prompt": prompt,
+            "url": url,
+            "task_context": task_context,
+            "parsed": parsed,
+            "task_type": task_type,
+            "context": context,
+            "strategy": strategy,
+            "detected_website": detected_website,
+            "website_strategy": website_strategy,
+        }
+        if is_test_request or not url.startswith("http"):
+            return self._dispatch(plan_inputs, [])
+        
+        # Known page: selectors from the persisted selector map, no browser needed
+        # (provisional warmup entries only stand in when live analysis is degraded off)
+        selector_map = get_selector_map()
+        if selector_map is not None:
+            mapped, stale = selector_map.lookup(
+                url, task_type, include_provisional=not task_context.allows_live_analysis
+            )
+            if mapped:
+                if stale and task_context.allows_live_analysis:
+                    self._refresh_selector_map(url, prompt_lower, task_type)
+                logger.info(f"🗺️ Selector map {'(stale) ' if stale else ''}hit for {url}: {len(mapped)} selectors")
+                return self._dispatch(plan_inputs, mapped)
+        
+        if not task_context.allows_live_analysis:
+            return self._dispatch(plan_inputs, [])
+        
+        from config.settings import settings
+        if getattr(settings, 'hedged_generation', False):
+            return await self._generate_hedged(plan_inputs, deadline, on_late_plan)
+        
+        live_selectors = await self._run_live_analysis(url, prompt_lower, task_type, deadline)
+        return self._dispatch(plan_inputs, live_selectors)
+    
+    async def _generate_hedged(
+        self,
+        plan_inputs: Dict[str, Any],
+        deadline: Deadline,
+        on_late_plan: Optional[Callable[[List[Dict[str, Any]]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Race the pure-heuristic plan against the browser-augmented plan
+        
+        The browser plan wins if live analysis lands within hedge_budget_seconds; otherwise
+        the heuristic plan is returned and live analysis keeps running in the background
+        (inside the request deadline) so its plan can still reach on_late_plan.
+        """
+        from config.settings import settings
+        budget = deadline.timeout(getattr(settings, 'hedge_budget_seconds', 1.5))
+        metrics = get_metrics()
+        outcomes = metrics.counter(
+            "solve_hedge_outcomes_total",
+            "Hedged generation outcomes (browser = live plan used in time)",
+            ("outcome",),
+        )
+        start = time.perf_counter()
+        
+        live_task = asyncio.ensure_future(self._run_live_analysis(
+            plan_inputs["url"],
+            plan_inputs["task_context"].prompt_lower,
+            plan_inputs["task_type"],
+            deadline
+        ))
+        await asyncio.sleep(0)  # let the fetch get going before the CPU-bound heuristic dispatch
+        heuristic_plan = self._dispatch(plan_inputs, [])
+        
+        remaining = max(0.0, budget - (time.perf_counter() - start))
+        done, _ = await asyncio.wait({live_task}, timeout=remaining)
+        if live_task in done:
+            live_selectors = [] if live_task.cancelled() or live_task.exception() else live_task.result()
+            if live_selectors:
+                outcomes.inc(("browser",))
+                return self._dispatch(plan_inputs, live_selectors)
+            outcomes.inc(("heuristic_no_live",))
+            return heuristic_plan
+        
+        outcomes.inc(("heuristic_timeout",))
+        returned_at = time.perf_counter()
+        logger.info(f"⚡ Hedge budget ({budget:.2f}s) expired - returning heuristic plan, live analysis continues")
+        
+        def _on_live_done(task: asyncio.Task):
+            _late_live_tasks.discard(task)
+            # Latency saved = how much longer the browser path took than the returned plan
+            metrics.histogram(
+                "solve_hedge_saved_seconds",
+                "Latency saved by returning the heuristic plan before live analysis finished",
+            ).observe(time.perf_counter() - returned_at, ())
+            if task.cancelled() or task.exception() is not None or not task.result():
+                return
+            outcomes.inc(("late_browser",))
+            if on_late_plan is None:
+                return
+            try:
+                on_late_plan(self._dispatch(plan_inputs, task.result()))
+            except Exception as e:
+                logger.warning(f"Late browser plan callback failed: {e}")
+        
+        _late_live_tasks.add(live_task)
+        live_task.add_done_callback(_on_live_done)
+        return heuristic_plan
+    
+    def _refresh_selector_map(self, url: str, prompt_lower: str, task_type: str):
+        """
+        Re-run live analysis for a stale selector map entry in the background
+
+        Coalesced per page (a burst of tasks on one stale page starts one refresh) and run
+        under admission control within a request-sized budget.
+        """
+        key = page_key(url)
+        if key is None or key in _refreshing_pages:
+            return
+        from config.settings import settings
+        from ..utils.admission import get_admission, AdmissionRejected
+        
+        async def _refresh():
+            begin_request()  # own recorder: keep these stages out of the answered request's metrics
+            deadline = Deadline(getattr(settings, 'request_budget_seconds', 36.0))
+            try:
+                async with get_admission().slot(deadline):
+                    await self._run_live_analysis(url, prompt_lower, task_type, deadline)
+            except (AdmissionRejected, asyncio.TimeoutError) as e:
+                logger.info(f"🗺️ Selector map refresh skipped for {url}: {e}")
+        
+        def _on_done(task: asyncio.Task):
+            _refreshing_pages.discard(key)
+            _late_live_tasks.discard(task)
+            if not task.cancelled() and task.exception() is not None:
+                logger.warning(f"Selector map refresh failed for {url}: {task.exception()}")
+        
+        _refreshing_pages.add(key)
+        task = asyncio.ensure_future(_refresh())
+        _late_live_tasks.add(task)
+        task.add_done_callback(_on_done)
+    
+    async def _run_live_analysis(
+        self,
+        url: str,
+        prompt_lower: str,
+        task_type: str,
+        deadline: Deadline
+    ) -> List[Dict[str, Any]]:
+        """Live analysis; successful results are remembered in the selector map"""
+        live_selectors = await self._analyze_live_page(url, prompt_lower, task_type, deadline)
+        selector_map = get_selector_map()
+        if live_selectors and selector_map is not None:
+            selector_map.record(url, live_selectors)
+            if selector_map.save_due():
+                task = asyncio.ensure_future(asyncio.to_thread(selector_map.save))
+                _late_live_tasks.add(task)
+                task.add_done_callback(_late_live_tasks.discard)
+        return live_selectors
+    
+    @staticmethod
+    def _browser_page_ready(url: str, settings) -> bool:
+        """True if the static fetch would be wasted: a known JS shell, or a warm browser snapshot"""
+        if live_analyzer.known_js_shell(url):
+            logger.info(f"Skipping static fetch for {url} (known JS-rendered shell)")
+            return True
+        if not (settings.enable_browser_automation and PLAYWRIGHT_AVAILABLE and get_browser_analyzer):
+            return False
+        from ..utils.browser_analyzer import get_snapshot_cache, normalize_snapshot_url
+        cache = get_snapshot_cache()
+        return cache is not None and cache.contains(normalize_snapshot_url(url))
+    
+    async def _analyze_live_page(
+        self,
+        url: str,
+        prompt_lower: str,
+        task_type: str,
+        deadline: Deadline
+    ) -> List[Dict[str, Any]]:
+        """
+        Fetch and analyze the live page for selector candidates
+        Static HTML (httpx + lxml) first; Browser Automation (Playwright) only when the
+        static DOM has no usable interactive elements (fetch failed or JS-rendered shell).
+        [] if neither finds anything
+        """
+        import asyncio
         live_selectors = []
-        # is_test_request already defined above
         
-        if not is_test_request and url and isinstance(url, str) and url.startswith("http"):
-            from config.settings import settings
-            
-            # DEBUG: Log browser automation attempt
-            logger.info(f"🔍 Attempting browser automation: enabled={settings.enable_browser_automation}, playwright_available={PLAYWRIGHT_AVAILABLE}, analyzer_available={get_browser_analyzer is not None}, is_test_request={is_test_request}")
-            
-            # Try Browser Automation first (if enabled and available)
-            # OPTIMIZATION: Add timeout to prevent hanging (max 5 seconds for browser automation)
-            if settings.enable_browser_automation and PLAYWRIGHT_AVAILABLE and get_browser_analyzer:
-                try:
-                    browser_analyzer = await get_browser_analyzer()
-                    if browser_analyzer:
-                        import time
-                        import asyncio
-                        start_time = time.time()
-                        
-                        # Fetch page with full browser automation (OPTIMIZED: faster timeout)
-                        from config.settings import settings
-                        browser_timeout = getattr(settings, 'browser_fetch_timeout', 3.0)
-                        dom_timeout = getattr(settings, 'dom_analysis_timeout', 1.5)
-                        
-                        try:
-                            page_data = await asyncio.wait_for(
-                                browser_analyzer.fetch_page(url, timeout=browser_timeout),
-                                timeout=browser_timeout + 0.5  # Slight buffer
+        from config.settings import settings
+        dom_timeout = getattr(settings, 'dom_analysis_timeout', 1.5)
+        
+        # STATIC FAST PATH: server-rendered pages need no browser at all
+        # (skipped for known JS shells and pages the browser snapshot cache already holds)
+        if live_analyzer and getattr(settings, 'static_analysis_enabled', True) and not self._browser_page_ready(url, settings):
+            static_cap = getattr(settings, 'static_fetch_timeout', 2.0)
+            start_time = time.time()
+            try:
+                with stage_timer("static_fetch"):
+                    page_data = await deadline.run(
+                        live_analyzer.fetch_page_data(url, timeout=deadline.timeout(static_cap)),
+                        "static_fetch",
+                        cap=static_cap + 0.5
+                    )
+                if not needs_browser(page_data):
+                    mark_live_analysis()
+                    # lxml scoring + vectorizer work runs off the event loop (like the browser path)
+                    try:
+                        with stage_timer("analyze_dom"):
+                            live_selectors = await deadline.run(
+                                asyncio.to_thread(live_analyzer.analyze_dom, page_data, prompt_lower, task_type),
+                                "analyze_dom",
+                                cap=dom_timeout
                             )
-                            if page_data:
-                                intent = prompt_lower
-                                
-                                # Analyze DOM (OPTIMIZED: faster timeout)
-                                try:
-                                    live_selectors = await asyncio.wait_for(
-                                        asyncio.to_thread(browser_analyzer.analyze_dom, page_data, intent, task_type),
-                                        timeout=dom_timeout
-                                    )
-                                    
-                                    elapsed = time.time() - start_time
-                                    if live_selectors:
-                                        logger.info(f"✅ Browser Automation found {len(live_selectors)} candidates in {elapsed:.2f}s")
-                                    else:
-                                        logger.info(f"Browser Automation completed in {elapsed:.2f}s but found no candidates")
-                                except asyncio.TimeoutError:
-                                    logger.warning(f"Browser DOM analysis timeout ({dom_timeout}s), falling back to HTTP fetching")
-                                    live_selectors = []
-                        except asyncio.TimeoutError:
-                            logger.warning(f"Browser automation timeout ({browser_timeout}s), falling back to HTTP fetching")
-                            live_selectors = []
-                except Exception as e:
-                    logger.warning(f"Browser automation failed: {e}, falling back to HTTP fetching")
-                    live_selectors = []
-            
-            # Fallback to basic HTTP fetching if browser automation failed or disabled
-            # OPTIMIZATION: Skip HTTP fetching for test requests too
-            if not is_test_request and not live_selectors and live_analyzer:
-                try:
-                    # Async fetch
-                    html = await live_analyzer.fetch_page(url)
-                    if html:
-                        # Analyze DOM for intent with timeout
-                        intent = prompt_lower
-                        
-                        try:
-                            import asyncio
-                            import time
-                            start_time = time.time()
-                            
-                            # Attempt Live Analysis with timeout
-                            live_selectors = await asyncio.wait_for(
-                                asyncio.to_thread(live_analyzer.analyze_dom, html, intent, task_type),
-                                timeout=self.live_analysis_timeout
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Static DOM analysis timeout ({dom_timeout}s), will use heuristics")
+                        return []
+                    elapsed = time.time() - start_time
+                    logger.info(f"✅ Static analysis found {len(live_selectors)} candidates in {elapsed:.3f}s (no browser needed)")
+                    return live_selectors
+                reason = "JS-rendered shell" if page_data and page_data.get("js_shell") else "no usable elements"
+                logger.info(f"Static analysis inconclusive for {url} ({reason}) - escalating to browser")
+            except asyncio.TimeoutError:
+                logger.warning(f"⏱️ Static fetch timeout for {url} - escalating to browser")
+            except Exception as e:
+                logger.warning(f"Static analysis failed: {e} - escalating to browser")
+        
+        # DEBUG: Log browser automation attempt
+        logger.info(f"🔍 Attempting browser automation: enabled={settings.enable_browser_automation}, playwright_available={PLAYWRIGHT_AVAILABLE}, analyzer_available={get_browser_analyzer is not None}")
+        
+        # Browser Automation (if enabled and available)
+        # OPTIMIZATION: Add timeout to prevent hanging (max 5 seconds for browser automation)
+        if settings.enable_browser_automation and PLAYWRIGHT_AVAILABLE and get_browser_analyzer:
+            try:
+                browser_analyzer = await get_browser_analyzer()
+                if browser_analyzer:
+                    start_time = time.time()
+                    
+                    # Fetch page with full browser automation (OPTIMIZED: faster timeout)
+                    # Stage caps come from settings; the request deadline can only shorten them
+                    browser_cap = getattr(settings, 'browser_fetch_timeout', 3.0)
+                    browser_timeout = deadline.timeout(browser_cap)
+                    lease_timeout = deadline.timeout(getattr(settings, 'page_pool_lease_timeout', 2.0))
+                    
+                    try:
+                        with stage_timer("fetch_page"):
+                            page_data = await deadline.run(
+                                browser_analyzer.fetch_page(url, timeout=browser_timeout, lease_timeout=lease_timeout),
+                                "fetch_page",
+                                cap=browser_cap + 0.5  # Slight buffer
                             )
+                        if page_data:
+                            intent = prompt_lower
+                            mark_live_analysis()
                             
-                            elapsed = time.time() - start_time
-                            if live_selectors:
-                                logger.info(f"✅ HTTP Live Analysis found {len(live_selectors)} candidates in {elapsed:.2f}s")
-                            else:
-                                logger.info(f"HTTP Live Analysis completed in {elapsed:.2f}s but found no candidates")
+                            # Analyze DOM (OPTIMIZED: faster timeout)
+                            try:
+                                with stage_timer("analyze_dom"):
+                                    live_selectors = await deadline.run(
+                                        asyncio.to_thread(browser_analyzer.analyze_dom, page_data, intent, task_type),
+                                        "analyze_dom",
+                                        cap=dom_timeout
+                                    )
                                 
-                        except asyncio.TimeoutError:
-                            logger.warning(f"⏱️ HTTP Live Analysis timeout ({self.live_analysis_timeout}s), will use heuristics")
-                            live_selectors = []
-                        except Exception as e:
-                            logger.error(f"❌ HTTP Live Analysis error: {e}, falling back to heuristics")
-                            live_selectors = []
-                except Exception as e:
-                    logger.warning(f"HTTP live analysis failed: {e}")
+                                elapsed = time.time() - start_time
+                                if live_selectors:
+                                    logger.info(f"✅ Browser Automation found {len(live_selectors)} candidates in {elapsed:.2f}s")
+                                else:
+                                    logger.info(f"Browser Automation completed in {elapsed:.2f}s but found no candidates")
+                            except asyncio.TimeoutError:
+                                logger.warning(f"Browser DOM analysis timeout ({dom_timeout}s), will use heuristics")
+                                live_selectors = []
+                    except asyncio.TimeoutError:
+                        logger.warning(f"Browser automation timeout ({browser_timeout}s), will use heuristics")
+                        live_selectors = []
+            except Exception as e:
+                logger.warning(f"Browser automation failed: {e}, will use heuristics")
+                live_selectors = []
         
+        return live_selectors
+    
+    def _dispatch(self, plan_inputs: Dict[str, Any], live_selectors: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Route the task to its handler and finalize the plan (synchronous - no I/O)
+        
+        plan_inputs: prepared task state from generate(); live_selectors: [] for the pure-heuristic plan
+        """
+        prompt = plan_inputs["prompt"]
+        url = plan_inputs["url"]
+        task_context = plan_inputs["task_context"]
+        parsed = plan_inputs["parsed"]
+        task_type = plan_inputs["task_type"]
+        context = plan_inputs["context"]
+        strategy = plan_inputs["strategy"]
+        detected_website = plan_inputs["detected_website"]
+        website_strategy = plan_inputs["website_strategy"]
+        prompt_lower = task_context.prompt_lower
+        actions = []
+        
+
         # Task information already parsed above
         task_url = parsed.get("url") or url
         credentials = parsed.get("credentials", {})
@@ -309,26 +582,8 @@ class ActionGenerator:
         # CRITICAL: For benchmark tasks, if no URL is provided, infer from task type
         # Benchmark tasks often don't include URLs but expect navigation to the website
         if not task_url:
-            # Infer URL from task type or prompt
-            if "book" in prompt_lower or "books" in prompt_lower:
-                task_url = "https://autobooks.autoppia.com"  # Autoppia Books
-            elif "work" in prompt_lower or "consultation" in prompt_lower:
-                task_url = "https://autowork.autoppia.com"  # Autoppia Work
-            elif "cinema" in prompt_lower or "movie" in prompt_lower:
-                task_url = "https://autocinema.autoppia.com"  # Autoppia Cinema
-            elif "calendar" in prompt_lower:
-                task_url = "https://autocalendar.autoppia.com"  # Autoppia Calendar
-            elif "delivery" in prompt_lower:
-                task_url = "https://autodelivery.autoppia.com"  # Autoppia Delivery
-            elif "lodge" in prompt_lower:
-                task_url = "https://autolodge.autoppia.com"  # Autoppia Lodge
-            elif "list" in prompt_lower:
-                task_url = "https://autolist.autoppia.com"  # Autoppia List
-            elif "zone" in prompt_lower:
-                task_url = "https://autozone.autoppia.com"  # Autoppia Zone
-            else:
-                # Default fallback - use autobooks for benchmark tasks
-                task_url = "https://autobooks.autoppia.com"
+            # Site inferred from the prompt when the context was built (defaults to autobooks)
+            task_url = task_context.site_url
         
         # Update strategy with task type if we have context
         if context_aware and context:
@@ -351,17 +606,20 @@ class ActionGenerator:
             navigation_actions.append({"action_type": "screenshot"})
         
         # Enhanced pattern matching with priority order
+        dispatch_start = time.perf_counter()
         
         # Helper function to finalize actions with validation and optimization
         def finalize_actions(action_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             """
             Apply validation, verification, and optimization to action sequence
             Enhanced with performance optimizations for better accuracy and speed
-            CRITICAL: Converts all actions to IWA format using convert_to_iwa_action
+            CRITICAL: Converts all actions to IWA format using codec.encode_actions
             """
-            # CRITICAL: Convert all actions to IWA format FIRST
-            from .converter import convert_to_iwa_action
-            
+            record_stage("dispatch", time.perf_counter() - dispatch_start)
+            with stage_timer("finalize_actions"):
+                return _finalize(action_list)
+        
+        def _finalize(action_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
             # PERFORMANCE OPTIMIZATION: Import optimizer
             try:
                 from ..utils.action_optimizer import ActionOptimizer
@@ -369,17 +627,8 @@ class ActionGenerator:
             except ImportError:
                 optimizer = None
             
-            converted_actions = []
-            for action in action_list:
-                try:
-                    iwa_action = convert_to_iwa_action(action)
-                    converted_actions.append(iwa_action)
-                except Exception as e:
-                    logger.warning(f"Failed to convert action {action}: {e}, using fallback")
-                    # Fallback: create basic action
-                    converted_actions.append({"type": "ScreenshotAction"})
-            
-            action_list = converted_actions
+            # CRITICAL: Convert all actions to IWA format FIRST (unconvertible -> ScreenshotAction)
+            action_list = encode_actions(action_list, fallback={"type": "ScreenshotAction"})
             
             # PERFORMANCE ENHANCEMENT: Optimize action sequence
             if optimizer:
@@ -404,68 +653,49 @@ class ActionGenerator:
             except Exception as e:
                 logger.warning(f"Quality enhancement failed: {e}")
             # LIVE ANALYSIS OVERRIDE
+            # Role -> best live selector is built once; each action is one lookup (O(actions))
             if live_selectors:
+                best_by_role = live_selectors_by_role(live_selectors)
+                upgrades = get_metrics().counter(
+                    "solve_live_selector_upgrades_total",
+                    "Actions whose selector was replaced by live analysis (role match or top-candidate fallback)",
+                    ("match",),
+                )
                 for action in action_list:
-                    # If action needs a selector and we have a better one from live analysis
                     # After conversion, actions use "type" not "action_type"
                     action_type = action.get("type", "").replace("Action", "").lower()
-                    if "selector" in action and action_type in ["click", "type", "select"]:
-                        # Find best matching live selector
-                        # Simple heuristic: use top confidence selector if type matches
-                        # (In a real implementation, we'd match specific fields like 'username' vs 'password')
-                        
-                        # Try to match by field type if available
-                        selector_val = action.get("selector", "")
-                        if isinstance(selector_val, dict):
-                            action_target = selector_val.get("value", "").lower()
+                    if "selector" not in action or action_type not in ["click", "type", "select"]:
+                        continue
+                    selector_val = action.get("selector", "")
+                    if isinstance(selector_val, dict):
+                        action_target = selector_val.get("value", "").lower()
+                    else:
+                        action_target = str(selector_val).lower()
+                    
+                    # Earliest-ranked live candidate whose role the target asks for, else the top candidate
+                    best_live = best_role_match(best_by_role, action_target)
+                    match = "role" if best_live else "fallback"
+                    if not best_live:
+                        best_live = live_selectors[0]
+                    
+                    logger.info(f"✅ Overriding selector {action_target} with live selector from browser automation")
+                    # Browser analyzer returns IWA format selectors directly
+                    live_selector = best_live.get("selector", {})
+                    if isinstance(live_selector, dict) and live_selector:
+                        action["selector"] = live_selector
+                        upgrades.inc((match,))
+                    elif isinstance(live_selector, str):
+                        # Legacy: convert CSS string to IWA (shouldn't happen with new browser_analyzer)
+                        if live_selector.startswith("#"):
+                            action["selector"] = create_selector("attributeValueSelector", live_selector[1:], attribute="id")
+                        elif live_selector.startswith("."):
+                            action["selector"] = create_selector("tagContainsSelector", live_selector[1:])
                         else:
-                            action_target = str(selector_val).lower()
-                            
-                        best_live = None
-                        
-                        for live in live_selectors:
-                            # If we have type info (e.g. from login analysis)
-                            live_type = live.get("type", "unknown")
-                            if live_type != "unknown":
-                                # Map action target to live type
-                                if "user" in action_target and live_type == "username":
-                                    best_live = live
-                                    break
-                                if "pass" in action_target and live_type == "password":
-                                    best_live = live
-                                    break
-                                if "submit" in action_target and live_type == "submit":
-                                    best_live = live
-                                    break
-                                if "apply" in action_target and live_type == "apply_button":
-                                    best_live = live
-                                    break
-                        
-                        # If no specific match, fallback to highest confidence generic
-                        if not best_live and live_selectors:
-                            best_live = live_selectors[0]
-                            
-                        if best_live:
-                            logger.info(f"✅ Overriding selector {action_target} with live selector from browser automation")
-                            # Browser analyzer now returns IWA format selectors directly
-                            live_selector = best_live.get("selector", {})
-                            # Selector should already be in IWA format from browser_analyzer
-                            if isinstance(live_selector, dict) and live_selector:
-                                action["selector"] = live_selector
-                            else:
-                                # Fallback: if somehow not in IWA format, convert it
-                                from .selectors import create_selector
-                                if isinstance(live_selector, str):
-                                    # Legacy: convert CSS string to IWA (shouldn't happen with new browser_analyzer)
-                                    if live_selector.startswith("#"):
-                                        action["selector"] = create_selector("attributeValueSelector", live_selector[1:], attribute="id")
-                                    elif live_selector.startswith("."):
-                                        action["selector"] = create_selector("tagContainsSelector", live_selector[1:])
-                                    else:
-                                        action["selector"] = create_selector("tagContainsSelector", live_selector)
-                                else:
-                                    # Use existing selector if live selector is invalid
-                                    logger.warning(f"Invalid live selector format, keeping original")
+                            action["selector"] = create_selector("tagContainsSelector", live_selector)
+                        upgrades.inc((match,))
+                    else:
+                        # Use existing selector if live selector is invalid
+                        logger.warning(f"Invalid live selector format, keeping original")
 
             optimized = self._apply_context_optimizations(action_list, context, strategy)
             
@@ -695,9 +925,10 @@ class ActionGenerator:
             if task_planner:
                 execution_plan = task_planner.generate_execution_plan(prompt, url)
                 if execution_plan.get("is_multi_step"):
-                    return self._generate_multistep_actions_from_plan(execution_plan, context_aware, detected_website, website_strategy)
+                    return self._generate_multistep_actions_from_plan(execution_plan, context_aware, detected_website, website_strategy, task_context)
             # Fallback to simple multi-step
-            actions.extend(self._generate_multistep_actions(parsed, prompt_lower))
+            actions.extend(self._generate_multistep_actions(parsed, prompt_lower, task_context))
+            record_stage("dispatch", time.perf_counter() - dispatch_start)
             optimized_actions = self._apply_context_optimizations(actions, context, strategy)
             # Validate and enhance
             if action_validator:
@@ -710,6 +941,7 @@ class ActionGenerator:
         # Default: Screenshot only
         actions.append({"action_type": "wait", "duration": 0.5})
         actions.append({"action_type": "screenshot"})
+        record_stage("dispatch", time.perf_counter() - dispatch_start)
         
         # Apply context optimizations
         optimized_actions = self._apply_context_optimizations(actions, context, strategy)
@@ -770,7 +1002,8 @@ class ActionGenerator:
         execution_plan: Dict[str, Any],
         context_aware_agent: Optional[Any] = None,
         detected_website: Optional[str] = None,
-        website_strategy: Optional[Dict[str, Any]] = None
+        website_strategy: Optional[Dict[str, Any]] = None,
+        task_context: Optional[TaskContext] = None
     ) -> List[Dict[str, Any]]:
         """Generate actions from multi-step execution plan"""
         actions = []
@@ -793,23 +1026,28 @@ class ActionGenerator:
                 actions.append({"action_type": "wait", "duration": 1.0})
                 actions.append({"action_type": "screenshot"})
             
-            # Generate actions for this step
-            step_parsed = self.task_parser.parse_task(step_description, step_url)
+            # Generate actions for this step (one parse per step, shared deadline)
+            if task_context is not None:
+                step_context = task_context.for_step(step_description, step_url)
+            else:
+                step_context = TaskContext.build(step_description, step_url)
+            step_parsed = step_context.parsed
+            step_lower = step_context.prompt_lower
             step_actions = []
             
             # Route to appropriate generator based on step type
             if step_type == "login":
-                step_actions = self._generate_login_actions(step_parsed, step_description.lower(), context, strategy)
+                step_actions = self._generate_login_actions(step_parsed, step_lower, context, strategy)
             elif step_type == "form":
-                step_actions = self._generate_form_actions(step_parsed, step_description.lower())
+                step_actions = self._generate_form_actions(step_parsed, step_lower)
             elif step_type == "click":
-                step_actions = self._generate_click_actions(step_parsed, step_description.lower(), step_parsed.get("target_element"), context)
+                step_actions = self._generate_click_actions(step_parsed, step_lower, step_parsed.get("target_element"), context)
             elif step_type == "type":
-                step_actions = self._generate_type_actions(step_parsed, step_description.lower())
+                step_actions = self._generate_type_actions(step_parsed, step_lower)
             elif step_type == "modify":
-                step_actions = self._generate_modify_actions(step_parsed, step_description.lower())
+                step_actions = self._generate_modify_actions(step_parsed, step_lower)
             elif step_type == "search":
-                step_actions = self._generate_search_actions(step_parsed, step_description.lower())
+                step_actions = self._generate_search_actions(step_parsed, step_lower)
             elif step_type == "navigate":
                 # Navigation is handled separately
                 if step_url:
@@ -822,7 +1060,7 @@ class ActionGenerator:
                     step_actions.append({"action_type": "screenshot"})
             else:
                 # Generic step - try to generate based on description
-                step_actions = self._generate_click_actions(step_parsed, step_description.lower(), step_parsed.get("target_element"), context)
+                step_actions = self._generate_click_actions(step_parsed, step_lower, step_parsed.get("target_element"), context)
             
             actions.extend(step_actions)
         
@@ -2415,7 +2653,12 @@ class ActionGenerator:
         
         return actions
     
-    def _generate_multistep_actions(self, parsed: Dict[str, Any], prompt_lower: str) -> List[Dict[str, Any]]:
+    def _generate_multistep_actions(
+        self,
+        parsed: Dict[str, Any],
+        prompt_lower: str,
+        task_context: Optional[TaskContext] = None
+    ) -> List[Dict[str, Any]]:
         """Generate multi-step actions"""
         actions = []
         
@@ -2428,16 +2671,20 @@ class ActionGenerator:
             if i > 0:
                 actions.append({"action_type": "wait", "duration": 1.0})
             
-            # Parse step
-            step_parsed = self.task_parser.parse_task(step, parsed.get("url", ""))
+            # Parse step once (steps come from prompt_lower, so they are already lowercase)
+            if task_context is not None:
+                step_context = task_context.for_step(step, parsed.get("url", ""))
+            else:
+                step_context = TaskContext.build(step, parsed.get("url", ""))
+            step_parsed = step_context.parsed
             
             # Generate actions for this step
-            if "click" in step.lower():
-                actions.extend(self._generate_click_actions(step_parsed, step.lower(), step_parsed.get("target_element")))
-            elif "type" in step.lower() or "enter" in step.lower():
-                actions.extend(self._generate_type_actions(step_parsed, step.lower()))
-            elif "search" in step.lower():
-                actions.extend(self._generate_search_actions(step_parsed, step.lower()))
+            if "click" in step:
+                actions.extend(self._generate_click_actions(step_parsed, step, step_parsed.get("target_element")))
+            elif "type" in step or "enter" in step:
+                actions.extend(self._generate_type_actions(step_parsed, step))
+            elif "search" in step:
+                actions.extend(self._generate_search_actions(step_parsed, step))
             else:
                 # Generic step
                 actions.append({"action_type": "wait", "duration": 0.5})
@@ -1,7 +1,51 @@
 """Selector creation and strategies"""
-from typing import Dict, Any, List
+from functools import lru_cache
+from typing import Dict, Any, List, Tuple
 from ..utils.keywords import extract_keywords
 
+SELECTOR_CACHE_SIZE = 4096  # Interned selectors (values can come from prompts, so bounded)
+STRATEGY_CACHE_SIZE = 1024  # Memoized strategy lists per (element_type, value)
+
+
+class Selector(dict):
+    """
+    Immutable, interned IWA selector
+    
+    Still a dict (JSON-serializable, compares equal to the plain dict), but
+    frozen and hashable, so one instance can be shared by every action and
+    cache entry that uses it. Copies return the instance itself; build a
+    plain dict(selector) to modify one.
+    """
+    
+    __slots__ = ("_hash",)
+    
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("Selector is immutable - copy it with dict(selector) to modify")
+    
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+    
+    def __hash__(self):
+        try:
+            return self._hash
+        except AttributeError:
+            self._hash = hash(tuple(self.items()))
+            return self._hash
+    
+    def __copy__(self):
+        return self
+    
+    def __deepcopy__(self, memo):
+        return self
+    
+    def __reduce__(self):
+        return (Selector, (dict(self),))
+
+
+@lru_cache(maxsize=SELECTOR_CACHE_SIZE, typed=True)
+def _interned_selector(selector_type: str, value: Any, attribute: str, case_sensitive: bool) -> Selector:
+    return Selector(_build_selector(selector_type, value, attribute, case_sensitive))
+
 
 def create_selector(
     selector_type: str, 
@@ -12,8 +56,18 @@ def create_selector(
     """
     Create IWA selector object - Returns Autoppia framework format
     
+    Selectors are interned: equal arguments return the same immutable Selector.
+    
     CRITICAL FIX: Validator expects camelCase (caseSensitive) not snake_case (case_sensitive)
     """
+    try:
+        return _interned_selector(selector_type, value, attribute, case_sensitive)
+    except TypeError:
+        # Unhashable value - build a one-off selector
+        return Selector(_build_selector(selector_type, value, attribute, case_sensitive))
+
+
+def _build_selector(selector_type: str, value: Any, attribute: str, case_sensitive: bool) -> Dict[str, Any]:
     # CRITICAL FIX: Use camelCase for caseSensitive (validator expects this)
     caseSensitive = case_sensitive  # Convert to camelCase for JSON output
 
@@ -57,6 +111,14 @@ class SelectorStrategy:
     """Generate multiple selector strategies with fallbacks"""
     
     def get_strategies(self, element_type: str, value: str = "") -> List[Dict[str, Any]]:
+        """
+        Selector strategies for an element, memoized per (element_type, value)
+        
+        Returns a fresh list (callers may extend it) of shared interned Selectors.
+        """
+        return list(_cached_strategies(element_type, value))
+    
+    def _build_strategies(self, element_type: str, value: str = "") -> List[Dict[str, Any]]:
         """
         Generate multiple selector strategies with fallbacks.
         Returns list of selectors to try in order - if first fails, try next.
@@ -337,3 +399,10 @@ class SelectorStrategy:
         
         return strategies
 
+
+_strategy_builder = SelectorStrategy()
+
+
+@lru_cache(maxsize=STRATEGY_CACHE_SIZE, typed=True)
+def _cached_strategies(element_type: str, value: str) -> Tuple[Selector, ...]:
+    return tuple(_strategy_builder._build_strategies(element_type, value))
@@ -1,6 +1,8 @@
 """Base agent interface"""
 from abc import ABC, abstractmethod
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional
+
+from ..utils.task_context import TaskContext
 
 
 class BaseAgent(ABC):
@@ -11,7 +13,9 @@ class BaseAgent(ABC):
         self, 
         task_id: str, 
         prompt: str, 
-        url: str
+        url: str,
+        context: Optional[TaskContext] = None,
+        on_late_plan: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
         Solve a task and return IWA BaseAction format actions
@@ -20,6 +24,9 @@ class BaseAgent(ABC):
             task_id: Unique task identifier
             prompt: Task description
             url: Target URL
+            context: Parse-once TaskContext for this request (optional)
+            on_late_plan: Receives IWA actions from a browser-augmented plan that
+                finished after the returned plan (hedged generation, optional)
             
         Returns:
             List of IWA BaseAction objects
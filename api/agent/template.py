@@ -1,8 +1,9 @@
 """Template-based agent implementation"""
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, List, Optional
 from .base import BaseAgent
+from ..utils.task_context import TaskContext
 from ..actions.generator import ActionGenerator
-from ..actions.converter import convert_to_iwa_action
+from ..actions.codec import encode_actions, minimal_actions
 
 
 class TemplateAgent(BaseAgent):
@@ -15,7 +16,9 @@ class TemplateAgent(BaseAgent):
         self, 
         task_id: str, 
         prompt: str, 
-        url: str
+        url: str,
+        context: Optional[TaskContext] = None,
+        on_late_plan: Optional[Callable[[List[Dict[str, Any]]], None]] = None
     ) -> List[Dict[str, Any]]:
         """
         Solve task using template-based action generation
@@ -26,7 +29,15 @@ class TemplateAgent(BaseAgent):
         
         try:
             # Generate actions using templates (pass task_id to skip browser automation for tests)
-            raw_actions = await self.action_generator.generate(prompt, url, task_id=task_id)
+            def convert_late_plan(late_raw_actions):
+                late_actions = encode_actions(late_raw_actions)
+                if late_actions:
+                    on_late_plan(late_actions)
+            
+            raw_actions = await self.action_generator.generate(
+                prompt, url, task_id=task_id, task_context=context,
+                on_late_plan=convert_late_plan if on_late_plan is not None else None
+            )
             
             # CRITICAL: Ensure raw_actions is not None or empty
             if not raw_actions:
@@ -35,31 +46,14 @@ class TemplateAgent(BaseAgent):
             
             logger.info(f"🔍 Generated {len(raw_actions)} raw actions for task {task_id}")
             
-            # Convert to IWA format with error handling
-            iwa_actions = []
-            for i, action in enumerate(raw_actions):
-                try:
-                    converted = convert_to_iwa_action(action)
-                    if converted:  # Only add if conversion succeeded
-                        iwa_actions.append(converted)
-                    else:
-                        logger.warning(f"⚠️ Action {i} conversion returned None/empty, skipping")
-                except Exception as e:
-                    logger.error(f"❌ Error converting action {i}: {e}")
-                    import traceback
-                    logger.debug(f"Conversion error traceback: {traceback.format_exc()}")
-                    # Skip this action, continue with others
+            # Convert to IWA format (actions that fail conversion are skipped)
+            iwa_actions = encode_actions(raw_actions)
             
             # CRITICAL: Ensure non-empty (critical for playground)
             if not iwa_actions or len(iwa_actions) == 0:
                 logger.error(f"🚨 CRITICAL: All actions failed conversion or were empty for task {task_id}")
                 # GUARANTEED MINIMAL ACTIONS
-                fallback_url = url if url else "https://example.com"
-                iwa_actions = [
-                    {"type": "NavigateAction", "url": fallback_url},
-                    {"type": "WaitAction", "timeSeconds": 1.0},
-                    {"type": "ScreenshotAction"}
-                ]
+                iwa_actions = minimal_actions(url)
                 logger.error(f"🚨 Returning GUARANTEED minimal actions: {len(iwa_actions)} actions")
             
             logger.info(f"✅ Returning {len(iwa_actions)} IWA actions for task {task_id}")
@@ -72,12 +66,7 @@ class TemplateAgent(BaseAgent):
             logger.error(f"Traceback: {traceback.format_exc()}")
             
             # GUARANTEED MINIMAL FALLBACK
-            fallback_url = url if url else "https://example.com"
-            guaranteed_actions = [
-                {"type": "NavigateAction", "url": fallback_url},
-                {"type": "WaitAction", "timeSeconds": 1.0},
-                {"type": "ScreenshotAction"}
-            ]
+            guaranteed_actions = minimal_actions(url)
             
             logger.error(f"🚨 Returning GUARANTEED minimal actions after fatal error: {len(guaranteed_actions)} actions")
             return guaranteed_actions
@@ -1,53 +1,27 @@
 """API endpoints"""
-from fastapi import APIRouter, Request
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse, StreamingResponse
 from pydantic import BaseModel, field_validator
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, AsyncIterator, List, Optional
 from config.settings import settings
-import os
-import time
 import json
-
-
-def remove_webagentid_recursive(obj: Any) -> Any:
-    """
-    Recursively remove webAgentId from dictionaries and lists
-    """
-    if isinstance(obj, dict):
-        # Remove webAgentId if present
-        obj.pop("webAgentId", None)
-        # Recursively process all values
-        return {k: remove_webagentid_recursive(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        # Recursively process all items
-        return [remove_webagentid_recursive(item) for item in obj]
-    else:
-        return obj
-
-def ensure_camelcase_response(actions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    """CRITICAL: Convert all actions to camelCase - this ALWAYS runs"""
-    converted = []
-    for action in actions:
-        if not isinstance(action, dict):
-            converted.append(action)
-            continue
-        action_copy = dict(action)
-        # Convert WaitAction: time_seconds/duration -> timeSeconds
-        if action_copy.get("type") == "WaitAction":
-            if "time_seconds" in action_copy:
-                action_copy["timeSeconds"] = action_copy.pop("time_seconds")
-            if "duration" in action_copy:
-                if "timeSeconds" not in action_copy:
-                    action_copy["timeSeconds"] = action_copy.pop("duration")
-                else:
-                    del action_copy["duration"]
-        # Convert selector: case_sensitive -> caseSensitive
-        if "selector" in action_copy and isinstance(action_copy["selector"], dict):
-            selector = action_copy["selector"]
-            if "case_sensitive" in selector:
-                selector["caseSensitive"] = selector.pop("case_sensitive")
-        converted.append(action_copy)
-    return converted
+import time
+from api.utils.response_encoder import (
+    build_response_content,
+    normalize_actions,
+    encode_response_content,
+    encode_cached_response,
+    encode_solve_response,
+)
+from api.utils.solve_cache import (
+    get_solve_cache, make_solve_key, templatize_actions, personalize_actions, is_templatable_agent_id
+)
+from api.utils.single_flight import get_solve_flight
+from api.actions.generator import GENERATOR_VERSION
+from api.utils.task_context import TaskContext, infer_site_url
+from api.utils.metrics import begin_request, record_stage, stage_timer, RequestRecorder
+from api.utils.deadline import Deadline
+from api.utils.admission import get_admission, AdmissionRejected, LEVEL_TEMPLATE_ONLY
 import logging
 import asyncio
 
@@ -64,45 +38,56 @@ CORS_HEADERS = {
 # SIMPLIFIED: Removed advanced_metrics (not needed for simple miner)
 
 
+# Time kept back from generation so a response can always be encoded and sent
+RESPONSE_RESERVE_SECONDS = 0.25
+
+
 # Helper function to infer URL from prompt (used in multiple places)
 def _infer_url_from_prompt(prompt: str, provided_url: str = "") -> str:
     """Infer URL from prompt if not provided"""
     if provided_url:
         return provided_url
-    prompt_lower = prompt.lower()
-    if "book" in prompt_lower or "books" in prompt_lower:
-        return "https://autobooks.autoppia.com"
-    elif "work" in prompt_lower or "consultation" in prompt_lower:
-        return "https://autowork.autoppia.com"
-    elif "cinema" in prompt_lower or "movie" in prompt_lower:
-        return "https://autocinema.autoppia.com"
-    return "https://autobooks.autoppia.com"  # Default
+    return infer_site_url((prompt or "").lower())
 
 
 # Helper function to generate fallback actions (consolidated from 3 duplicate implementations)
-async def _generate_fallback_actions(prompt: str, url: str, max_actions: int = 20) -> List[Dict[str, Any]]:
+async def _generate_fallback_actions(
+    prompt: str,
+    url: str,
+    max_actions: int = 20,
+    context: Optional[TaskContext] = None,
+    deadline: Optional[Deadline] = None
+) -> List[Dict[str, Any]]:
     """
     Generate fallback actions when agent fails or returns empty - tries harder to solve the task
     GUARANTEED to return at least one action (never empty list)
+    
+    context: the request's TaskContext, reused when it matches the fallback URL
+    deadline: the request's Deadline - fallback generation only uses what remains
     """
     try:
         from api.actions.generator import ActionGenerator
-        from api.actions.converter import convert_to_iwa_action
+        from api.actions.codec import encode_actions
         
         fallback_url = _infer_url_from_prompt(prompt, url)
         fallback_generator = ActionGenerator()
         
-        # Try primary generation with longer timeout
+        # Try primary generation with longer timeout (capped by whatever budget is left)
+        if deadline is None:
+            deadline = context.budget() if context is not None else Deadline.unbounded()
         try:
-            raw_fallback = await asyncio.wait_for(
-                fallback_generator.generate(prompt, fallback_url),
-                timeout=15.0  # Longer timeout for fallback
+            raw_fallback = await deadline.run(
+                fallback_generator.generate(
+                    prompt,
+                    fallback_url,
+                    task_context=context if context is not None and context.url == fallback_url else None
+                ),
+                "fallback",
+                cap=15.0,  # Longer timeout for fallback
+                reserve=RESPONSE_RESERVE_SECONDS
             )
             if raw_fallback and len(raw_fallback) > 0:
-                converted = [
-                    convert_to_iwa_action(action)
-                    for action in raw_fallback[:max_actions]
-                ]
+                converted = encode_actions(raw_fallback[:max_actions])
                 # CRITICAL: Ensure converted actions are not empty
                 if converted and len(converted) > 0:
                     logger.info(f"✅ Fallback generation succeeded: {len(converted)} actions")
@@ -263,6 +248,23 @@ async def solve_task(request: TaskRequest, http_request: Request):
     Input: task.clean_task() format
     Output: {actions: [], web_agent_id: str, recording: str}
     """
+    # Stage timings are collected per request and flushed once labels are known
+    recorder = begin_request()
+    try:
+        return await _solve_task(request, http_request, recorder)
+    finally:
+        recorder.flush()
+
+
+async def _solve_task(request: TaskRequest, http_request: Request, recorder: RequestRecorder) -> Response:
+    """Solve one task and build the encoded response"""
+    request_start = time.perf_counter()
+    # End-to-end budget: every awaitable stage below (fallback included) draws from it.
+    # Generation and queueing stop short of the fallback slice so a timed-out request
+    # still has time to build real fallback actions.
+    deadline = Deadline(getattr(settings, 'request_budget_seconds', 36.0))
+    generation_reserve = RESPONSE_RESERVE_SECONDS + getattr(settings, 'fallback_reserve_seconds', 5.0)
+    
     # CRITICAL: Normalize url - handle None values from playground
     if request.url is None:
         request.url = ""
@@ -282,6 +284,15 @@ async def solve_task(request: TaskRequest, http_request: Request):
         request.prompt = request.prompt.replace('<web_agent_id>', agent_id)
         logger.info(f"🔄 Replaced <web_agent_id> with '{agent_id}' in prompt")
     
+    # Solve cache key keeps the <web_agent_id> placeholder so one entry serves every
+    # agent id; the id is only spliced back in when the prompt actually had one
+    cache_agent_id = agent_id if original_prompt and '<web_agent_id>' in original_prompt else ""
+    solve_cache = get_solve_cache() if getattr(settings, 'solve_cache_enabled', True) else None
+    cache_key = make_solve_key(original_prompt, request.url, GENERATOR_VERSION)
+    # Ids that cannot be swapped back for the placeholder safely are neither cached nor
+    # shared across callers: their single-flight key is per agent id
+    flight_key = cache_key if is_templatable_agent_id(cache_agent_id) else cache_key + (cache_agent_id,)
+    
     # CRITICAL: Log entry point to verify function is being called
     logger.info(f"🚀 solve_task called: id={request.id}, prompt_length={len(request.prompt) if request.prompt else 0}")
     logger.info(f"🔍 FULL REQUEST: id={request.id}, prompt={request.prompt[:100] if request.prompt else 'EMPTY'}, url={request.url}")
@@ -290,8 +301,6 @@ async def solve_task(request: TaskRequest, http_request: Request):
     if request.prompt and '<web_agent_id>' in request.prompt:
         logger.info(f"🎯 PLAYGROUND REQUEST DETECTED: Contains <web_agent_id> placeholder")
     
-    from api.utils.task_parser import TaskParser
-    
     start_time = time.time()
     validator_ip = None
     
@@ -315,40 +324,67 @@ async def solve_task(request: TaskRequest, http_request: Request):
         logger.debug(f"Error extracting validator IP: {e}")
         validator_ip = None
     
-    # Initialize task_type with default
-    task_type = "generic"
+    # ⚡ SOLVE CACHE: Repeated task templates skip parsing and generation entirely
+    if solve_cache is not None and request.id and request.prompt:
+        cached = solve_cache.get_encoded(cache_key, cache_agent_id)
+        if cached is not None:
+            # Cached actions are stored normalized and encoded - only the agent id was spliced in
+            actions_json, recorder.task_type = cached
+            logger.info(f"⚡ Solve cache hit for task {request.id}: {len(actions_json)} bytes of actions")
+            return Response(
+                content=encode_cached_response(actions_json, request.id),
+                status_code=200,
+                media_type="application/json",
+                headers=CORS_HEADERS
+            )
+    
+    # DYNAMIC ZERO: Time doesn't matter for scoring, but we need safety timeout
+    # Use shorter timeout for test requests (faster local testing)
+    # For production, validators use 90s (safety limit, not optimization)
+    # Detect if this is a test request (localhost or test ID pattern)
+    # CRITICAL FIX: Don't treat validator_ip=None as test request - playground/validators might not send IP
+    # Only treat as test if explicitly localhost or test ID pattern
+    is_test_request = (
+        validator_ip in ["127.0.0.1", "localhost", "::1"] or
+        (request.id and (request.id.startswith("test-") or request.id.startswith("cache-test-")))
+    )
+    # PERFORMANCE OPTIMIZATION: Use faster timeout for production (validators prefer speed)
+    # But still allow enough time for complex tasks
+    # These are per-mode caps on generation; the request deadline can only shorten them
+    fast_mode = getattr(settings, 'fast_mode', True)
+    if fast_mode and not is_test_request:
+        timeout_seconds = 30.0  # Faster timeout: 30s instead of 90s (still safe)
+    else:
+        timeout_seconds = 10.0 if is_test_request else 90.0
+    
+    record_stage("request_parse", time.perf_counter() - request_start)
     
+    # Parse ONCE: the TaskContext is threaded through the agent into the generator
+    task_context = None
+    task_type = "generic"
     try:
-        # Parse task for metrics (inside try block to catch errors)
-        task_parser = TaskParser()
-        parsed_task = task_parser.parse_task(request.prompt, request.url)
-        # Determine task type from parsed task
-        if parsed_task.get("has_login"):
-            task_type = "login"
-        elif parsed_task.get("has_form"):
-            task_type = "form"
-        elif parsed_task.get("has_search"):
-            task_type = "search"
-        elif parsed_task.get("has_modify"):
-            task_type = "modify"
-        else:
-            task_type = "generic"
+        task_context = TaskContext.build(request.prompt, request.url, deadline=deadline)
+        task_type = task_context.category
     except Exception as e:
-        # If parsing fails, use generic task type
-        task_type = "generic"
+        # If parsing fails, use generic task type (generator parses on its own)
+        logger.debug(f"Task context build failed (non-critical): {e}")
+    recorder.task_type = task_type
+    
+    # ADMISSION: Under load the request is degraded (no browser -> no enrichers -> template only)
+    admission = get_admission()
+    degradation = admission.level()
+    if task_context is not None and degradation:
+        task_context = task_context.with_degradation(degradation)
     
     # Validate request - but ALWAYS return actions (benchmark requirement)
     if not request.id or not request.prompt:
         logger.warning(f"Invalid request: missing id or prompt. ID: {request.id}, Prompt: {bool(request.prompt)}")
         # CRITICAL: Even on validation error, return actions (not empty) for benchmark
         fallback_actions = [{"type": "ScreenshotAction"}]
-        return JSONResponse(
-            content={
-                "actions": fallback_actions,  # Return fallback instead of empty
-                "web_agent_id": request.id or "unknown",  # snake_case - official playground format
-                "recording": "",
-            },
+        return Response(
+            content=encode_solve_response(fallback_actions, request.id or "unknown"),
             status_code=200,  # Return 200 with fallback actions (benchmark requirement)
+            media_type="application/json",
             headers=CORS_HEADERS
         )
     
@@ -362,36 +398,54 @@ async def solve_task(request: TaskRequest, http_request: Request):
         # SIMPLIFIED: Removed live monitoring (not needed)
         
         logger.info(f"🔧 Calling agent.solve_task for task {request.id}")
+        generated = False  # True only when the agent itself produced the actions (cacheable)
         try:
-            # DYNAMIC ZERO: Time doesn't matter for scoring
-            # Use shorter timeout for test requests (faster local testing)
-            # For production, validators use 90s (safety limit, not optimization)
-            # Detect if this is a test request (localhost or test ID pattern)
-            # CRITICAL FIX: Don't treat validator_ip=None as test request - playground/validators might not send IP
-            # Only treat as test if explicitly localhost or test ID pattern
-            is_test_request = (
-                validator_ip in ["127.0.0.1", "localhost", "::1"] or
-                (request.id and (request.id.startswith("test-") or request.id.startswith("cache-test-")))
-            )
-            # PERFORMANCE OPTIMIZATION: Use faster timeout for production (validators prefer speed)
-            # But still allow enough time for complex tasks
-            from config.settings import settings
-            fast_mode = getattr(settings, 'fast_mode', True)
-            if fast_mode and not is_test_request:
-                timeout_seconds = 30.0  # Faster timeout: 30s instead of 90s (still safe)
-            else:
-                timeout_seconds = 10.0 if is_test_request else 90.0
+            # SINGLE-FLIGHT: Concurrent identical tasks share one generation. The shared
+            # result is templatized with the leader's agent id so every caller splices in
+            # its own; shield() inside do() keeps one caller's timeout from killing it.
+            # HEDGING: If the heuristic plan was returned first, the browser-augmented plan
+            # that lands later still refreshes the solve cache for the next repeat.
+            def _cache_late_plan(late_actions):
+                if solve_cache is not None:
+                    fallback_url = request.url or _infer_url_from_prompt(request.prompt, "")
+                    solve_cache.put(cache_key, normalize_actions(late_actions, fallback_url), cache_agent_id, task_type)
+                    logger.info(f"💾 Cached late browser-augmented plan for task {request.id}")
             
-            # SIMPLIFIED: TemplateAgent doesn't need validator_ip parameter
-            actions = await asyncio.wait_for(
-                agent.solve_task(
+            def _solve(context):
+                return agent.solve_task(
                     task_id=request.id,
                     prompt=request.prompt,
-                    url=request.url
-                ),
-                timeout=timeout_seconds
-            )
+                    url=request.url,
+                    context=context,
+                    on_late_plan=_cache_late_plan
+                )
+            
+            # Only the single-flight leader takes an admission slot; template-only
+            # plans skip the queue. Returns (template, degraded) - degraded plans are not cached.
+            async def _generate_template():
+                if degradation >= LEVEL_TEMPLATE_ONLY:
+                    leader_actions = await _solve(task_context)
+                else:
+                    try:
+                        async with admission.slot(deadline, reserve=generation_reserve):
+                            leader_actions = await _solve(task_context)
+                    except AdmissionRejected as rejected:
+                        logger.warning(f"🚦 {rejected} - serving template plan for task {request.id}")
+                        template_context = task_context.with_degradation(LEVEL_TEMPLATE_ONLY) if task_context is not None else None
+                        leader_actions = await _solve(template_context)
+                        return templatize_actions(leader_actions or [], cache_agent_id), True
+                return templatize_actions(leader_actions or [], cache_agent_id), degradation > 0
+            
+            with stage_timer("generate"):
+                template, degraded = await deadline.run(
+                    get_solve_flight().do(flight_key + (is_test_request,), _generate_template),
+                    "generate",
+                    cap=timeout_seconds,
+                    reserve=generation_reserve
+                )
+            actions = personalize_actions(template, cache_agent_id)
             logger.info(f"✅ agent.solve_task returned: type={type(actions)}, length={len(actions) if actions else 'None'} for task {request.id}")
+            generated = bool(actions) and not degraded
             
             # 🔍 DIAGNOSTIC: Track actions after agent returns
             try:
@@ -400,10 +454,11 @@ async def solve_task(request: TaskRequest, http_request: Request):
                 diagnostic.checkpoint("after_agent_returned", request.id, actions or [], {"agent_type": type(agent).__name__})
             except ImportError:
                 pass
-        except asyncio.TimeoutError as timeout_err:
+        except asyncio.TimeoutError:
             # CRITICAL: Log timeout with full traceback
             logger.error(
-                f"❌ FATAL: agent.solve_task TIMEOUT for task {request.id} after {timeout_seconds}s. "
+                f"❌ FATAL: agent.solve_task TIMEOUT for task {request.id} after {deadline.elapsed():.2f}s "
+                f"(cap {timeout_seconds}s, budget {deadline.budget}s). "
                 f"Test request: {is_test_request}",
                 exc_info=True
             )
@@ -443,556 +498,94 @@ async def solve_task(request: TaskRequest, http_request: Request):
         # CRITICAL: Ensure actions is never None or empty (benchmark requirement)
         if not actions or len(actions) == 0:
             logger.warning(f"⚠️ Empty actions returned for task {request.id}, generating fallback actions")
-            actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=20)
+            actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=20, context=task_context, deadline=deadline)
             logger.info(f"✅ Generated {len(actions)} fallback actions")
         
-        # SIMPLIFIED: Removed all monitoring/metrics (not needed for simple miner)
-        
-        # CRITICAL: Ensure actions is never empty before returning (double-check)
-        if not actions or len(actions) == 0:
-            logger.error(f"🚨 CRITICAL: Actions is empty before returning response for task {request.id}")
-            # Last resort fallback
-            actions = [{"type": "ScreenshotAction"}]
-        
-        # SIMPLIFIED: Removed response size optimizer (not needed - actions are usually small)
-        
-        # FINAL CHECK: Ensure actions is never empty (triple-check before returning)
-        if not actions or len(actions) == 0:
-            logger.error(f"🚨 CRITICAL: Actions is empty in final check for task {request.id}, using fallback")
-            actions = [{"type": "ScreenshotAction"}]
-        
-        # CRITICAL FIX: Final cleanup - ensure ALL actions use camelCase (playground requirement)
-        # AGGRESSIVE CLEANUP: Directly modify dicts to ensure camelCase (playground requirement)
-        import copy
-        logger.info(f"🧹 STARTING CLEANUP: {len(actions)} actions to clean")
-        cleaned_actions = []
-        for i, action in enumerate(actions):
+        # Learning enhancement runs on the raw agent actions (before encoding)
+        if getattr(settings, 'learning_enabled', False):
             try:
-                # Create a deep copy to avoid modifying original (nested dicts need deep copy)
-                cleaned_action = copy.deepcopy(action)
-                action_before = str(cleaned_action)[:100]  # Log first 100 chars
-                
-                # Handle WaitAction: time_seconds/duration -> timeSeconds
-                if cleaned_action.get("type") == "WaitAction":
-                    if "time_seconds" in cleaned_action:
-                        cleaned_action["timeSeconds"] = cleaned_action.pop("time_seconds")
-                        logger.info(f"✅ Converted time_seconds -> timeSeconds in WaitAction {i}")
-                    elif "duration" in cleaned_action:
-                        cleaned_action["timeSeconds"] = cleaned_action.pop("duration")
-                        logger.info(f"✅ Converted duration -> timeSeconds in WaitAction {i}")
-                    # Ensure timeSeconds exists
-                    if "timeSeconds" not in cleaned_action:
-                        cleaned_action["timeSeconds"] = 1.0
-                        logger.info(f"✅ Added default timeSeconds to WaitAction {i}")
-                else:
-                    logger.debug(f"Action {i} is not WaitAction: {cleaned_action.get('type')}")
-                
-                # Clean selector fields: case_sensitive -> caseSensitive
-                if "selector" in cleaned_action and isinstance(cleaned_action["selector"], dict):
-                    selector = cleaned_action["selector"]
-                    if "case_sensitive" in selector:
-                        selector["caseSensitive"] = selector.pop("case_sensitive")
-                        logger.debug(f"Converted case_sensitive -> caseSensitive in action {i}")
-                    # Ensure caseSensitive exists
-                    if "caseSensitive" not in selector:
-                        selector["caseSensitive"] = False
-                
-                # Remove any other snake_case fields that might exist (except web_agent_id in response)
-                keys_to_remove = [k for k in list(cleaned_action.keys()) if "_" in k and k not in ["web_agent_id"]]
-                for key in keys_to_remove:
-                    logger.warning(f"Removing unexpected snake_case field '{key}' from action {i}")
-                    del cleaned_action[key]
-                
-                cleaned_actions.append(cleaned_action)
-            except Exception as e:
-                logger.error(f"Failed to clean action {i} {action}: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-                # Even on error, try basic cleanup
-                if isinstance(action, dict):
-                    action_copy = dict(action)
-                    if "time_seconds" in action_copy:
-                        action_copy["timeSeconds"] = action_copy.pop("time_seconds")
-                    if "selector" in action_copy and isinstance(action_copy["selector"], dict) and "case_sensitive" in action_copy["selector"]:
-                        action_copy["selector"]["caseSensitive"] = action_copy["selector"].pop("case_sensitive")
-                    cleaned_actions.append(action_copy)
-                else:
-                    cleaned_actions.append(action)
-        actions = cleaned_actions
-        logger.info(f"✅ Cleaned {len(actions)} actions - checking first action: {actions[0] if actions else 'NONE'}")
-        
-        # Validate IWA format before returning
-        try:
-            from api.utils.iwa_validator import validate_iwa_action_sequence
-            is_valid, errors = validate_iwa_action_sequence(actions)
-            if not is_valid:
-                logger.error(f"❌ IWA Validation Failed for task {request.id}:")
-                for error in errors[:5]:  # Limit to first 5 errors
-                    logger.error(f"   - {error}")
-                # Log warning but still return actions (validators will reject if invalid)
-                logger.warning(f"⚠️ Returning invalid IWA actions - validators may reject")
-            else:
-                logger.info(f"✅ IWA Validation Passed: {len(actions)} actions valid")
-        except ImportError:
-            logger.warning("⚠️ IWA validator not available - skipping validation")
-        except Exception as e:
-            logger.warning(f"⚠️ IWA validation error: {e}")
-        
-        # CRITICAL: Match official Autoppia response format exactly
-        # Official format: {actions: [], web_agent_id: str, recording: str}
-        # Do NOT include extra fields like 'id' or 'task_id' - playground may reject them
-        # FINAL CAMELCASE FIX: Convert actions right before creating response
-        # CRITICAL: This MUST execute - convert snake_case to camelCase for playground
-        logger.error(f"🚨 DEBUG: REACHED CONVERSION CODE - {len(actions)} actions")  # ERROR level to ensure it shows
-        import copy
-        import json as json_module
-        logger.info(f"🔄 FINAL CONVERSION: Processing {len(actions)} actions")
-        logger.info(f"🔍 Sample action BEFORE: {str(actions[0])[:150] if actions else 'NONE'}")
-        final_actions = []
-        for i, action in enumerate(actions):
-            try:
-                action_copy = dict(action)  # Shallow copy first
-                # Deep copy nested structures
-                if "selector" in action_copy and isinstance(action_copy["selector"], dict):
-                    action_copy["selector"] = dict(action_copy["selector"])
-                
-                # Convert time_seconds/duration -> timeSeconds for WaitAction
-                if action_copy.get("type") == "WaitAction":
-                    if "time_seconds" in action_copy:
-                        val = action_copy.pop("time_seconds")
-                        action_copy["timeSeconds"] = val
-                        logger.info(f"✅ Action {i}: Converted time_seconds={val} -> timeSeconds")
-                    elif "duration" in action_copy:
-                        val = action_copy.pop("duration")
-                        action_copy["timeSeconds"] = val
-                        logger.info(f"✅ Action {i}: Converted duration={val} -> timeSeconds")
-                    # Ensure timeSeconds exists
-                    if "timeSeconds" not in action_copy:
-                        action_copy["timeSeconds"] = 1.0
-                        logger.info(f"✅ Action {i}: Added default timeSeconds=1.0")
-                
-                # Convert case_sensitive -> caseSensitive in selectors
-                if "selector" in action_copy and isinstance(action_copy["selector"], dict):
-                    selector = action_copy["selector"]
-                    if "case_sensitive" in selector:
-                        val = selector.pop("case_sensitive")
-                        selector["caseSensitive"] = val
-                        logger.info(f"✅ Action {i}: Converted case_sensitive={val} -> caseSensitive")
-                    # Ensure caseSensitive exists
-                    if "caseSensitive" not in selector:
-                        selector["caseSensitive"] = False
-                
-                final_actions.append(action_copy)
-            except Exception as e:
-                logger.error(f"❌ Error converting action {i}: {e}")
-                import traceback
-                logger.error(traceback.format_exc())
-                final_actions.append(action)  # Use original on error
-        
-        # Verify conversion worked
-        logger.info(f"🔍 Sample action AFTER: {str(final_actions[0])[:150] if final_actions else 'NONE'}")
-        first_action_json = json_module.dumps(final_actions[0] if final_actions else {})
-        if "time_seconds" in first_action_json or "case_sensitive" in first_action_json:
-            logger.error(f"❌ CRITICAL: Conversion failed! JSON: {first_action_json[:200]}")
-        else:
-            logger.info(f"✅ Conversion verified: First action is camelCase")
-        
-        # CRITICAL: Final safety check - ensure camelCase RIGHT before creating response
-        # Modify final_actions in-place as last resort
-        for action in final_actions:
-            if isinstance(action, dict) and action.get("type") == "WaitAction":
-                if "time_seconds" in action:
-                    action["timeSeconds"] = action.pop("time_seconds")
-                if "duration" in action:
-                    if "timeSeconds" not in action:
-                        action["timeSeconds"] = action.pop("duration")
-                    else:
-                        del action["duration"]
-            if isinstance(action, dict) and "selector" in action and isinstance(action["selector"], dict):
-                if "case_sensitive" in action["selector"]:
-                    action["selector"]["caseSensitive"] = action["selector"].pop("case_sensitive")
-        
-        # CRITICAL: Playground expects ONLY web_agent_id (snake_case) - NOT webAgentId
-        # Based on PLAYGROUND_ENDPOINT.md, the official format is: {actions: [], web_agent_id: str, recording: str}
-        # Including webAgentId may cause playground to reject the response
-        response_content = {
-            "actions": final_actions,
-            "web_agent_id": request.id,  # snake_case - official playground format
-            "recording": "",
-        }
-        
-        # CRITICAL: Debug - log immediately after creation
-        logger.error(f"🔍 DEBUG: response_content keys immediately after creation: {list(response_content.keys())}")
-        logger.error(f"🔍 DEBUG: Has webAgentId immediately after creation: {'webAgentId' in response_content}")
-        
-        # CRITICAL: Apply recursive filter IMMEDIATELY after creation to remove webAgentId from anywhere
-        response_content = remove_webagentid_recursive(response_content)
-        logger.error(f"🔍 DEBUG: After recursive filter - keys: {list(response_content.keys())}, has webAgentId: {'webAgentId' in response_content}")
-        
-        # CRITICAL: Immediately check and remove webAgentId if somehow present (double-check)
-        response_content.pop("webAgentId", None)  # Use pop to avoid KeyError
-        logger.error(f"🔍 DEBUG: After pop - keys: {list(response_content.keys())}, has webAgentId: {'webAgentId' in response_content}")
-        
-        # CRITICAL: Final conversion using dedicated function - GUARANTEED to run
-        try:
-            response_content["actions"] = ensure_camelcase_response(response_content["actions"])
-        except Exception as conv_err:
-            logger.error(f"❌ FATAL: Error in ensure_camelcase_response for task {request.id}: {conv_err}", exc_info=True)
-            # If conversion fails, use original actions (they should already be camelCase)
-            pass
-        
-        # CRITICAL: FINAL GUARANTEE - Ensure actions is NEVER empty before creating response
-        if not response_content["actions"] or len(response_content["actions"]) == 0:
-            logger.error(f"🚨 FATAL: Actions is empty AFTER conversion! Creating GUARANTEED minimal actions for task {request.id}")
-            # GUARANTEED MINIMAL ACTIONS - This should NEVER happen, but if it does, we have a failsafe
-            guaranteed_url = request.url if request.url else _infer_url_from_prompt(request.prompt, "")
-            if not guaranteed_url:
-                guaranteed_url = "https://example.com"
-            
-            response_content["actions"] = [
-                {"type": "NavigateAction", "url": guaranteed_url},
-                {"type": "WaitAction", "timeSeconds": 1.0},
-                {"type": "ScreenshotAction"}
-            ]
-            logger.error(f"🚨 Created GUARANTEED minimal actions: {len(response_content['actions'])} actions")
-        
-        # CRITICAL: Validate response can be serialized to JSON before returning
-        try:
-            response_json_test = json.dumps(response_content)
-            logger.info(f"📦 Response JSON serialization test: {len(response_json_test)} bytes")
-            
-            # CRITICAL: Verify actions are in the JSON string
-            if '"actions":[]' in response_json_test or '"actions": []' in response_json_test:
-                logger.error(f"🚨 FATAL: JSON serialization shows EMPTY actions array! This should be impossible!")
-                # Force add actions
-                response_content["actions"] = [
-                    {"type": "NavigateAction", "url": request.url or "https://example.com"},
-                    {"type": "WaitAction", "timeSeconds": 1.0},
-                    {"type": "ScreenshotAction"}
-                ]
-                response_json_test = json.dumps(response_content)
-                logger.error(f"🚨 FORCED actions into response: {len(response_content['actions'])} actions")
-            
-        except Exception as json_err:
-            logger.error(f"❌ FATAL: JSON serialization FAILED for task {request.id}: {json_err}", exc_info=True)
-            # If JSON serialization fails, create minimal valid response
-            response_content = {
-                "actions": [
-                    {"type": "NavigateAction", "url": request.url or "https://example.com"},
-                    {"type": "WaitAction", "timeSeconds": 1.0},
-                    {"type": "ScreenshotAction"}
-                ],
-                "web_agent_id": request.id,  # snake_case - official playground format
-                "recording": ""
-            }
-            logger.error(f"🚨 Created emergency fallback response: {len(response_content['actions'])} actions")
-        
-        # CRITICAL: Remove webAgentId IMMEDIATELY if present (before any logging or processing)
-        # This must happen BEFORE any code that might cause exceptions
-        if "webAgentId" in response_content:
-            logger.error(f"🚨 CRITICAL: webAgentId found in response_content! Removing it immediately.")
-            del response_content["webAgentId"]
-        
-        # CRITICAL: Apply recursive filter RIGHT BEFORE JSON serialization to catch any webAgentId added after creation
-        response_content = remove_webagentid_recursive(response_content)
-        logger.error(f"🔍 DEBUG: Before JSON serialization - keys: {list(response_content.keys())}, has webAgentId: {'webAgentId' in response_content}")
-        
-        # CRITICAL: Log the actual response content size and first few actions
-        try:
-            # CRITICAL: Apply filter one more time before serialization
-            response_content = remove_webagentid_recursive(response_content)
-            response_content.pop("webAgentId", None)  # Force remove
-            logger.error(f"🔍 DEBUG: Right before json.dumps - keys: {list(response_content.keys())}, has webAgentId: {'webAgentId' in response_content}")
-            response_json = json.dumps(response_content)
-            logger.error(f"🔍 DEBUG: After json.dumps - JSON contains webAgentId: {'webAgentId' in response_json}")
-            logger.info(f"📦 Response size: {len(response_json)} bytes, actions in response: {len(response_content.get('actions', []))}")
-            if response_content["actions"] and len(response_content["actions"]) > 0:
-                first_action = response_content["actions"][0]
-                logger.info(f"📋 First action keys: {list(first_action.keys())}, has timeSeconds: {'timeSeconds' in first_action}")
-                logger.info(f"📋 First 3 actions: {[a.get('type', 'N/A') for a in response_content['actions'][:3]]}")
-                logger.info(f"✅ FINAL VERIFICATION: Returning {len(response_content['actions'])} actions for task {request.id}")
-                
-                # CRITICAL: Log actual JSON to verify it's correct
-                logger.info(f"📋 Response JSON preview (first 500 chars): {response_json[:500]}")
-                # CRITICAL: Check if webAgentId appeared in the JSON (should not be there)
-                if "webAgentId" in response_json:
-                    logger.error(f"🚨 CRITICAL: webAgentId found in response JSON preview! Removing it immediately.")
-                    # Parse JSON, remove webAgentId, and update response_content
-                    parsed_preview = json.loads(response_json)
-                    if "webAgentId" in parsed_preview:
-                        logger.error(f"🚨 CRITICAL: webAgentId found in parsed_preview! Removing it.")
-                        del parsed_preview["webAgentId"]
-                        response_content = parsed_preview
-                        logger.warning(f"⚠️ Removed webAgentId from response_content after JSON preview check")
-                
-                # CRITICAL: IMMEDIATE removal - do this BEFORE any other code that might cause exceptions
-                # This MUST happen before the learning system code runs
-                if "webAgentId" in response_content:
-                    logger.error(f"🚨 CRITICAL: webAgentId STILL in response_content after JSON check! Removing NOW.")
-                    del response_content["webAgentId"]
-                
-                # CRITICAL: Force remove webAgentId one more time right before learning system code
-                response_content.pop("webAgentId", None)  # Use pop to avoid KeyError
-            else:
-                logger.error(f"🚨 CRITICAL: Response has EMPTY actions array! This should never happen!")
-                # This should be impossible now, but if it happens, log it heavily
-                import traceback
-                logger.error(f"🚨 CRITICAL ERROR TRACEBACK: {traceback.format_exc()}")
-        except Exception as log_err:
-            logger.error(f"❌ FATAL: Error logging response for task {request.id}: {log_err}", exc_info=True)
-        
-        # CRITICAL: Final check - ensure webAgentId is NEVER in response_content before cleanup
-        if "webAgentId" in response_content:
-            logger.error(f"🚨 CRITICAL: webAgentId found in response_content BEFORE cleanup! Removing it.")
-            del response_content["webAgentId"]
-        
-        # CRITICAL: Final check before creating JSONResponse
-        if not response_content.get("actions") or len(response_content["actions"]) == 0:
-            logger.error(f"🚨 FATAL: Actions is STILL empty right before JSONResponse! This is a critical bug!")
-            response_content["actions"] = [
-                {"type": "NavigateAction", "url": request.url or "https://example.com"},
-                {"type": "WaitAction", "timeSeconds": 1.0},
-                {"type": "ScreenshotAction"}
-            ]
-        
-        # 🧠 SELF-LEARNING: Enhance actions using learned patterns (if enabled)
-        # CRITICAL FIX: Define LEARNING_ENABLED at function start to prevent NameError
-        # Initialize to False first, then try to get from settings
-        learning_enabled_flag = False
-        try:
-            from config.settings import settings
-            learning_enabled_flag = getattr(settings, 'learning_enabled', False)
-        except (ImportError, AttributeError, Exception):
-            learning_enabled_flag = False
-        
-        if learning_enabled_flag:
-            try:
-                from api.utils.learning_system import LearningSystem
-                learning_system = LearningSystem()
-                # Enhance actions based on learned patterns
-                enhanced_actions = learning_system.enhance_actions(
-                    actions=response_content["actions"],
+                from api.utils.learning_system import get_learning_system
+                enhanced_actions = get_learning_system().enhance_actions(
+                    actions=actions,
                     task_type=task_type,
                     prompt=request.prompt
                 )
-                if enhanced_actions != response_content["actions"]:
+                if enhanced_actions != actions:
                     logger.info(f"✨ Enhanced {len(enhanced_actions)} actions using learned patterns")
-                    response_content["actions"] = enhanced_actions
+                    actions = enhanced_actions
             except Exception as learn_err:
                 logger.debug(f"Learning enhancement error (non-critical): {learn_err}")
         
-        # 🔍 DIAGNOSTIC: Track response before sending and validate
+        # CRITICAL: Match official Autoppia response format exactly
+        # Official format: {actions: [], web_agent_id: str, recording: str}
+        # Normalize and validate once (camelCase, no webAgentId, never empty) and serialize once
+        iwa_errors: List[str] = []
+        with stage_timer("normalize"):
+            response_content = build_response_content(
+                actions,
+                web_agent_id=request.id,
+                fallback_url=request.url or _infer_url_from_prompt(request.prompt, ""),
+                errors=iwa_errors
+            )
+        
+        # IWA validation ran in the same pass (log only - validators will reject if invalid)
+        if iwa_errors:
+            logger.error(f"❌ IWA Validation Failed for task {request.id}:")
+            for error in iwa_errors[:5]:  # Limit to first 5 errors
+                logger.error(f"   - {error}")
+            logger.warning(f"⚠️ Returning invalid IWA actions - validators may reject")
+        
+        with stage_timer("serialize"):
+            body = encode_response_content(response_content)
+        
+        if solve_cache is not None and generated:
+            solve_cache.put(cache_key, response_content["actions"], cache_agent_id, task_type)
+        
+        # 🔍 DIAGNOSTIC: Track response before sending
         try:
             from api.utils.empty_actions_diagnostic import get_diagnostic
-            diagnostic = get_diagnostic()
-            diagnostic.checkpoint(
+            get_diagnostic().checkpoint(
                 stage="before_jsonresponse",
                 task_id=request.id,
                 actions=response_content["actions"],
                 context={
                     "response_keys": list(response_content.keys()),
-                    "response_size": len(json.dumps(response_content)),
+                    "response_size": len(body),
                 }
             )
-            
-            # Validate response before sending
-            is_valid, error_msg = diagnostic.validate_response_before_send(
-                task_id=request.id,
-                response_content=response_content
-            )
-            
-            if not is_valid:
-                logger.error(
-                    f"🚨 CRITICAL: Response validation failed for task {request.id}: {error_msg}"
-                )
-                # Force add actions if validation fails
-                if not response_content.get("actions") or len(response_content["actions"]) == 0:
-                    logger.error(f"🚨 FORCING actions into response due to validation failure")
-                    response_content["actions"] = [
-                        {"type": "NavigateAction", "url": request.url or "https://example.com"},
-                        {"type": "WaitAction", "timeSeconds": 1.0},
-                        {"type": "ScreenshotAction"}
-                    ]
         except ImportError:
             pass  # Diagnostic not available
         except Exception as diag_err:
             logger.debug(f"Diagnostic error (non-critical): {diag_err}")
         
-        # CRITICAL: Remove webAgentId if it exists (playground expects ONLY web_agent_id)
-        # Do this MULTIPLE times to ensure it's gone
-        if "webAgentId" in response_content:
-            logger.warning(f"⚠️ Removing webAgentId from response - playground expects only web_agent_id")
-            del response_content["webAgentId"]
-        
-        # CRITICAL: Final check before try block - ensure webAgentId is gone
-        if "webAgentId" in response_content:
-            logger.error(f"🚨 CRITICAL: webAgentId STILL present before try block! Removing it.")
-            del response_content["webAgentId"]
+        logger.info(
+            f"✅ Returning {len(response_content['actions'])} actions for task {request.id} "
+            f"({len(body)} bytes, {response_time:.2f}s)"
+        )
         
-        try:
-            # CRITICAL: Final cleanup - ensure webAgentId is NEVER in response_content
-            # Playground uses strict Pydantic validation that rejects unexpected fields
-            if "webAgentId" in response_content:
-                logger.warning(f"⚠️ CRITICAL: Found webAgentId in response_content - removing it (playground strict validation)")
-                del response_content["webAgentId"]
-            
-            # CRITICAL: Create response with ONLY allowed fields (playground strict validation)
-            # Allowed fields: actions, web_agent_id, recording
-            clean_response_content = {
-                "actions": response_content.get("actions", []),
-                "web_agent_id": response_content.get("web_agent_id", request.id),
-                "recording": response_content.get("recording", ""),
-            }
-            
-            # CRITICAL: Verify clean_response_content has no webAgentId
-            if "webAgentId" in clean_response_content:
-                logger.error(f"🚨 FATAL: webAgentId still in clean_response_content after cleanup!")
-                del clean_response_content["webAgentId"]
-            
-            # CRITICAL: Use Response with manual JSON serialization to prevent FastAPI/Pydantic from adding webAgentId
-            # FastAPI's JSONResponse might use Pydantic serialization which could add aliases
-            import json as json_module
-            
-            # CRITICAL: Final filter - remove webAgentId from clean_response_content before serialization
-            clean_response_content.pop("webAgentId", None)
-            
-            # CRITICAL: Serialize and immediately parse to check for webAgentId
-            response_json_str = json_module.dumps(clean_response_content, ensure_ascii=False)
-            
-            # CRITICAL: Parse back to verify no webAgentId was added during serialization
-            parsed_final = json_module.loads(response_json_str)
-            parsed_final.pop("webAgentId", None)  # Remove if present
-            response_json_str = json_module.dumps(parsed_final, ensure_ascii=False)
-            
-            # Use Response with raw JSON string to bypass FastAPI serialization
-            from fastapi import Response
-            
-            # FINAL SAFEGUARD: Parse and verify one more time before creating Response
-            final_parsed = json_module.loads(response_json_str)
-            if "webAgentId" in final_parsed:
-                logger.error(f"🚨 FINAL SAFEGUARD: webAgentId STILL present! Removing it now.")
-                del final_parsed["webAgentId"]
-                response_json_str = json_module.dumps(final_parsed, ensure_ascii=False)
-                logger.error(f"🚨 FINAL SAFEGUARD: Re-serialized without webAgentId")
-            
-            response = Response(
-                content=response_json_str,
-                status_code=200,
-                media_type="application/json",
-                headers=CORS_HEADERS
-            )
-            
-            # Verify the response content one final time
-            try:
-                verify_parsed = json_module.loads(response_json_str)
-                if "webAgentId" in verify_parsed:
-                    logger.error(f"🚨 FATAL: webAgentId STILL in final response! Removing it one more time.")
-                    del verify_parsed["webAgentId"]
-                    response_json_str = json_module.dumps(verify_parsed, ensure_ascii=False)
-                    # Recreate response with cleaned JSON
-                    response = Response(
-                        content=response_json_str,
-                        status_code=200,
-                        media_type="application/json",
-                        headers=CORS_HEADERS
-                    )
-                else:
-                    logger.info(f"✅ Created response with ONLY web_agent_id (no webAgentId) - VERIFIED")
-            except Exception as verify_err:
-                logger.debug(f"Response verification error (non-critical): {verify_err}")
-            
-            # FINAL FINAL CHECK: Parse response content one last time before returning
-            # CRITICAL: Build response manually with ONLY allowed fields - NO webAgentId possible
-            try:
-                final_check = json_module.loads(response.content.decode('utf-8'))
-                final_check = remove_webagentid_recursive(final_check)
-                
-                # Build manually to guarantee no webAgentId
-                final_clean = {}
-                final_clean["actions"] = final_check.get("actions", [])
-                final_clean["web_agent_id"] = final_check.get("web_agent_id", request.id)
-                final_clean["recording"] = final_check.get("recording", "")
-                
-                # One more recursive filter
-                final_clean = remove_webagentid_recursive(final_clean)
-                
-                # CRITICAL: Build JSON string manually - NO webAgentId possible
-                # Don't use json.dumps on the dict - build the JSON string manually
-                actions_json = json_module.dumps(final_clean.get("actions", []), ensure_ascii=False)
-                web_agent_id_value = json_module.dumps(final_clean.get("web_agent_id", request.id), ensure_ascii=False)
-                recording_value = json_module.dumps(final_clean.get("recording", ""), ensure_ascii=False)
-                
-                # Build JSON string manually - NO webAgentId possible
-                final_json_str = f'{{"actions":{actions_json},"web_agent_id":{web_agent_id_value},"recording":{recording_value}}}'
-                
-                logger.error(f"🔍 DEBUG: Manual JSON string contains webAgentId: {'webAgentId' in final_json_str}")
-                
-                # Recreate response with manually built JSON
-                response = Response(
-                    content=final_json_str,
-                    status_code=200,
-                    media_type="application/json",
-                    headers=CORS_HEADERS
-                )
-                
-                # Verify one last time
-                verify_final = json_module.loads(response.content.decode('utf-8'))
-                if "webAgentId" in verify_final:
-                    logger.error(f"🚨 FATAL: webAgentId in final response after manual build!")
-                else:
-                    logger.error(f"✅ VERIFIED: Final response has NO webAgentId")
-            except Exception as final_err:
-                logger.error(f"Final check error: {final_err}", exc_info=True)
-            
-            return response
-        except Exception as response_err:
-            logger.error(f"❌ FATAL: JSONResponse creation FAILED for task {request.id}: {response_err}", exc_info=True)
-            # Last resort: return minimal valid response
-            emergency_response = {
-                "actions": [
-                    {"type": "NavigateAction", "url": request.url or "https://example.com"},
-                    {"type": "WaitAction", "timeSeconds": 1.0},
-                    {"type": "ScreenshotAction"}
-                ],
-                "web_agent_id": request.id,  # snake_case - official playground format
-                "recording": ""
-            }
-            # CRITICAL: Apply recursive filter to emergency response
-            emergency_response = remove_webagentid_recursive(emergency_response)
-            logger.error(f"🚨 Returning emergency response: {len(emergency_response['actions'])} actions")
-            # Use raw Response with manual JSON serialization to prevent FastAPI from adding webAgentId
-            import json as json_module
-            from fastapi import Response
-            emergency_json = json_module.dumps(emergency_response, ensure_ascii=False)
-            # Apply filter one more time
-            emergency_parsed = json_module.loads(emergency_json)
-            emergency_parsed = remove_webagentid_recursive(emergency_parsed)
-            emergency_json = json_module.dumps(emergency_parsed, ensure_ascii=False)
-            return Response(
-                content=emergency_json,
-                status_code=200,
-                media_type="application/json",
-                headers=CORS_HEADERS
-            )
+        # Raw Response with pre-encoded body bypasses FastAPI/Pydantic serialization
+        return Response(
+            content=body,
+            status_code=200,
+            media_type="application/json",
+            headers=CORS_HEADERS
+        )
     
     except asyncio.TimeoutError:
         # Handle timeout - try to return fallback actions instead of empty
-        logger.warning(f"Task {request.id} timed out after 90 seconds - generating fallback actions")
+        logger.warning(f"Task {request.id} timed out after {deadline.elapsed():.2f}s - generating fallback actions")
         
         # SIMPLIFIED: Removed all monitoring/metrics (not needed for simple miner)
         
         # CRITICAL FIX: Generate fallback actions on timeout instead of returning empty
         # This helps benchmark tests pass even on timeout
-        fallback_actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=10)
+        fallback_actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=10, context=task_context, deadline=deadline)
         logger.info(f"Generated {len(fallback_actions)} fallback actions after timeout")
         
-        return JSONResponse(
-            content={
-                "actions": fallback_actions,  # Return fallback actions instead of empty
-                "web_agent_id": request.id,  # snake_case - official playground format
-                "recording": "",
-            },
+        return Response(
+            content=encode_solve_response(fallback_actions, request.id, request.url),
             status_code=200,  # Return 200 with fallback actions
+            media_type="application/json",
             headers=CORS_HEADERS
         )
     
@@ -1013,65 +606,153 @@ async def solve_task(request: TaskRequest, http_request: Request):
         
         # CRITICAL FIX: Try to generate fallback actions instead of returning empty
         # This ensures benchmark tests don't fail due to exceptions
-        fallback_actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=20)
+        fallback_actions = await _generate_fallback_actions(request.prompt, request.url or "", max_actions=20, context=task_context, deadline=deadline)
         logger.info(f"Generated {len(fallback_actions)} fallback actions after error")
         
-        # CRITICAL: Create clean response content with ONLY web_agent_id (no webAgentId)
-        # Use raw JSON Response to prevent FastAPI from adding webAgentId
-        import json as json_module
-        from fastapi import Response
-        
-        logger.error(f"🚨 EXCEPTION HANDLER: Creating exception response for task {request.id}")
-        
-        # CRITICAL: Create response with ONLY allowed fields (playground strict validation)
-        # Build manually to ensure NO webAgentId can sneak in
-        exception_response_content = {}
-        exception_response_content["actions"] = fallback_actions
-        exception_response_content["web_agent_id"] = request.id  # snake_case - official playground format
-        exception_response_content["recording"] = ""
-        
-        logger.error(f"🚨 EXCEPTION HANDLER: Created dict with keys: {list(exception_response_content.keys())}")
-        logger.error(f"🚨 EXCEPTION HANDLER: Has webAgentId in dict: {'webAgentId' in exception_response_content}")
-        
-        # CRITICAL: Verify no webAgentId before serialization
-        if "webAgentId" in exception_response_content:
-            logger.error(f"🚨 EXCEPTION HANDLER: webAgentId found in dict! Removing it.")
-            del exception_response_content["webAgentId"]
-        
-        # CRITICAL: Serialize to JSON string and verify no webAgentId
-        exception_json_str = json_module.dumps(exception_response_content, ensure_ascii=False)
-        logger.error(f"🚨 EXCEPTION HANDLER: JSON string (first 200 chars): {exception_json_str[:200]}")
-        logger.error(f"🚨 EXCEPTION HANDLER: Has webAgentId in JSON string: {'webAgentId' in exception_json_str}")
-        
-        # CRITICAL: Final verification before returning - apply recursive filter one more time
-        final_exception_parsed = json_module.loads(exception_json_str)
-        final_exception_parsed = remove_webagentid_recursive(final_exception_parsed)
-        if "webAgentId" in final_exception_parsed:
-            logger.error(f"🚨 EXCEPTION HANDLER: webAgentId STILL present after recursive filter!")
-            final_exception_parsed.pop("webAgentId", None)
-        else:
-            logger.error(f"✅ EXCEPTION HANDLER: Response verified - no webAgentId after recursive filter")
-        
-        # CRITICAL: Build JSON string manually - NO webAgentId possible
-        actions_json = json_module.dumps(final_exception_parsed.get("actions", []), ensure_ascii=False)
-        web_agent_id_value = json_module.dumps(final_exception_parsed.get("web_agent_id", request.id), ensure_ascii=False)
-        recording_value = json_module.dumps(final_exception_parsed.get("recording", ""), ensure_ascii=False)
-        
-        # Build JSON string manually - NO webAgentId possible
-        exception_json_str = f'{{"actions":{actions_json},"web_agent_id":{web_agent_id_value},"recording":{recording_value}}}'
-        
-        logger.error(f"🚨 EXCEPTION HANDLER: Final JSON string (first 200 chars): {exception_json_str[:200]}")
-        logger.error(f"🚨 EXCEPTION HANDLER: Final check - Has webAgentId: {'webAgentId' in exception_json_str}")
-        
         # Return actions (fallback if available) instead of empty
         # Benchmark expects actions, not empty array
         return Response(
-            content=exception_json_str,
+            content=encode_solve_response(fallback_actions, request.id, request.url),
             status_code=200,  # Return 200 with fallback actions (better than 500 with empty)
             media_type="application/json",
             headers=CORS_HEADERS
         )
 
+async def _iter_batch_payloads(http_request: Request) -> AsyncIterator[Any]:
+    """
+    Yield raw task payloads from a batch body as they arrive
+
+    Accepts a JSON array of TaskRequest objects (parsed once the body is complete)
+    or NDJSON (one TaskRequest per line, yielded as soon as each line arrives).
+    """
+    buffer = b""
+    is_array = None
+    async for chunk in http_request.stream():
+        if not chunk:
+            continue
+        buffer += chunk
+        if is_array is None:
+            stripped = buffer.lstrip()
+            if not stripped:
+                continue
+            is_array = stripped.startswith(b"[")
+        if is_array:
+            continue
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+    if is_array:
+        payloads = json.loads(buffer)
+        if not isinstance(payloads, list):
+            raise ValueError("batch body must be a JSON array or NDJSON")
+        for payload in payloads:
+            yield payload
+    elif buffer.strip():
+        yield json.loads(buffer)
+
+
+def _batch_result_line(index: int, task_id: str, body: bytes) -> bytes:
+    """Prefix an encoded solve response with its batch index and task id (one NDJSON line)"""
+    prefix = json.dumps({"index": index, "id": task_id}, ensure_ascii=False, separators=(",", ":"))
+    return prefix[:-1].encode("utf-8") + b"," + body[1:] + b"\n"
+
+
+class _BatchStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that streams while the request body is still being read
+
+    Starlette watches receive() for client disconnects while streaming, which would
+    steal the body chunks the batch reader still needs. The watch only starts once the
+    body is consumed; a disconnect before that ends the body reader instead.
+    """
+
+    def __init__(self, content: AsyncIterator[bytes], body_done: asyncio.Event, **kwargs):
+        super().__init__(content, **kwargs)
+        self.body_done = body_done
+
+    async def listen_for_disconnect(self, receive) -> None:
+        await self.body_done.wait()
+        await super().listen_for_disconnect(receive)
+
+
+@router.post("/solve_tasks")
+async def solve_tasks(http_request: Request):
+    """
+    Batch endpoint for offline evaluation and replay
+    Input: JSON array or NDJSON stream of TaskRequest objects
+    Output: NDJSON stream, one {index, id, actions, web_agent_id, recording} line per
+    task in completion order (not input order)
+    
+    Tasks run through the same path as /solve_task (shared solve cache, single-flight
+    and browser), at most batch_concurrency at a time. Solving starts while the body
+    is still arriving; results stream back as each task completes.
+    """
+    concurrency = max(1, int(getattr(settings, 'batch_concurrency', 8)))
+    slots = asyncio.Semaphore(concurrency)
+    results: asyncio.Queue = asyncio.Queue()
+    workers = set()
+    input_done = asyncio.Event()
+    
+    async def run_one(index: int, payload: Any):
+        task_id = str(payload.get("id") or "") if isinstance(payload, dict) else ""
+        try:
+            task_request = TaskRequest.model_validate(payload)
+            task_id = task_request.id
+            response = await solve_task(task_request, http_request)
+            body = response.body
+        except Exception as e:
+            logger.warning(f"Batch task {index} failed: {type(e).__name__}: {e}")
+            body = encode_solve_response([{"type": "ScreenshotAction"}], task_id or "unknown")
+        finally:
+            slots.release()
+        await results.put(_batch_result_line(index, task_id or "unknown", body))
+    
+    async def produce() -> int:
+        count = 0
+        try:
+            async for payload in _iter_batch_payloads(http_request):
+                # Backpressure: read the next task only when a slot is free
+                await slots.acquire()
+                worker = asyncio.create_task(run_one(count, payload))
+                workers.add(worker)
+                worker.add_done_callback(workers.discard)
+                count += 1
+        except Exception as e:
+            # Malformed JSON or a dropped upload: finish the tasks already started
+            logger.warning(f"Batch body read error after {count} tasks: {type(e).__name__}: {e}")
+        finally:
+            input_done.set()
+        return count
+    
+    # Tasks start solving while the body is still being read, and results stream back
+    # as they complete (the response does not wait for the body to end)
+    producer = asyncio.create_task(produce())
+    
+    async def stream() -> AsyncIterator[bytes]:
+        sent = 0
+        try:
+            while not (producer.done() and sent == producer.result()):
+                getter = asyncio.ensure_future(results.get())
+                waiting = {getter} if producer.done() else {getter, producer}
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    sent += 1
+                    yield getter.result()
+                else:
+                    getter.cancel()
+        finally:
+            # Client went away (or we are done): stop reading and abandon unfinished tasks
+            producer.cancel()
+            for worker in list(workers):
+                worker.cancel()
+        logger.info(f"✅ Batch complete: {sent} results streamed (concurrency={concurrency})")
+    
+    return _BatchStreamingResponse(
+        stream(), body_done=input_done, media_type="application/x-ndjson", headers=CORS_HEADERS
+    )
+
+
 
 
 @router.get("/learning/stats")
@@ -1,6 +1,6 @@
 """FastAPI server setup"""
 from contextlib import asynccontextmanager
-from fastapi import FastAPI, Request
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.exceptions import RequestValidationError
 from fastapi.responses import JSONResponse
@@ -8,6 +8,7 @@ from .endpoints import router
 # SIMPLIFIED: Removed feedback endpoints (not needed for core functionality)
 # SIMPLIFIED: Removed dashboard and learning endpoints (not needed)
 from config.settings import settings
+import asyncio
 import logging
 import os
 
@@ -37,7 +38,7 @@ async def lifespan(app: FastAPI):
     
     try:
         from api.utils.browser_analyzer import _get_browser, close_browser
-        # Pre-initialize browser instance (singleton pattern)
+        # Pre-initialize browser instances (each prewarms its pooled pages)
         browser = await _get_browser()
         if browser:
             logger.info("✅ Playwright browser instance cached at startup (critical for performance)")
@@ -47,8 +48,23 @@ async def lifespan(app: FastAPI):
         logger.warning(f"⚠️ Browser initialization at startup failed (non-critical): {e}")
         logger.info("   Browser will be initialized on first use (slower)")
     
+    # Load the persisted selector map before the first request needs it
+    try:
+        from api.utils.selector_map import get_selector_map
+        await asyncio.to_thread(get_selector_map)
+    except Exception as e:
+        logger.warning(f"⚠️ Selector map load failed (non-critical): {e}")
+    
+    # Warm regex tables and demo-site snapshots in the background (progress on /health)
+    from api.utils.warmup import run_warmup
+    warmup_task = asyncio.create_task(run_warmup())
+    
     yield
     
+    if not warmup_task.done():
+        warmup_task.cancel()
+        await asyncio.gather(warmup_task, return_exceptions=True)
+    
     # Cleanup: Close browser on shutdown
     try:
         from api.utils.browser_analyzer import close_browser
@@ -56,6 +72,22 @@ async def lifespan(app: FastAPI):
         logger.info("✅ Browser instance closed on shutdown")
     except Exception as e:
         logger.warning(f"⚠️ Error closing browser on shutdown: {e}")
+    
+    # Persist selectors learned since the last save
+    try:
+        from api.utils.selector_map import get_selector_map
+        selector_map = get_selector_map()
+        if selector_map is not None:
+            selector_map.save()
+    except Exception as e:
+        logger.warning(f"⚠️ Error saving selector map: {e}")
+    
+    # Close the shared keep-alive HTTP client of the static analyzer
+    try:
+        from api.utils.live_analyzer import live_analyzer
+        await live_analyzer.close()
+    except Exception as e:
+        logger.warning(f"⚠️ Error closing static analyzer client: {e}")
 
 
 app = FastAPI(
@@ -106,20 +138,52 @@ app.include_router(router)
 
 @app.get("/health")
 async def health():
-    """Health check endpoint - SIMPLIFIED"""
+    """Health check endpoint - SIMPLIFIED (ready = startup warmup finished)"""
+    from api.utils.warmup import get_warmup_state
     agent_type = os.getenv("AGENT_TYPE", settings.agent_type)
+    warmup = get_warmup_state()
     return {
         "status": "healthy",
         "version": "1.0.0",
         "agent_type": agent_type,
+        "ready": warmup.pop("ready"),
+        "warmup": warmup,
     }
 
 
 @app.get("/metrics")
 async def metrics():
-    """Metrics endpoint - SIMPLIFIED: Returns empty metrics"""
-    return JSONResponse(
-        content={"status": "ok", "metrics": {}},
+    """Metrics endpoint - per-stage latency histograms and component counters (Prometheus text format)"""
+    from api.utils.metrics import get_metrics
+    from api.utils.solve_cache import get_solve_cache
+    from api.utils.single_flight import get_solve_flight
+    from api.utils.admission import get_admission
+    from api.utils.live_analyzer import live_analyzer
+    from api.utils.selector_map import get_selector_map
+    from api.utils.task_parser import get_template_cache
+    selector_map = get_selector_map()
+    template_cache = get_template_cache()
+    try:
+        from api.utils.browser_analyzer import get_snapshot_cache
+        from api.utils.browser_manager import get_browser_manager
+        snapshot_cache = get_snapshot_cache()
+        browser_manager = get_browser_manager()
+    except ImportError:
+        snapshot_cache = browser_manager = None  # Playwright not installed
+    body = get_metrics().render_prometheus(stats={
+        "solve_cache": get_solve_cache().get_stats(),
+        "single_flight": get_solve_flight().get_stats(),
+        "admission": get_admission().get_stats(),
+        "static_analyzer": live_analyzer.get_stats(),
+        "selector_map": selector_map.get_stats() if selector_map is not None else {},
+        "task_parser": template_cache.get_stats() if template_cache is not None else {},
+        "browser": browser_manager.get_stats() if browser_manager is not None else {},
+        "page_pool": browser_manager.get_pool_stats() if browser_manager is not None else {},
+        "page_snapshots": snapshot_cache.get_stats() if snapshot_cache is not None else {},
+    })
+    return Response(
+        content=body,
+        media_type="text/plain; version=0.0.4; charset=utf-8",
         headers=CORS_HEADERS
     )
 
@@ -133,6 +197,7 @@ async def root():
             "version": "1.0.0",
                 "endpoints": {
                     "solve_task": "/solve_task",
+                    "solve_tasks": "/solve_tasks",
                     "health": "/health",
                     "metrics": "/metrics"
                 }
@@ -1,6 +1,7 @@
 """Action optimization for better accuracy and success rates"""
 from typing import Dict, Any, List
 import logging
+from ..actions.selectors import Selector
 
 logger = logging.getLogger(__name__)
 
@@ -116,7 +117,8 @@ class ActionOptimizer:
         enhanced = []
         
         for action in actions:
-            if "selector" in action and isinstance(action["selector"], dict):
+            # Interned selectors (create_selector) are complete and immutable - nothing to fix
+            if "selector" in action and isinstance(action["selector"], dict) and not isinstance(action["selector"], Selector):
                 selector = action["selector"]
                 
                 # Ensure selector has required fields
@@ -0,0 +1,239 @@
+"""
+Admission control and load-adaptive degradation for /solve_task
+
+At most admission_max_concurrent generations run at once; further requests
+wait in a bounded FIFO queue (within their request deadline) and are turned
+away once admission_max_queue are already waiting. Queue depth and the p95
+of recent admitted-request latency drive a degradation ladder:
+
+    0 - normal
+    1 - skip live page analysis (browser + HTTP fetch)
+    2 - also skip the optional enrichers (website detection, task planning,
+        context detection)
+    3 - cached or template (heuristic) plans only, no queueing
+
+The level steps up as soon as either signal crosses a threshold and steps
+back down one level at a time once load has stayed below the thresholds for
+degrade_cooldown_seconds.
+"""
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional, Sequence, Tuple
+
+from .deadline import Deadline
+from .metrics import get_metrics, record_stage
+
+logger = logging.getLogger(__name__)
+
+LEVEL_NORMAL = 0
+LEVEL_NO_BROWSER = 1
+LEVEL_NO_ENRICHERS = 2
+LEVEL_TEMPLATE_ONLY = 3
+
+LEVEL_NAMES = {
+    LEVEL_NORMAL: "normal",
+    LEVEL_NO_BROWSER: "no_browser",
+    LEVEL_NO_ENRICHERS: "no_enrichers",
+    LEVEL_TEMPLATE_ONLY: "template_only",
+}
+
+
+class AdmissionRejected(Exception):
+    """The admission queue is full - serve a template plan instead of queueing"""
+
+
+class AdmissionController:
+    """Bounded concurrency + FIFO wait queue with a degradation ladder"""
+
+    def __init__(
+        self,
+        max_concurrent: int = 16,
+        max_queue: int = 64,
+        queue_thresholds: Sequence[int] = (4, 16, 48),
+        p95_thresholds: Sequence[float] = (8.0, 15.0, 25.0),
+        cooldown: float = 10.0,
+        window: float = 60.0,
+    ):
+        """
+        Args:
+            max_concurrent: Generations allowed to run at once
+            max_queue: Waiting requests allowed before rejecting
+            queue_thresholds: Queue depth that triggers levels 1, 2, 3
+            p95_thresholds: p95 latency (seconds) that triggers levels 1, 2, 3
+            cooldown: Seconds below threshold before stepping down one level
+            window: Seconds of latency samples used for p95
+        """
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.max_queue = max(0, int(max_queue))
+        self.queue_thresholds = tuple(queue_thresholds)
+        self.p95_thresholds = tuple(p95_thresholds)
+        self.cooldown = float(cooldown)
+        self.window = float(window)
+
+        self._active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._waiting = 0
+        self._samples: Deque[Tuple[float, float]] = deque()  # (finished_at, latency)
+
+        self._level = LEVEL_NORMAL
+        self._level_since = time.monotonic()
+        self.admitted = 0
+        self.rejected = 0
+        self.abandoned = 0  # gave up while queued (budget ran out or cancelled)
+        self.level_changes = 0
+
+        metrics = get_metrics()
+        self._wait_hist = metrics.histogram(
+            "solve_admission_wait_seconds",
+            "Time requests spent queued for a generation slot",
+        )
+        self._level_counter = metrics.counter(
+            "solve_degradation_transitions_total",
+            "Degradation level changes",
+            ("to_level",),
+        )
+
+    # ------------------------------------------------------------------
+    # Degradation ladder
+    # ------------------------------------------------------------------
+
+    def p95(self) -> float:
+        """p95 latency of admitted requests finished within the window (0 if none)"""
+        cutoff = time.monotonic() - self.window
+        while self._samples and self._samples[0][0] < cutoff:
+            self._samples.popleft()
+        if not self._samples:
+            return 0.0
+        latencies = sorted(latency for _, latency in self._samples)
+        return latencies[min(len(latencies) - 1, math.ceil(0.95 * len(latencies)) - 1)]
+
+    def _target_level(self) -> int:
+        depth = self._waiting
+        p95 = self.p95()
+        target = LEVEL_NORMAL
+        for level, (max_depth, max_p95) in enumerate(zip(self.queue_thresholds, self.p95_thresholds), start=1):
+            if depth >= max_depth or p95 >= max_p95:
+                target = level
+        return target
+
+    def level(self) -> int:
+        """Current degradation level (re-evaluated on every call)"""
+        target = self._target_level()
+        now = time.monotonic()
+        if target > self._level:
+            self._set_level(target, now)
+        elif target < self._level and now - self._level_since >= self.cooldown:
+            self._set_level(self._level - 1, now)  # step back up gradually
+        return self._level
+
+    def _set_level(self, level: int, now: float):
+        previous, self._level, self._level_since = self._level, level, now
+        self.level_changes += 1
+        self._level_counter.inc((LEVEL_NAMES.get(level, str(level)),))
+        if level > previous:
+            logger.warning(
+                f"🚦 Degrading to level {level} ({LEVEL_NAMES.get(level)}): "
+                f"queue={self._waiting}, in_flight={self._active}, p95={self.p95():.2f}s"
+            )
+        else:
+            logger.info(f"🚦 Load eased - back to level {level} ({LEVEL_NAMES.get(level)})")
+
+    # ------------------------------------------------------------------
+    # Admission
+    # ------------------------------------------------------------------
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[Deadline] = None, reserve: float = 0.0):
+        """
+        Hold one generation slot for the duration of the block
+
+        Raises:
+            AdmissionRejected: the wait queue is full
+            asyncio.TimeoutError: the request budget ran out while queued
+        """
+        queued_at = time.monotonic()
+        await self._acquire(deadline or Deadline.unbounded(), reserve)
+        waited = time.monotonic() - queued_at
+        self._wait_hist.observe(waited, ())
+        record_stage("admission_wait", waited)
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            finished_at = time.monotonic()
+            self._samples.append((finished_at, finished_at - queued_at))
+            self._release()
+            self.level()
+
+    async def _acquire(self, deadline: Deadline, reserve: float):
+        if self._active < self.max_concurrent and not self._waiters:
+            self._active += 1
+            return
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            self.level()
+            raise AdmissionRejected(f"admission queue full ({self._waiting} waiting)")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self._waiting += 1
+        self.level()
+        try:
+            await deadline.run(waiter, "admission", reserve=reserve)
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                self._release()  # the slot was handed over just as we gave up
+            else:
+                waiter.cancel()
+                self.abandoned += 1
+            raise
+        finally:
+            self._waiting -= 1
+
+    def _release(self):
+        # Hand the slot straight to the oldest live waiter (FIFO, no thundering herd)
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self._active -= 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get admission counters and current load signals"""
+        return {
+            "level": self.level(),
+            "in_flight": self._active,
+            "queue_depth": self._waiting,
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "p95_seconds": self.p95(),
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "abandoned": self.abandoned,
+            "level_changes": self.level_changes,
+        }
+
+
+# Global admission controller instance
+_admission: Optional[AdmissionController] = None
+
+
+def get_admission() -> AdmissionController:
+    """Get or create global admission controller"""
+    global _admission
+    if _admission is None:
+        from config.settings import settings
+        _admission = AdmissionController(
+            max_concurrent=settings.admission_max_concurrent,
+            max_queue=settings.admission_max_queue,
+            queue_thresholds=settings.degrade_queue_depths,
+            p95_thresholds=settings.degrade_p95_seconds,
+            cooldown=settings.degrade_cooldown_seconds,
+            window=settings.degrade_window_seconds,
+        )
+    return _admission
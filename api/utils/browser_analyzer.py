@@ -1,34 +1,242 @@
 """Browser automation using Playwright for accurate selector generation"""
 import asyncio
+import hashlib
 import logging
+import os
 import re
-from typing import Dict, Any, List, Optional
-from playwright.async_api import async_playwright, Browser, Page, TimeoutError as PlaywrightTimeoutError
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Set, Tuple
+from urllib.parse import urlsplit, urlunsplit
+from playwright.async_api import Browser, Page, TimeoutError as PlaywrightTimeoutError
+
+from .browser_manager import get_browser_manager, NoBrowserAvailable
+from .page_pool import install_resource_blocking
+from .page_elements import selector_from_data, css_to_iwa_selector, score_elements, build_element_index
 
 logger = logging.getLogger(__name__)
 
-# Global browser instance (singleton)
-_browser: Optional[Browser] = None
-_playwright = None
 PLAYWRIGHT_AVAILABLE = True  # Assume available if module imports
 
 
+def normalize_snapshot_url(url: str) -> str:
+    """Cache key for a page: lowercased scheme/host, no fragment, no trailing slash (query kept)"""
+    parts = urlsplit((url or "").strip())
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), path, parts.query, ""))
+
+
+def _copy_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Copy handed to callers so nobody mutates the cached elements"""
+    copied = dict(snapshot)
+    copied["elements"] = [dict(element) for element in snapshot.get("elements", [])]
+    return copied
+
+
+class SnapshotCache:
+    """
+    Size-bounded TTL cache of fetch_page results keyed by normalized URL
+    
+    IWA tasks hit the same few demo-site landing pages over and over, so a warm
+    URL skips navigation entirely. With stale_seconds > 0, an entry past its TTL
+    is still served for that long while one background fetch refreshes it.
+    """
+    
+    def __init__(self, max_entries: int = 256, ttl: float = 300.0, stale_seconds: float = 0.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self.stale_seconds = max(0.0, float(stale_seconds))
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._refreshing: Set[str] = set()
+        self._refresh_tasks: Set[asyncio.Task] = set()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.refreshes = 0
+    
+    def get(self, key: str) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        Look up a normalized URL
+        
+        Returns:
+            (snapshot copy or None, is_stale)
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, False
+            age = now - entry[0]
+            if age > self.ttl + self.stale_seconds:
+                del self._entries[key]
+                self.misses += 1
+                return None, False
+            self._entries.move_to_end(key)
+            stale = age > self.ttl
+            if stale:
+                self.stale_hits += 1
+            else:
+                self.hits += 1
+        return _copy_snapshot(entry[1]), stale
+    
+    def contains(self, key: str) -> bool:
+        """True if key can be served (fresh or within its stale window) - no counters touched"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and time.monotonic() - entry[0] <= self.ttl + self.stale_seconds
+    
+    def put(self, key: str, snapshot: Dict[str, Any]):
+        """Store the parts of a fetch_page result worth reusing"""
+        stored = {
+            "html": snapshot.get("html", ""),
+            "url": snapshot.get("url", key),
+            "title": snapshot.get("title", ""),
+            "elements": [dict(element) for element in snapshot.get("elements", [])],
+            "index": snapshot.get("index"),  # immutable, shared by every copy
+        }
+        with self._lock:
+            self._entries[key] = (time.monotonic(), stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+    
+    def refresh_in_background(self, key: str, fetch):
+        """Run fetch() once per key in the background and store its result"""
+        if key in self._refreshing:
+            return
+        self._refreshing.add(key)
+        
+        async def _refresh():
+            try:
+                snapshot = await fetch()
+                if snapshot:
+                    self.put(key, snapshot)
+                    self.refreshes += 1
+            except Exception as e:
+                logger.debug(f"Snapshot refresh failed for {key}: {e}")
+            finally:
+                self._refreshing.discard(key)
+        
+        task = asyncio.ensure_future(_refresh())
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def get_stats(self) -> Dict[str, Any]:
+        """Get snapshot cache counters"""
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "stale_seconds": self.stale_seconds,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "refreshes": self.refreshes,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+# Global snapshot cache instance
+_snapshot_cache: Optional[SnapshotCache] = None
+
+
+def get_snapshot_cache() -> Optional[SnapshotCache]:
+    """Get or create global snapshot cache (None when disabled)"""
+    global _snapshot_cache
+    if _snapshot_cache is None:
+        from config.settings import settings
+        if not getattr(settings, 'snapshot_cache_enabled', True):
+            return None
+        _snapshot_cache = SnapshotCache(
+            max_entries=settings.snapshot_cache_max_entries,
+            ttl=settings.snapshot_cache_ttl,
+            stale_seconds=settings.snapshot_cache_stale_seconds,
+        )
+    return _snapshot_cache
+
+
+def har_path_for(url: str, har_dir: str) -> str:
+    """HAR file holding the recorded navigation of url (one file per exact URL)"""
+    digest = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+    host = urlsplit(url).hostname or "page"
+    return os.path.join(har_dir, f"{host}-{digest}.har")
+
+
 class BrowserAnalyzer:
     """Analyze web pages using Playwright to generate accurate selectors"""
     
     def __init__(self, browser: Browser):
         self.browser = browser
     
-    async def fetch_page(self, url: str, timeout: float = 15.0) -> Optional[Dict[str, Any]]:
+    async def fetch_page(self, url: str, timeout: float = 15.0, lease_timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch page, served from the snapshot cache when the URL is warm
+        
+        lease_timeout: max wait for a pooled page (default: the pool's lease timeout)
+        
+        Returns:
+            Dict with 'html', 'url', 'title', 'elements' or None if failed
+        """
+        cache = get_snapshot_cache()
+        if cache is None:
+            return await self._fetch_page_live(url, timeout, lease_timeout)
+        
+        key = normalize_snapshot_url(url)
+        snapshot, stale = cache.get(key)
+        if snapshot is not None:
+            if stale:
+                cache.refresh_in_background(key, lambda: self._fetch_page_live(url, timeout))
+            logger.info(f"⚡ Page snapshot {'(stale) ' if stale else ''}cache hit for {key}: {len(snapshot['elements'])} elements")
+            return snapshot
+        
+        page_data = await self._fetch_page_live(url, timeout, lease_timeout)
+        if page_data:
+            cache.put(key, page_data)
+        return page_data
+    
+    async def _fetch_page_live(self, url: str, timeout: float = 15.0, lease_timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
         """
         Fetch page with full browser automation - OPTIMIZED for < 1.5s target
         
         EXPERT LLM FEEDBACK: Implement resource blocking and fast content extraction
         to minimize network latency and CPU time.
         
+        Leases a prewarmed page (routes already installed) from the least-loaded
+        browser instance; a standalone analyzer falls back to a one-off context.
+        
         Returns:
             Dict with 'html', 'url', 'title', 'elements' or None if failed
         """
+        from config.settings import settings, data_path
+        har_mode = getattr(settings, 'browser_har_mode', 'off')
+        if har_mode in ("record", "replay"):
+            return await self._fetch_page_har(url, timeout, har_mode, data_path(settings.browser_har_dir))
+        
+        manager = get_browser_manager()
+        if manager.running:
+            try:
+                async with manager.page(lease_timeout) as page:
+                    page.set_default_timeout(timeout * 1000)  # Convert to ms
+                    return await self._load_page(page, url, timeout)
+            except asyncio.TimeoutError:
+                waited = manager.lease_timeout if lease_timeout is None else lease_timeout
+                logger.warning(f"⏳ No pooled page free within {waited:.2f}s - skipping browser fetch for {url}")
+                return None
+            except NoBrowserAvailable:
+                logger.warning(f"⚠️ All browser instances down (relaunching) - skipping browser fetch for {url}")
+                return None
+        
         context = None
         page = None
         
@@ -42,116 +250,10 @@ class BrowserAnalyzer:
             
             # EXPERT LLM FEEDBACK: Block heavy resources (images, media, fonts, tracking)
             # This reduces network latency and memory usage significantly
-            async def route_handler(route):
-                resource_type = route.request.resource_type
-                url_path = route.request.url.lower()
-                
-                # Block images and media (not needed for DOM analysis)
-                if resource_type in ["image", "media"]:
-                    await route.abort()
-                # Block fonts (not needed for selector generation)
-                elif any(ext in url_path for ext in ['.woff', '.woff2', '.ttf', '.otf', '.eot']):
-                    await route.abort()
-                # Block tracking scripts (not needed)
-                elif any(tracker in url_path for tracker in ['google-analytics', 'gtag', 'analytics', 'tracking']):
-                    await route.abort()
-                # Block CSS if not critical (optional - can enable if needed)
-                # elif resource_type == "stylesheet":
-                #     await route.abort()
-                else:
-                    await route.continue_()
-            
-            await page.route("**/*", route_handler)
+            await install_resource_blocking(context, page)
             
             try:
-                # EXPERT LLM FEEDBACK: Use domcontentloaded for faster loading
-                # This is already faster than default 'load' event which waits for images/resources
-                response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
-                
-                if not response or response.status >= 400:
-                    logger.warning(f"Page returned status {response.status if response else 'None'} for {url}")
-                    return None
-                
-                # EXPERT LLM FEEDBACK: Fast content extraction using page.evaluate()
-                # Instead of page.content() which pulls entire HTML, extract only what we need
-                # This is much faster and reduces memory usage
-                page_data = await page.evaluate("""
-                    () => {
-                        return {
-                            title: document.title,
-                            url: window.location.href,
-                            // Extract only interactive elements we need
-                            buttons: Array.from(document.querySelectorAll('button, input[type="submit"], input[type="button"], a[role="button"]')).slice(0, 30).map(el => ({
-                                text: el.innerText || el.value || '',
-                                id: el.id || '',
-                                name: el.name || '',
-                                type: el.type || 'button',
-                                className: el.className || '',
-                                dataTestId: el.getAttribute('data-testid') || '',
-                                ariaLabel: el.getAttribute('aria-label') || ''
-                            })),
-                            inputs: Array.from(document.querySelectorAll('input, textarea, select')).slice(0, 30).map(el => ({
-                                type: el.type || 'text',
-                                id: el.id || '',
-                                name: el.name || '',
-                                placeholder: el.placeholder || '',
-                                className: el.className || '',
-                                dataTestId: el.getAttribute('data-testid') || ''
-                            }))
-                        };
-                    }
-                """)
-                
-                title = page_data.get("title", "")
-                final_url = page_data.get("url", url)
-                
-                # Convert extracted data to our format
-                elements = []
-                
-                # Process buttons
-                for btn_data in page_data.get("buttons", []):
-                    elements.append({
-                        "type": "button",
-                        "tag": "button",
-                        "text": btn_data.get("text", "").strip(),
-                        "id": btn_data.get("id"),
-                        "name": btn_data.get("name"),
-                        "class": btn_data.get("className"),
-                        "data-testid": btn_data.get("dataTestId"),
-                        "aria-label": btn_data.get("ariaLabel"),
-                        "selector": self._generate_selector_from_data(btn_data, "button")
-                    })
-                
-                # Process inputs
-                for inp_data in page_data.get("inputs", []):
-                    elements.append({
-                        "type": inp_data.get("type", "text"),
-                        "tag": "input",
-                        "id": inp_data.get("id"),
-                        "name": inp_data.get("name"),
-                        "placeholder": inp_data.get("placeholder"),
-                        "class": inp_data.get("className"),
-                        "data-testid": inp_data.get("dataTestId"),
-                        "selector": self._generate_selector_from_data(inp_data, "input")
-                    })
-                
-                # Get minimal HTML (only if needed for fallback)
-                # EXPERT LLM FEEDBACK: Avoid full HTML extraction unless absolutely necessary
-                html = await page.content() if len(elements) == 0 else ""  # Only get HTML if no elements found
-                
-                return {
-                    "html": html,
-                    "url": final_url,
-                    "title": title,
-                    "elements": elements
-                }
-                
-            except PlaywrightTimeoutError:
-                logger.warning(f"Timeout loading page {url}")
-                return None
-            except Exception as e:
-                logger.error(f"Error loading page {url}: {e}")
-                return None
+                return await self._load_page(page, url, timeout)
             finally:
                 # EXPERT LLM FEEDBACK: Proper cleanup - close page and context
                 if page:
@@ -180,28 +282,152 @@ class BrowserAnalyzer:
                     pass
             return None
     
-    def _generate_selector_from_data(self, element_data: Dict[str, Any], element_type: str) -> str:
-        """Generate CSS selector from extracted element data (fast, no DOM queries)"""
-        # Try ID first (most specific)
-        if element_data.get("id"):
-            return f"#{element_data['id']}"
+    async def _fetch_page_har(self, url: str, timeout: float, mode: str, har_dir: str) -> Optional[Dict[str, Any]]:
+        """
+        Fetch page through a HAR file (offline, deterministic benchmarks)
         
-        # Try data-testid
-        if element_data.get("dataTestId"):
-            return f"[data-testid='{element_data['dataTestId']}']"
+        record: navigate live and save every response to the URL's HAR file.
+        replay: serve responses from the HAR file only; anything not recorded
+        is aborted, so no request ever reaches the network.
         
-        # Try name
-        if element_data.get("name"):
-            return f"[name='{element_data['name']}']"
+        HAR files are written when their context closes, so this path always
+        uses a one-off context instead of a pooled page. The context comes from
+        the browser manager (counted in its in-flight/active-page accounting)
+        unless the manager is not running.
+        """
+        har_path = har_path_for(url, har_dir)
+        if mode == "replay" and not os.path.exists(har_path):
+            logger.warning(f"📼 No HAR recorded for {url} ({har_path}) - skipping browser fetch")
+            return None
         
-        # Try class (first class only)
-        if element_data.get("className"):
-            first_class = element_data["className"].split()[0] if element_data["className"] else None
-            if first_class:
-                return f".{first_class}"
+        manager = get_browser_manager()
+        try:
+            if manager.running:
+                async with manager.context(service_workers="block") as context:
+                    return await self._load_page_har(context, url, timeout, mode, har_path, har_dir)
+            context = await self.browser.new_context(service_workers="block")
+            try:
+                return await self._load_page_har(context, url, timeout, mode, har_path, har_dir)
+            finally:
+                try:
+                    await context.close()  # flushes the HAR file in record mode
+                except Exception:
+                    pass
+        except NoBrowserAvailable:
+            logger.warning(f"⚠️ All browser instances down (relaunching) - skipping browser fetch for {url}")
+            return None
+        except Exception as e:
+            logger.error(f"Error {'recording' if mode == 'record' else 'replaying'} HAR for {url}: {e}")
+            return None
+    
+    async def _load_page_har(self, context, url: str, timeout: float, mode: str, har_path: str, har_dir: str) -> Optional[Dict[str, Any]]:
+        """Route a fresh context through the URL's HAR file and load the page (SW fetches bypass HAR routing)"""
+        if mode == "record":
+            os.makedirs(har_dir, exist_ok=True)
+            await context.route_from_har(har_path, update=True, update_content="embed", update_mode="minimal")
+        else:
+            await context.route_from_har(har_path, not_found="abort")
+        page = await context.new_page()
+        page.set_default_timeout(timeout * 1000)  # Convert to ms
+        await install_resource_blocking(context, page)
+        return await self._load_page(page, url, timeout)
+    
+    async def _load_page(self, page: Page, url: str, timeout: float) -> Optional[Dict[str, Any]]:
+        """Navigate an already-configured page and extract interactive elements"""
+        try:
+            # EXPERT LLM FEEDBACK: Use domcontentloaded for faster loading
+            # This is already faster than default 'load' event which waits for images/resources
+            response = await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+            
+            if not response or response.status >= 400:
+                logger.warning(f"Page returned status {response.status if response else 'None'} for {url}")
+                return None
+            
+            # EXPERT LLM FEEDBACK: Fast content extraction using page.evaluate()
+            # Instead of page.content() which pulls entire HTML, extract only what we need
+            # This is much faster and reduces memory usage
+            page_data = await page.evaluate("""
+                () => {
+                    return {
+                        title: document.title,
+                        url: window.location.href,
+                        // Extract only interactive elements we need
+                        buttons: Array.from(document.querySelectorAll('button, input[type="submit"], input[type="button"], a[role="button"]')).slice(0, 30).map(el => ({
+                            text: el.innerText || el.value || '',
+                            id: el.id || '',
+                            name: el.name || '',
+                            type: el.type || 'button',
+                            className: el.className || '',
+                            dataTestId: el.getAttribute('data-testid') || '',
+                            ariaLabel: el.getAttribute('aria-label') || ''
+                        })),
+                        inputs: Array.from(document.querySelectorAll('input, textarea, select')).slice(0, 30).map(el => ({
+                            type: el.type || 'text',
+                            id: el.id || '',
+                            name: el.name || '',
+                            placeholder: el.placeholder || '',
+                            className: el.className || '',
+                            dataTestId: el.getAttribute('data-testid') || ''
+                        }))
+                    };
+                }
+            """)
+            
+            title = page_data.get("title", "")
+            final_url = page_data.get("url", url)
+            
+            # Convert extracted data to our format
+            elements = []
+            
+            # Process buttons
+            for btn_data in page_data.get("buttons", []):
+                elements.append({
+                    "type": "button",
+                    "tag": "button",
+                    "text": btn_data.get("text", "").strip(),
+                    "id": btn_data.get("id"),
+                    "name": btn_data.get("name"),
+                    "class": btn_data.get("className"),
+                    "data-testid": btn_data.get("dataTestId"),
+                    "aria-label": btn_data.get("ariaLabel"),
+                    "selector": self._generate_selector_from_data(btn_data, "button")
+                })
+            
+            # Process inputs
+            for inp_data in page_data.get("inputs", []):
+                elements.append({
+                    "type": inp_data.get("type", "text"),
+                    "tag": "input",
+                    "id": inp_data.get("id"),
+                    "name": inp_data.get("name"),
+                    "placeholder": inp_data.get("placeholder"),
+                    "class": inp_data.get("className"),
+                    "data-testid": inp_data.get("dataTestId"),
+                    "selector": self._generate_selector_from_data(inp_data, "input")
+                })
+            
+            # Get minimal HTML (only if needed for fallback)
+            # EXPERT LLM FEEDBACK: Avoid full HTML extraction unless absolutely necessary
+            html = await page.content() if len(elements) == 0 else ""  # Only get HTML if no elements found
+            
+            return {
+                "html": html,
+                "url": final_url,
+                "title": title,
+                "elements": elements,
+                "index": build_element_index(elements)  # token index for analyze_dom
+            }
         
-        # Fallback to tag
-        return element_type
+        except PlaywrightTimeoutError:
+            logger.warning(f"Timeout loading page {url}")
+            return None
+        except Exception as e:
+            logger.error(f"Error loading page {url}: {e}")
+            return None
+    
+    def _generate_selector_from_data(self, element_data: Dict[str, Any], element_type: str) -> str:
+        """Generate CSS selector from extracted element data (fast, no DOM queries)"""
+        return selector_from_data(element_data, element_type)
     
     async def _extract_elements(self, page: Page) -> List[Dict[str, Any]]:
         """Extract key interactive elements from page"""
@@ -317,166 +543,38 @@ class BrowserAnalyzer:
             return "button"  # Fallback
     
     def analyze_dom(self, page_data: Dict[str, Any], intent: str, task_type: str) -> List[Dict[str, Any]]:
-        """
-        Analyze DOM and generate selectors based on intent
-        
-        Args:
-            page_data: Page data from fetch_page
-            intent: User intent (prompt)
-            task_type: Type of task (login, register, etc.)
-        
-        Returns:
-            List of selector candidates with confidence scores (IWA format)
-        """
-        if not page_data or "elements" not in page_data:
-            return []
-        
-        # Import here to avoid circular dependency
-        from ..actions.selectors import create_selector
-        
-        intent_lower = intent.lower()
-        elements = page_data.get("elements", [])
-        candidates = []
-        
-        # Match elements to intent
-        for elem in elements:
-            confidence = 0.0
-            css_selector = elem.get("selector", "")  # CSS selector string from _generate_selector
-            
-            # Convert CSS selector to IWA format
-            iwa_selector = self._css_to_iwa_selector(css_selector, elem)
-            
-            # Login/Register tasks
-            if task_type in ["login", "register"] or "login" in intent_lower or "register" in intent_lower:
-                if elem.get("type") == "username":
-                    confidence = 0.9
-                elif elem.get("type") == "password":
-                    confidence = 0.9
-                elif elem.get("type") == "email":
-                    confidence = 0.8
-                elif "submit" in elem.get("text", "").lower() or "login" in elem.get("text", "").lower() or "register" in elem.get("text", "").lower():
-                    confidence = 0.8
-            
-            # Click tasks
-            elif "click" in intent_lower:
-                text = elem.get("text", "").lower()
-                # Check for specific button text matches
-                if any(word in text for word in ["button", "submit", "ok", "save", "send", "next", "continue", "apply"]):
-                    confidence = 0.9
-                elif any(word in text for word in intent_lower.split() if len(word) > 3):
-                    confidence = 0.8
-                elif elem.get("type") == "button" or elem.get("tag") == "button":
-                    confidence = 0.6  # Any button is a reasonable match for "click"
-            
-            # Type tasks
-            elif "type" in intent_lower or "enter" in intent_lower or "fill" in intent_lower:
-                if elem.get("type") in ["text", "email", "username", "password"]:
-                    confidence = 0.7
-            
-            # Submit tasks
-            elif "submit" in intent_lower:
-                if elem.get("type") == "button" and ("submit" in elem.get("text", "").lower() or elem.get("input_type") == "submit"):
-                    confidence = 0.9
-            
-            if confidence > 0.4:  # Only return candidates with reasonable confidence
-                candidates.append({
-                    "selector": iwa_selector,  # IWA format selector
-                    "type": elem.get("type", "unknown"),
-                    "confidence": confidence,
-                    "element": elem
-                })
-        
-        # Sort by confidence
-        candidates.sort(key=lambda x: x["confidence"], reverse=True)
-        
-        return candidates[:10]  # Return top 10 candidates
+        """Score extracted elements against the intent (IWA selector candidates, best first)"""
+        return score_elements(page_data, intent, task_type)
     
     def _css_to_iwa_selector(self, css_selector: str, elem: Dict[str, Any]) -> Dict[str, Any]:
         """Convert CSS selector string to IWA format"""
-        from ..actions.selectors import create_selector
-        
-        if not css_selector:
-            # Fallback: try to build from element attributes
-            if elem.get("id"):
-                return create_selector("attributeValueSelector", elem["id"], attribute="id")
-            elif elem.get("data-testid"):
-                return create_selector("attributeValueSelector", elem["data-testid"], attribute="data-testid")
-            elif elem.get("name"):
-                return create_selector("attributeValueSelector", elem["name"], attribute="name")
-            else:
-                return create_selector("tagContainsSelector", "button", case_sensitive=False)
-        
-        # Convert CSS selector to IWA format
-        if css_selector.startswith("#"):
-            # ID selector: #myId -> attributeValueSelector with id
-            return create_selector("attributeValueSelector", css_selector[1:], attribute="id")
-        elif css_selector.startswith("."):
-            # Class selector: .myClass -> tagContainsSelector
-            return create_selector("tagContainsSelector", css_selector[1:], case_sensitive=False)
-        elif css_selector.startswith("[") and "=" in css_selector:
-            # Attribute selector: [name='value'] -> attributeValueSelector
-            import re
-            match = re.search(r'\[([^\]]+)=["\']([^"\']+)["\']\]', css_selector)
-            if match:
-                attr_name, attr_value = match.groups()
-                return create_selector("attributeValueSelector", attr_value, attribute=attr_name)
-            else:
-                return create_selector("tagContainsSelector", css_selector, case_sensitive=False)
-        else:
-            # Generic tag or text -> tagContainsSelector
-            return create_selector("tagContainsSelector", css_selector, case_sensitive=False)
+        return css_to_iwa_selector(css_selector, elem)
 
 
-# Singleton browser instance
-# EXPERT LLM FEEDBACK: Critical to cache browser instance - starting new browser takes 2-4 seconds
+# Singleton browser manager
+# EXPERT LLM FEEDBACK: Critical to cache browser instances - starting new browser takes 2-4 seconds
 async def _get_browser() -> Optional[Browser]:
     """
-    Get or create browser instance (singleton pattern)
+    Get a live browser (least-loaded instance of the browser manager)
     
     EXPERT LLM FEEDBACK: This is the single most important optimization.
     Starting a new browser process for every TaskSynapse takes 2-4 seconds alone,
-    guaranteeing a timeout. Browser must be cached and reused.
+    guaranteeing a timeout. Browsers are launched once and reused; crashed ones
+    are relaunched in the background by the manager.
     """
-    global _browser, _playwright
-    
-    if _browser is None:
-        try:
-            logger.info("🚀 Launching Playwright browser instance (cached for all requests)...")
-            _playwright = await async_playwright().start()
-            # EXPERT LLM FEEDBACK: Ensure full headless mode (no GUI window, even on server)
-            # EXPERT LLM FEEDBACK: Minimize Chrome arguments to reduce background activity
-            _browser = await _playwright.chromium.launch(
-                headless=True,  # Critical: full headless mode saves overhead
-                args=[
-                    '--no-sandbox', 
-                    '--disable-setuid-sandbox',  # For server environments
-                    '--disable-dev-shm-usage',   # Reduce memory usage
-                    '--disable-gpu',             # No GPU needed in headless
-                    '--disable-software-rasterizer',  # Faster rendering
-                    '--disable-background-networking',  # Reduce background activity
-                    '--disable-background-timer-throttling',  # Reduce background activity
-                    '--disable-backgrounding-occluded-windows',  # Reduce background activity
-                    '--disable-breakpad',  # Disable crash reporting
-                    '--disable-component-extensions-with-background-pages',  # Reduce background pages
-                    '--disable-extensions',  # Disable extensions
-                    '--disable-features=TranslateUI',  # Disable translation UI
-                    '--disable-ipc-flooding-protection',  # Reduce IPC overhead
-                    '--disable-renderer-backgrounding',  # Reduce background activity
-                    '--disable-sync',  # Disable sync
-                    '--metrics-recording-only',  # Reduce metrics overhead
-                    '--mute-audio',  # Mute audio
-                    '--no-first-run',  # Skip first run
-                    '--no-default-browser-check',  # Skip default browser check
-                    '--disable-default-apps',  # Disable default apps
-                    '--disable-background-downloads',  # Disable background downloads
-                ]
-            )
-            logger.info("✅ Playwright browser instance cached (critical for < 1.5s response time)")
-        except Exception as e:
-            logger.error(f"❌ Failed to launch Playwright browser: {e}")
-            return None
-    
-    return _browser
+    manager = get_browser_manager()
+    try:
+        if not manager.running:
+            logger.info(f"🚀 Launching {len(manager.instances)} Playwright browser instance(s) (cached for all requests)...")
+            if not await manager.start():
+                return None
+        return manager.pick().browser
+    except NoBrowserAvailable:
+        logger.warning("⚠️ No live browser instance (relaunch pending)")
+        return None
+    except Exception as e:
+        logger.error(f"❌ Failed to launch Playwright browser: {e}")
+        return None
 
 
 async def get_browser_analyzer() -> Optional[BrowserAnalyzer]:
@@ -492,20 +590,5 @@ async def get_browser_analyzer() -> Optional[BrowserAnalyzer]:
 
 
 async def close_browser():
-    """Close browser instance (cleanup)"""
-    global _browser, _playwright
-    
-    if _browser:
-        try:
-            await _browser.close()
-            _browser = None
-        except Exception as e:
-            logger.error(f"Error closing browser: {e}")
-    
-    if _playwright:
-        try:
-            await _playwright.stop()
-            _playwright = None
-        except Exception as e:
-            logger.error(f"Error stopping playwright: {e}")
-
+    """Close all browser instances (cleanup)"""
+    await get_browser_manager().close()
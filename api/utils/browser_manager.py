@@ -0,0 +1,524 @@
+"""
+Sharded Chromium instances with crash detection and automatic relaunch
+
+One global browser serialized every live fetch onto a single process, and a
+crash or disconnect left a dead Browser cached until the process restarted.
+The BrowserManager runs browser_instances Chromium processes, each with its
+own PagePool, and hands out pages from the least-loaded live instance. A
+"disconnected" event marks the instance dead and relaunches it in the
+background with exponential backoff.
+
+A watchdog recycles instances before they bloat: once an instance has
+served recycle_after_pages pages, or its process tree RSS (Chromium plus
+renderers, read from /proc) crosses recycle_rss_mb, a replacement is
+launched and swapped in, and the old process is closed only after its
+in-flight pages are returned.
+"""
+import asyncio
+import logging
+import os
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from playwright.async_api import async_playwright, Browser
+
+from .metrics import get_metrics
+from .page_pool import PagePool, install_resource_blocking
+
+logger = logging.getLogger(__name__)
+
+# EXPERT LLM FEEDBACK: Minimize Chrome arguments to reduce background activity
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-setuid-sandbox',  # For server environments
+    '--disable-dev-shm-usage',   # Reduce memory usage
+    '--disable-gpu',             # No GPU needed in headless
+    '--disable-software-rasterizer',  # Faster rendering
+    '--disable-background-networking',  # Reduce background activity
+    '--disable-background-timer-throttling',  # Reduce background activity
+    '--disable-backgrounding-occluded-windows',  # Reduce background activity
+    '--disable-breakpad',  # Disable crash reporting
+    '--disable-component-extensions-with-background-pages',  # Reduce background pages
+    '--disable-extensions',  # Disable extensions
+    '--disable-features=TranslateUI',  # Disable translation UI
+    '--disable-ipc-flooding-protection',  # Reduce IPC overhead
+    '--disable-renderer-backgrounding',  # Reduce background activity
+    '--disable-sync',  # Disable sync
+    '--metrics-recording-only',  # Reduce metrics overhead
+    '--mute-audio',  # Mute audio
+    '--no-first-run',  # Skip first run
+    '--no-default-browser-check',  # Skip default browser check
+    '--disable-default-apps',  # Disable default apps
+    '--disable-background-downloads',  # Disable background downloads
+    '--blink-settings=imagesEnabled=false',  # Never load images (browser-side, no interception)
+]
+
+RELAUNCH_BACKOFF_INITIAL = 0.5  # seconds
+RELAUNCH_BACKOFF_MAX = 30.0
+DRAIN_POLL_INTERVAL = 0.1  # seconds between in-flight checks while draining a recycled instance
+INSTANCE_TAG_SWITCH = "--iwa-instance-tag"  # ignored by Chromium; lets the watchdog find the process in /proc
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def _find_tagged_pid(tag: str) -> Optional[int]:
+    """PID of the process launched with the instance tag switch (Linux /proc only)"""
+    needle = f"{INSTANCE_TAG_SWITCH}={tag}".encode()
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/cmdline", "rb") as f:
+                if needle in f.read().split(b"\0"):
+                    return int(entry)
+        except OSError:
+            continue
+    return None
+
+
+def process_tree_rss(pid: int) -> Optional[int]:
+    """Resident set size in bytes of pid and all its descendants (None if pid is gone)"""
+    children: Dict[int, List[int]] = {}
+    rss: Dict[int, int] = {}
+    try:
+        entries = os.listdir("/proc")
+    except OSError:
+        return None
+    for entry in entries:
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+            with open(f"/proc/{entry}/statm") as f:
+                resident_pages = int(f.read().split()[1])
+        except (OSError, ValueError, IndexError):
+            continue
+        # Field 4 is the parent PID; the command name (field 2) may contain spaces
+        ppid = int(stat.rsplit(")", 1)[1].split()[1])
+        children.setdefault(ppid, []).append(int(entry))
+        rss[int(entry)] = resident_pages * _PAGE_SIZE
+    if pid not in rss:
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += rss.get(current, 0)
+        stack.extend(children.get(current, ()))
+    return total
+
+
+class NoBrowserAvailable(Exception):
+    """Every browser instance is down (relaunch pending)"""
+
+
+class BrowserInstance:
+    """One Chromium process and its page pool"""
+
+    def __init__(self, index: int):
+        self.index = index
+        self.browser: Optional[Browser] = None
+        self.pool: Optional[PagePool] = None
+        self.active_pages = 0
+        self.launches = 0
+        self.crashes = 0
+        self.last_launch_seconds = 0.0
+        self.relaunching = False
+        self.recycling = False
+        self.recycles = 0
+        self.tag = ""  # unique launch switch of the current process
+        self.pid: Optional[int] = None
+        self.launched_at = 0.0
+        self.pages_served = 0  # since the current process was launched
+        self.rss_bytes = 0
+        self.rss_at_launch = 0
+        self.in_flight: Counter = Counter()  # leased pages per Browser (old one drains during a recycle)
+
+    @property
+    def live(self) -> bool:
+        return self.browser is not None and not self.relaunching
+
+    def rss_growth_mb_per_hour(self) -> float:
+        """Memory trend of the current process since its first RSS sample"""
+        hours = (time.time() - self.launched_at) / 3600 if self.launched_at else 0.0
+        if hours <= 0 or not self.rss_at_launch:
+            return 0.0
+        return (self.rss_bytes - self.rss_at_launch) / (1024 * 1024) / hours
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "live": int(self.live),
+            "active_pages": self.active_pages,
+            "launches": self.launches,
+            "crashes": self.crashes,
+            "recycles": self.recycles,
+            "last_launch_seconds": self.last_launch_seconds,
+            "pages_served": self.pages_served,
+            "rss_mb": round(self.rss_bytes / (1024 * 1024), 1),
+            "rss_growth_mb_per_hour": round(self.rss_growth_mb_per_hour(), 2),
+        }
+
+
+class BrowserManager:
+    """N Chromium instances; pages go to the least-loaded live one"""
+
+    def __init__(
+        self,
+        instances: int = 2,
+        pages_per_instance: int = 4,
+        lease_timeout: float = 2.0,
+        recycle_after_pages: int = 0,
+        recycle_rss_mb: float = 0.0,
+        watchdog_interval: float = 30.0,
+        drain_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            instances: Chromium processes to run
+            pages_per_instance: Prewarmed pooled pages per process
+            lease_timeout: Max seconds to wait for a free pooled page
+            recycle_after_pages: Recycle an instance after this many pages (0 = never)
+            recycle_rss_mb: Recycle an instance whose process tree RSS exceeds this (0 = never)
+            watchdog_interval: Seconds between RSS samples (0 = no watchdog)
+            drain_timeout: Max seconds to wait for in-flight pages before closing a recycled process
+        """
+        self.pages_per_instance = pages_per_instance
+        self.lease_timeout = lease_timeout
+        self.recycle_after_pages = int(recycle_after_pages)
+        self.recycle_rss_mb = float(recycle_rss_mb)
+        self.watchdog_interval = float(watchdog_interval)
+        self.drain_timeout = float(drain_timeout)
+        self._watchdog_task: Optional[asyncio.Task] = None
+        self.instances: List[BrowserInstance] = [BrowserInstance(i) for i in range(max(1, int(instances)))]
+        self._playwright = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._relaunch_tasks: Set[asyncio.Task] = set()
+        self.running = False
+        self._closing = False
+
+        metrics = get_metrics()
+        self._launch_hist = metrics.histogram(
+            "browser_launch_seconds",
+            "Chromium launch latency (including page pool prewarm)",
+            ("instance",),
+        )
+        self._crash_counter = metrics.counter(
+            "browser_crashes_total",
+            "Chromium disconnects/crashes detected",
+            ("instance",),
+        )
+        self._recycle_counter = metrics.counter(
+            "browser_recycles_total",
+            "Chromium instances replaced by the memory watchdog",
+            ("instance", "reason"),
+        )
+
+    async def start(self) -> bool:
+        """Launch every instance concurrently (idempotent); True if any came up"""
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.running:
+                return any(instance.live for instance in self.instances)
+            self._closing = False
+            self._playwright = await async_playwright().start()
+            await asyncio.gather(*(self._launch(instance) for instance in self.instances))
+            self.running = any(instance.live for instance in self.instances)
+            if not self.running:
+                await self._playwright.stop()
+                self._playwright = None
+            elif self.watchdog_interval > 0 and (self.recycle_rss_mb > 0 or self.recycle_after_pages > 0):
+                self._watchdog_task = asyncio.ensure_future(self._watchdog())
+            return self.running
+
+    async def _open_browser(self, instance: BrowserInstance) -> Optional[Tuple[Browser, Optional[PagePool], str]]:
+        """Launch a Chromium process and prewarm its pool (not yet attached to instance)"""
+        tag = f"{instance.index}-{uuid.uuid4().hex[:12]}"
+        try:
+            browser = await self._playwright.chromium.launch(
+                headless=True,  # Critical: full headless mode saves overhead
+                args=CHROMIUM_ARGS + [f"{INSTANCE_TAG_SWITCH}={tag}"],
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to launch Chromium instance {instance.index}: {e}")
+            return None
+        browser.on("disconnected", lambda b, inst=instance: self._on_disconnected(inst, b))
+        pool = PagePool(browser, size=self.pages_per_instance, lease_timeout=self.lease_timeout)
+        await pool.start()
+        return browser, (pool if pool.get_stats()["size"] else None), tag  # empty pool -> one-off contexts
+
+    def _attach(self, instance: BrowserInstance, opened: Tuple[Browser, Optional[PagePool], str], start: float):
+        instance.browser, instance.pool, instance.tag = opened
+        instance.pid = None  # resolved lazily by the watchdog
+        instance.launched_at = time.time()
+        instance.pages_served = 0
+        instance.rss_bytes = instance.rss_at_launch = 0
+        instance.launches += 1
+        instance.last_launch_seconds = time.perf_counter() - start
+        self._launch_hist.observe(instance.last_launch_seconds, (str(instance.index),))
+        logger.info(f"✅ Chromium instance {instance.index} ready in {instance.last_launch_seconds:.2f}s")
+
+    async def _launch(self, instance: BrowserInstance) -> bool:
+        start = time.perf_counter()
+        opened = await self._open_browser(instance)
+        if opened is None:
+            return False
+        self._attach(instance, opened, start)
+        return True
+
+    def _on_disconnected(self, instance: BrowserInstance, browser: Browser):
+        if self._closing or instance.browser is not browser:
+            return
+        instance.crashes += 1
+        instance.browser = None
+        instance.pool = None  # its contexts died with the process
+        self._crash_counter.inc((str(instance.index),))
+        logger.error(f"💥 Chromium instance {instance.index} disconnected - relaunching in background")
+        task = asyncio.ensure_future(self._relaunch(instance))
+        self._relaunch_tasks.add(task)
+        task.add_done_callback(self._relaunch_tasks.discard)
+
+    async def _relaunch(self, instance: BrowserInstance):
+        instance.relaunching = True
+        delay = RELAUNCH_BACKOFF_INITIAL
+        try:
+            while not self._closing:
+                if await self._launch(instance):
+                    return
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, RELAUNCH_BACKOFF_MAX)
+        finally:
+            instance.relaunching = False
+
+    def _schedule_recycle(self, instance: BrowserInstance, reason: str):
+        if instance.recycling or self._closing or not instance.live:
+            return
+        instance.recycling = True
+        task = asyncio.ensure_future(self._recycle(instance, reason))
+        self._relaunch_tasks.add(task)
+        task.add_done_callback(self._relaunch_tasks.discard)
+
+    async def _recycle(self, instance: BrowserInstance, reason: str):
+        """Swap in a fresh process, then close the old one once its pages are returned"""
+        try:
+            old_browser, old_pool = instance.browser, instance.pool
+            logger.info(
+                f"♻️ Recycling Chromium instance {instance.index} ({reason}: {instance.pages_served} pages, "
+                f"{instance.rss_bytes / (1024 * 1024):.0f} MB RSS)"
+            )
+            start = time.perf_counter()
+            opened = await self._open_browser(instance)
+            if opened is None:
+                return  # keep serving from the old process; the next check retries
+            if self._closing or instance.browser is not old_browser:
+                await self._close_browser(opened[0], opened[1])  # shut down or crashed meanwhile
+                return
+            self._attach(instance, opened, start)  # new leases go to the fresh process from here on
+            instance.recycles += 1
+            self._recycle_counter.inc((str(instance.index), reason))
+
+            deadline = time.monotonic() + self.drain_timeout
+            while instance.in_flight[old_browser] > 0 and time.monotonic() < deadline:
+                await asyncio.sleep(DRAIN_POLL_INTERVAL)
+            if instance.in_flight.pop(old_browser, 0) > 0:
+                logger.warning(f"⚠️ Drain timeout on instance {instance.index}, closing with pages in flight")
+            await self._close_browser(old_browser, old_pool)
+        finally:
+            instance.recycling = False
+
+    @staticmethod
+    async def _close_browser(browser: Browser, pool: Optional[PagePool]):
+        if pool is not None:
+            await pool.close()
+        try:
+            await browser.close()
+        except Exception as e:
+            logger.debug(f"Error closing recycled browser: {e}")
+
+    def _sample_rss(self, instance: BrowserInstance) -> Optional[int]:
+        if instance.pid is None and instance.tag:
+            instance.pid = _find_tagged_pid(instance.tag)
+        if instance.pid is None:
+            return None
+        rss = process_tree_rss(instance.pid)
+        if rss is None:
+            instance.pid = None  # process went away; re-resolve next time
+            return None
+        instance.rss_bytes = rss
+        if not instance.rss_at_launch:
+            instance.rss_at_launch = rss
+        return rss
+
+    async def _watchdog(self):
+        """Sample process RSS periodically and recycle instances over their limits"""
+        while not self._closing:
+            await asyncio.sleep(self.watchdog_interval)
+            for instance in self.instances:
+                if not instance.live or instance.recycling:
+                    continue
+                rss = await asyncio.to_thread(self._sample_rss, instance)
+                if self.recycle_rss_mb > 0 and rss is not None and rss >= self.recycle_rss_mb * 1024 * 1024:
+                    self._schedule_recycle(instance, "rss")
+                elif self.recycle_after_pages > 0 and instance.pages_served >= self.recycle_after_pages:
+                    self._schedule_recycle(instance, "pages")
+
+    def pick(self) -> BrowserInstance:
+        """Least-loaded live instance (lowest index wins ties)"""
+        live = [instance for instance in self.instances if instance.live]
+        if not live:
+            raise NoBrowserAvailable("no live browser instance")
+        return min(live, key=lambda instance: instance.active_pages)
+
+    @asynccontextmanager
+    async def _track(self):
+        """
+        Count a lease on the least-loaded instance for the duration of the block
+
+        Yields (browser, pool) as they were when the lease started - a recycle may
+        swap the instance's process meanwhile, and drains the old one on in_flight.
+        """
+        instance = self.pick()
+        browser, pool = instance.browser, instance.pool
+        instance.active_pages += 1
+        instance.in_flight[browser] += 1
+        try:
+            yield browser, pool
+        finally:
+            instance.active_pages -= 1
+            if browser in instance.in_flight:
+                instance.in_flight[browser] -= 1
+            if browser is instance.browser:
+                instance.pages_served += 1
+                if 0 < self.recycle_after_pages <= instance.pages_served:
+                    self._schedule_recycle(instance, "pages")
+
+    @asynccontextmanager
+    async def page(self, lease_timeout: Optional[float] = None):
+        """
+        Lease a page on the least-loaded instance
+
+        Args:
+            lease_timeout: Max seconds to wait for a free pooled page (default: the
+                manager's lease_timeout; callers pass what their request deadline allows)
+
+        Raises:
+            NoBrowserAvailable: every instance is down
+            asyncio.TimeoutError: no pooled page freed up within the lease timeout
+        """
+        async with self._track() as (browser, pool):
+            if pool is not None:
+                async with pool.lease(timeout=lease_timeout) as page:
+                    yield page
+            else:
+                # No pool on this instance - one-off context with the same blocking route
+                context = await browser.new_context()
+                try:
+                    page = await context.new_page()
+                    await install_resource_blocking(context, page)
+                    yield page
+                finally:
+                    try:
+                        await context.close()
+                    except Exception:
+                        pass
+
+    @asynccontextmanager
+    async def context(self, **options):
+        """
+        One-off BrowserContext on the least-loaded instance (closed after the block)
+
+        For fetches that need their own context options (e.g. HAR routing); counted
+        like a page lease so drains and /metrics see it.
+
+        Raises:
+            NoBrowserAvailable: every instance is down
+        """
+        async with self._track() as (browser, _):
+            context = await browser.new_context(**options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+
+    async def close(self):
+        """Close every instance and stop Playwright"""
+        self._closing = True
+        if self._watchdog_task is not None:
+            self._watchdog_task.cancel()
+            self._watchdog_task = None
+        for task in list(self._relaunch_tasks):
+            task.cancel()
+        for instance in self.instances:
+            if instance.pool is not None:
+                await instance.pool.close()
+                instance.pool = None
+            if instance.browser is not None:
+                try:
+                    await instance.browser.close()
+                except Exception as e:
+                    logger.error(f"Error closing browser instance {instance.index}: {e}")
+                instance.browser = None
+        if self._playwright is not None:
+            try:
+                await self._playwright.stop()
+            except Exception as e:
+                logger.error(f"Error stopping playwright: {e}")
+            self._playwright = None
+        self.running = False
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Per-instance page counts, crashes and launch latencies (flattened for /metrics)"""
+        stats: Dict[str, Any] = {
+            "instances": len(self.instances),
+            "live": sum(1 for instance in self.instances if instance.live),
+            "active_pages": sum(instance.active_pages for instance in self.instances),
+            "crashes": sum(instance.crashes for instance in self.instances),
+            "recycles": sum(instance.recycles for instance in self.instances),
+            "rss_mb": round(sum(instance.rss_bytes for instance in self.instances) / (1024 * 1024), 1),
+        }
+        for instance in self.instances:
+            for key, value in instance.get_stats().items():
+                stats[f"instance_{instance.index}_{key}"] = value
+        return stats
+
+    def get_pool_stats(self) -> Dict[str, Any]:
+        """Page pool utilization summed over live instances"""
+        totals: Dict[str, Any] = {"size": 0, "idle": 0, "leased": 0, "leases": 0, "lease_timeouts": 0, "replaced": 0}
+        for instance in self.instances:
+            if instance.pool is None:
+                continue
+            for key, value in instance.pool.get_stats().items():
+                if key in totals:
+                    totals[key] += value
+        totals["utilization"] = totals["leased"] / totals["size"] if totals["size"] else 0.0
+        return totals
+
+
+# Global browser manager instance
+_browser_manager: Optional[BrowserManager] = None
+
+
+def get_browser_manager() -> BrowserManager:
+    """Get or create global browser manager (instances launch on start())"""
+    global _browser_manager
+    if _browser_manager is None:
+        from config.settings import settings
+        _browser_manager = BrowserManager(
+            instances=settings.browser_instances,
+            pages_per_instance=settings.page_pool_size,
+            lease_timeout=settings.page_pool_lease_timeout,
+            recycle_after_pages=settings.browser_recycle_after_pages,
+            recycle_rss_mb=settings.browser_recycle_rss_mb,
+            watchdog_interval=settings.browser_watchdog_interval,
+            drain_timeout=settings.browser_drain_timeout,
+        )
+    return _browser_manager
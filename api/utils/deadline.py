@@ -0,0 +1,88 @@
+"""
+End-to-end request deadline
+
+A Deadline is created when a /solve_task request arrives and is consulted by
+every awaitable stage (agent generation, browser fetch, DOM analysis,
+fallback generation). Each stage waits for at most min(its own cap, time
+remaining), so later stages - fallback included - only get what is left and
+no request can outlive its configured budget.
+"""
+import asyncio
+import logging
+import math
+import time
+from typing import Any, Awaitable, Optional
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+
+def _exhausted_counter():
+    return get_metrics().counter(
+        "solve_deadline_exhausted_total",
+        "Stages cut short because the request budget ran out",
+        ("stage",),
+    )
+
+
+class Deadline:
+    """Monotonic request budget shared by all stages of one request"""
+
+    def __init__(self, budget: Optional[float]):
+        """
+        Args:
+            budget: Total seconds allowed for the request (None = unbounded)
+        """
+        self.budget = budget
+        self.started_at = time.monotonic()
+        self.expires_at = math.inf if budget is None else self.started_at + max(0.0, budget)
+
+    @classmethod
+    def unbounded(cls) -> "Deadline":
+        return cls(None)
+
+    def remaining(self) -> float:
+        """Seconds left (inf when unbounded, never negative)"""
+        return max(0.0, self.expires_at - time.monotonic())
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def timeout(self, cap: Optional[float] = None, reserve: float = 0.0) -> float:
+        """Time a stage may use: min(cap, remaining - reserve), never negative"""
+        available = max(0.0, self.remaining() - reserve)
+        if cap is not None:
+            available = min(available, cap)
+        return available
+
+    def record_exhausted(self, stage: str):
+        """Count a stage that was skipped or cut short by the budget"""
+        _exhausted_counter().inc((stage,))
+        logger.warning(f"⏱️ Request budget exhausted at stage '{stage}' ({self.elapsed():.2f}s elapsed)")
+
+    async def run(self, aw: Awaitable[Any], stage: str, cap: Optional[float] = None, reserve: float = 0.0) -> Any:
+        """
+        Await aw within min(cap, remaining budget - reserve)
+
+        Raises:
+            asyncio.TimeoutError: the stage cap or the request budget ran out
+        """
+        timeout = self.timeout(cap, reserve)
+        budget_bound = cap is None or timeout < cap
+        if timeout <= 0:
+            if asyncio.iscoroutine(aw):
+                aw.close()  # never started - avoid "never awaited" warnings
+            self.record_exhausted(stage)
+            raise asyncio.TimeoutError(f"no budget left for {stage}")
+        if math.isinf(timeout):
+            return await aw
+        try:
+            return await asyncio.wait_for(aw, timeout=timeout)
+        except asyncio.TimeoutError:
+            if budget_bound:
+                self.record_exhausted(stage)
+            raise
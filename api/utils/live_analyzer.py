@@ -0,0 +1,246 @@
+"""
+Static-HTML live analysis (shared keep-alive httpx client + lxml)
+
+Most demo-site pages are server-rendered, so their buttons and inputs are in
+the raw HTML. The static analyzer fetches the page over one pooled
+httpx.AsyncClient and extracts the same element schema as
+BrowserAnalyzer.fetch_page with lxml in a worker thread - tens of
+milliseconds instead of seconds. Pages that come back as a JS-rendered shell
+(empty mount point, no interactive elements) are flagged so the caller can
+escalate to Playwright, and remembered for a while so later requests for the
+same URL go straight to the browser instead of paying the HTTP round trip again.
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Union
+
+import httpx
+from lxml import html as lxml_html
+
+from .page_elements import selector_from_data, score_elements, build_element_index
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = (
+    "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 "
+    "(KHTML, like Gecko) Chrome/120.0 Safari/537.36"
+)
+
+# Same element sets (and 30-element caps) as the BrowserAnalyzer page.evaluate() script
+_BUTTONS_XPATH = "//button | //input[@type='submit' or @type='button'] | //a[@role='button']"
+_INPUTS_XPATH = "//input | //textarea | //select"
+_MAX_ELEMENTS = 30
+
+# Client-side framework mount points - present but empty means a JS-rendered shell
+_MOUNT_POINTS_XPATH = (
+    "//*[@id='root' or @id='app' or @id='__next' or @id='__nuxt' or @id='svelte']"
+    " | //app-root | //*[@ng-app]"
+)
+_MIN_BODY_TEXT = 80  # characters of visible body text below which a scripted page counts as a shell
+JS_SHELL_MEMORY_SECONDS = 3600.0  # how long a URL known to be a JS shell skips the static fetch
+JS_SHELL_MEMORY_MAX = 1024  # URLs remembered (oldest forgotten first)
+
+
+def _text(element) -> str:
+    return " ".join(element.text_content().split())
+
+
+def _input_type(element) -> str:
+    """Mirror the DOM .type property for input/textarea/select"""
+    if element.tag == "textarea":
+        return "textarea"
+    if element.tag == "select":
+        return "select-multiple" if element.get("multiple") is not None else "select-one"
+    return (element.get("type") or "text").lower()
+
+
+def _is_js_shell(doc, has_elements: bool) -> bool:
+    for mount in doc.xpath(_MOUNT_POINTS_XPATH):
+        if not len(mount) and not _text(mount):
+            return True  # framework mount point with nothing rendered into it
+    if has_elements:
+        return False
+    has_scripts = bool(doc.xpath("//script"))
+    body = doc.find("body")
+    body_text = ""
+    if body is not None:
+        for node in body.xpath(".//script | .//style | .//noscript"):
+            node.drop_tree()
+        body_text = _text(body)
+    return has_scripts and len(body_text) < _MIN_BODY_TEXT
+
+
+def extract_page_data(html: str, url: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract interactive elements from raw HTML (CPU-bound - run in a worker thread)
+
+    Returns:
+        Dict with 'html', 'url', 'title', 'elements', 'index' (BrowserAnalyzer.fetch_page
+        schema) plus 'js_shell', or None if the HTML cannot be parsed
+    """
+    try:
+        doc = lxml_html.document_fromstring(html)
+    except Exception as e:
+        logger.debug(f"Static parse failed for {url}: {e}")
+        return None
+
+    elements = []
+    for button in doc.xpath(_BUTTONS_XPATH)[:_MAX_ELEMENTS]:
+        data = {
+            "id": button.get("id") or "",
+            "name": button.get("name") or "",
+            "className": button.get("class") or "",
+            "dataTestId": button.get("data-testid") or "",
+        }
+        elements.append({
+            "type": "button",
+            "tag": "button",
+            "text": _text(button) or button.get("value") or "",
+            "id": data["id"],
+            "name": data["name"],
+            "class": data["className"],
+            "data-testid": data["dataTestId"],
+            "aria-label": button.get("aria-label") or "",
+            "selector": selector_from_data(data, "button"),
+        })
+    for field in doc.xpath(_INPUTS_XPATH)[:_MAX_ELEMENTS]:
+        data = {
+            "id": field.get("id") or "",
+            "name": field.get("name") or "",
+            "className": field.get("class") or "",
+            "dataTestId": field.get("data-testid") or "",
+        }
+        elements.append({
+            "type": _input_type(field),
+            "tag": "input",
+            "id": data["id"],
+            "name": data["name"],
+            "placeholder": field.get("placeholder") or "",
+            "class": data["className"],
+            "data-testid": data["dataTestId"],
+            "selector": selector_from_data(data, "input"),
+        })
+
+    title = doc.findtext(".//title") or ""
+    return {
+        "html": html if not elements else "",  # like the browser path: HTML only when nothing was found
+        "url": url,
+        "title": title.strip(),
+        "elements": elements,
+        "index": build_element_index(elements),
+        "js_shell": _is_js_shell(doc, bool(elements)),
+    }
+
+
+class StaticAnalyzer:
+    """HTTP fetch + lxml extraction over one shared keep-alive client"""
+
+    def __init__(self, timeout: float = 2.0, max_connections: int = 20):
+        self.timeout = timeout
+        self.max_connections = max_connections
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_loop = None
+        self._js_shell_urls: "OrderedDict[str, float]" = OrderedDict()  # url -> time flagged
+        self.fetches = 0
+        self.failures = 0
+        self.js_shells = 0
+        self.js_shell_skips = 0
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # Connection pools are bound to the event loop that created them
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client_loop is not loop:
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                follow_redirects=True,
+                headers={"User-Agent": USER_AGENT, "Accept": "text/html,application/xhtml+xml"},
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+            )
+            self._client_loop = loop
+        return self._client
+
+    async def fetch_page(self, url: str, timeout: Optional[float] = None) -> Optional[str]:
+        """Fetch raw HTML (None on error, non-2xx/3xx status or non-HTML content)"""
+        self.fetches += 1
+        try:
+            response = await self._get_client().get(url, timeout=timeout or self.timeout)
+        except httpx.HTTPError as e:
+            self.failures += 1
+            logger.debug(f"Static fetch failed for {url}: {e}")
+            return None
+        content_type = response.headers.get("content-type", "")
+        if response.status_code >= 400 or ("html" not in content_type and content_type):
+            self.failures += 1
+            logger.debug(f"Static fetch for {url}: status {response.status_code}, content-type {content_type!r}")
+            return None
+        return response.text
+
+    async def fetch_page_data(self, url: str, timeout: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """Fetch and extract a page (BrowserAnalyzer.fetch_page schema + 'js_shell')"""
+        html = await self.fetch_page(url, timeout)
+        if not html:
+            return None
+        page_data = await asyncio.to_thread(extract_page_data, html, url)
+        if page_data and page_data["js_shell"]:
+            self.js_shells += 1
+            self._js_shell_urls[_shell_key(url)] = time.monotonic()
+            self._js_shell_urls.move_to_end(_shell_key(url))
+            while len(self._js_shell_urls) > JS_SHELL_MEMORY_MAX:
+                self._js_shell_urls.popitem(last=False)
+        return page_data
+
+    def known_js_shell(self, url: str) -> bool:
+        """True if url came back as a JS-rendered shell recently (its static fetch can be skipped)"""
+        key = _shell_key(url)
+        flagged_at = self._js_shell_urls.get(key)
+        if flagged_at is None:
+            return False
+        if time.monotonic() - flagged_at > JS_SHELL_MEMORY_SECONDS:
+            del self._js_shell_urls[key]
+            return False
+        self.js_shell_skips += 1
+        return True
+
+    def analyze_dom(self, page: Union[str, Dict[str, Any]], intent: str, task_type: str) -> List[Dict[str, Any]]:
+        """Score a page (raw HTML or extracted page data) against the intent"""
+        page_data = extract_page_data(page, "") if isinstance(page, str) else page
+        return score_elements(page_data, intent, task_type) if page_data else []
+
+    async def close(self):
+        if self._client is not None:
+            try:
+                await self._client.aclose()
+            except Exception:
+                pass  # loop that owned the client may be gone
+            self._client = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            "fetches": self.fetches,
+            "failures": self.failures,
+            "js_shells": self.js_shells,
+            "js_shell_skips": self.js_shell_skips,
+        }
+
+
+def _shell_key(url: str) -> str:
+    return (url or "").split("#", 1)[0].rstrip("/")
+
+
+def needs_browser(page_data: Optional[Dict[str, Any]]) -> bool:
+    """Escalate to Playwright only when the static DOM has nothing usable"""
+    return not page_data or page_data.get("js_shell", False) or not page_data.get("elements")
+
+
+def _create_live_analyzer() -> StaticAnalyzer:
+    from config.settings import settings
+    return StaticAnalyzer(timeout=getattr(settings, 'static_fetch_timeout', 2.0))
+
+
+# Global static analyzer instance (imported by the action generator)
+live_analyzer = _create_live_analyzer()
@@ -0,0 +1,251 @@
+"""
+Per-stage latency metrics for /solve_task (Prometheus text format)
+
+Stages record into a per-request recorder held in a contextvar, so labels that
+are only known at the end of a request (task type, whether live analysis ran)
+apply to every stage. The recorder is flushed into process-wide histograms
+once per request; scraping renders text on demand, so the hot path is a
+perf_counter() pair and a list append per stage.
+"""
+import bisect
+import contextvars
+import re
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Latency buckets (seconds) - sub-millisecond parsing through multi-second browser work
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+LabelValues = Tuple[str, ...]
+
+# Component stat keys that only ever grow (exported as counters, everything else as gauges)
+MONOTONIC_STAT_KEYS = frozenset({
+    "hits", "stale_hits", "misses", "bypassed", "uncacheable", "untemplatable",
+    "evictions", "expirations", "refreshes", "updates", "saves",
+    "leaders", "coalesced", "admitted", "rejected", "abandoned", "level_changes",
+    "fetches", "failures", "js_shells", "js_shell_skips",
+    "launches", "crashes", "recycles", "leases", "lease_timeouts", "replaced",
+})
+_INSTANCE_PREFIX = re.compile(r"^instance_\d+_")  # per-browser-instance stats (browser_instance_0_crashes)
+
+
+def is_monotonic_stat(key: str) -> bool:
+    return _INSTANCE_PREFIX.sub("", key) in MONOTONIC_STAT_KEYS
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+def _format_labels(names: Iterable[str], values: Iterable[str]) -> str:
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """Cumulative-bucket histogram keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[LabelValues, List[Any]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, labels: LabelValues):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._series[labels] = series
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(s[0]), s[1], s[2]) for labels, s in sorted(self._series.items())]
+        for labels, counts, total, count in snapshot:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                label_str = _format_labels(self.label_names + ("le",), labels + (_format_value(bound),))
+                lines.append(f"{self.name}_bucket{label_str} {cumulative}")
+            label_str = _format_labels(self.label_names, labels)
+            lines.append(f"{self.name}_sum{label_str} {_format_value(total)}")
+            lines.append(f"{self.name}_count{label_str} {count}")
+        return lines
+
+
+class Counter:
+    """Monotonic counter keyed by label values"""
+
+    def __init__(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self._values: Dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, labels: LabelValues = (), amount: float = 1.0):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, labels: LabelValues = ()) -> float:
+        return self._values.get(labels, 0.0)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            snapshot = sorted(self._values.items())
+        for labels, value in snapshot:
+            lines.append(f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Process-wide metric registry rendered in Prometheus text format"""
+
+    def __init__(self):
+        self._metrics: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self.stage_seconds = self.histogram(
+            "solve_stage_seconds",
+            "Latency of each /solve_task stage in seconds",
+            ("stage", "task_type", "live"),
+        )
+
+    def histogram(self, name: str, help_text: str, label_names: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        """Get or create a histogram"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Histogram(name, help_text, label_names, buckets)
+            return self._metrics[name]
+
+    def counter(self, name: str, help_text: str, label_names: Tuple[str, ...] = ()) -> Counter:
+        """Get or create a counter"""
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = Counter(name, help_text, label_names)
+            return self._metrics[name]
+
+    def render_prometheus(self, stats: Optional[Dict[str, Dict[str, Any]]] = None) -> str:
+        """
+        Render all metrics as Prometheus text exposition format
+
+        Args:
+            stats: Extra component stats ({prefix: {key: number}}) - monotonic keys
+                (MONOTONIC_STAT_KEYS) as {prefix}_{key}_total counters, the rest as gauges
+        """
+        lines: List[str] = []
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            lines.extend(metric.render())
+        registered = {metric.name for metric in metrics}
+        for prefix, values in (stats or {}).items():
+            for key, value in values.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                monotonic = is_monotonic_stat(key)
+                name = f"{prefix}_{key}_total" if monotonic else f"{prefix}_{key}"
+                if name in registered:
+                    continue  # already exported with labels (e.g. browser_crashes_total per instance)
+                lines.append(f"# TYPE {name} {'counter' if monotonic else 'gauge'}")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class RequestRecorder:
+    """Collects stage timings for one request until its labels are known"""
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.task_type = "unknown"
+        self.live = False
+        self.started = time.perf_counter()
+        self._flushed = False
+
+    def add(self, stage: str, seconds: float):
+        self.stages.append((stage, seconds))
+
+    def flush(self, registry: Optional[MetricsRegistry] = None):
+        """Observe every recorded stage (plus the request total) with final labels"""
+        if self._flushed:
+            return
+        self._flushed = True
+        histogram = (registry or get_metrics()).stage_seconds
+        live = "true" if self.live else "false"
+        for stage, seconds in self.stages:
+            histogram.observe(seconds, (stage, self.task_type, live))
+        histogram.observe(time.perf_counter() - self.started, ("total", self.task_type, live))
+
+
+_current_recorder: contextvars.ContextVar[Optional[RequestRecorder]] = contextvars.ContextVar(
+    "solve_request_recorder", default=None
+)
+
+
+def begin_request() -> RequestRecorder:
+    """Start recording stages for the current request (context-local)"""
+    recorder = RequestRecorder()
+    _current_recorder.set(recorder)
+    return recorder
+
+
+def current_recorder() -> Optional[RequestRecorder]:
+    return _current_recorder.get()
+
+
+def record_stage(stage: str, seconds: float):
+    """Record one stage duration against the current request (or unlabelled if none)"""
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.add(stage, seconds)
+    else:
+        get_metrics().stage_seconds.observe(seconds, (stage, "unknown", "false"))
+
+
+def mark_live_analysis():
+    """Label the current request as having run live page analysis"""
+    recorder = _current_recorder.get()
+    if recorder is not None:
+        recorder.live = True
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Time a block as one stage of the current request"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(stage, time.perf_counter() - start)
+
+
+# Global metrics registry instance
+_metrics: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get or create global metrics registry"""
+    global _metrics
+    if _metrics is None:
+        _metrics = MetricsRegistry()
+    return _metrics
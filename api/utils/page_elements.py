@@ -0,0 +1,389 @@
+"""
+Element-level page analysis shared by the browser and static analyzers
+
+Both BrowserAnalyzer (Playwright) and the static HTTP analyzer produce the same
+element schema; the selector derivation and intent scoring here work on that
+schema only, so they carry no Playwright dependency.
+
+With numpy + scikit-learn available, each snapshot is also stored as a
+columnar ElementTable and scored in one batch: role features (the confidence
+tiers) plus hashed character n-gram similarity between the prompt and each
+element's text, top-k by argpartition.
+"""
+import heapq
+import re
+import threading
+from typing import Any, Dict, Iterable, List, Set
+
+# Optional: vectorized scoring (falls back to index lookups without them)
+try:
+    import numpy as np
+    from sklearn.feature_extraction.text import HashingVectorizer
+except ImportError:
+    np = None
+    HashingVectorizer = None
+
+# [attr='value'] / [attr="value"] CSS attribute selectors
+_ATTR_SELECTOR_RE = re.compile(r'\[([^\]]+)=["\']([^"\']+)["\']\]')
+
+
+def selector_from_data(element_data: Dict[str, Any], element_type: str) -> str:
+    """Generate CSS selector from extracted element data (fast, no DOM queries)"""
+    # Try ID first (most specific)
+    if element_data.get("id"):
+        return f"#{element_data['id']}"
+
+    # Try data-testid
+    if element_data.get("dataTestId"):
+        return f"[data-testid='{element_data['dataTestId']}']"
+
+    # Try name
+    if element_data.get("name"):
+        return f"[name='{element_data['name']}']"
+
+    # Try class (first class only)
+    if element_data.get("className"):
+        first_class = element_data["className"].split()[0] if element_data["className"] else None
+        if first_class:
+            return f".{first_class}"
+
+    # Fallback to tag
+    return element_type
+
+
+def element_role(elem: Dict[str, Any]) -> str:
+    """
+    Semantic role of an element
+
+    username, password, email, search, input (fields) or
+    search_button, apply_button, submit, button (buttons)
+    """
+    elem_type = (elem.get("type") or "").lower()
+    if elem_type in ("username", "password", "email"):
+        return elem_type
+    identity = " ".join(str(elem.get(field) or "") for field in ("id", "name", "placeholder", "aria-label")).lower()
+    if elem_type == "button" or elem.get("tag") == "button":
+        text = f"{elem.get('text') or ''} {identity}".lower()
+        if any(word in text for word in SEARCH_WORDS):
+            return "search_button"
+        if any(word in text for word in APPLY_WORDS):
+            return "apply_button"
+        if any(word in text for word in SUBMIT_WORDS) or elem.get("input_type") == "submit":
+            return "submit"
+        return "button"
+    if any(word in identity for word in SEARCH_WORDS) or elem_type == "search":
+        return "search"
+    if "user" in identity or "login" in identity:
+        return "username"
+    if "pass" in identity:
+        return "password"
+    if "mail" in identity:
+        return "email"
+    return "input"
+
+
+def css_to_iwa_selector(css_selector: str, elem: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert CSS selector string to IWA format"""
+    from ..actions.selectors import create_selector
+
+    if not css_selector:
+        # Fallback: try to build from element attributes
+        if elem.get("id"):
+            return create_selector("attributeValueSelector", elem["id"], attribute="id")
+        elif elem.get("data-testid"):
+            return create_selector("attributeValueSelector", elem["data-testid"], attribute="data-testid")
+        elif elem.get("name"):
+            return create_selector("attributeValueSelector", elem["name"], attribute="name")
+        else:
+            return create_selector("tagContainsSelector", "button", case_sensitive=False)
+
+    # Convert CSS selector to IWA format
+    if css_selector.startswith("#"):
+        # ID selector: #myId -> attributeValueSelector with id
+        return create_selector("attributeValueSelector", css_selector[1:], attribute="id")
+    elif css_selector.startswith("."):
+        # Class selector: .myClass -> tagContainsSelector
+        return create_selector("tagContainsSelector", css_selector[1:], case_sensitive=False)
+    elif css_selector.startswith("[") and "=" in css_selector:
+        # Attribute selector: [name='value'] -> attributeValueSelector
+        match = _ATTR_SELECTOR_RE.search(css_selector)
+        if match:
+            attr_name, attr_value = match.groups()
+            return create_selector("attributeValueSelector", attr_value, attribute=attr_name)
+        else:
+            return create_selector("tagContainsSelector", css_selector, case_sensitive=False)
+    else:
+        # Generic tag or text -> tagContainsSelector
+        return create_selector("tagContainsSelector", css_selector, case_sensitive=False)
+
+
+# Fields tokenized into the per-snapshot index
+INDEXED_FIELDS = ("text", "id", "name", "placeholder", "aria-label", "data-testid")
+
+# Intent keyword lists (matched as substrings of element text, as before the index)
+LOGIN_TEXT_WORDS = ("submit", "login", "register")
+CLICK_TEXT_WORDS = ("button", "submit", "ok", "save", "send", "next", "continue", "apply")
+TYPEABLE_TYPES = ("text", "email", "username", "password")
+MAX_CANDIDATES = 10
+
+# Button text that marks a form's submit control / a search trigger / a job application
+SUBMIT_WORDS = ("submit", "login", "log in", "sign in", "sign up", "register", "book", "reserve", "confirm")
+SEARCH_WORDS = ("search", "query")
+APPLY_WORDS = ("apply",)
+
+# Similarity only reorders candidates within a confidence tier (tiers are 0.1 apart)
+SIMILARITY_WEIGHT = 0.09
+# Element fields matched against the prompt (text first; identifiers often spell the role)
+SIMILARITY_FIELDS = ("text", "aria-label", "placeholder", "name", "id", "data-testid")
+
+
+class ElementIndex:
+    """
+    Inverted index over one page snapshot's elements
+
+    Built once per snapshot (fetch time): lowercase whitespace tokens of each
+    INDEXED_FIELDS value -> element positions, plus positions by element type.
+    Scoring becomes postings lookups instead of per-element string scans.
+    """
+
+    __slots__ = ("size", "postings", "by_type", "by_input_type", "buttons")
+
+    def __init__(self, elements: List[Dict[str, Any]]):
+        self.size = len(elements)
+        self.postings: Dict[str, Dict[str, List[int]]] = {field: {} for field in INDEXED_FIELDS}
+        self.by_type: Dict[str, List[int]] = {}
+        self.by_input_type: Dict[str, List[int]] = {}
+        self.buttons: List[int] = []
+        for position, elem in enumerate(elements):
+            for field in INDEXED_FIELDS:
+                value = elem.get(field)
+                if not value:
+                    continue
+                field_postings = self.postings[field]
+                for token in set(value.lower().split()):
+                    field_postings.setdefault(token, []).append(position)
+            self.by_type.setdefault(elem.get("type"), []).append(position)
+            if elem.get("input_type"):
+                self.by_input_type.setdefault(elem["input_type"], []).append(position)
+            if elem.get("type") == "button" or elem.get("tag") == "button":
+                self.buttons.append(position)
+
+    def containing(self, field: str, words: Iterable[str]) -> Set[int]:
+        """
+        Positions whose field contains any of words as a substring
+
+        Words carry no whitespace, so a substring match always falls inside a
+        single token - scanning the (small) vocabulary is equivalent to
+        scanning every element's text.
+        """
+        words = tuple(words)
+        found: Set[int] = set()
+        if not words:
+            return found
+        for token, positions in self.postings[field].items():
+            if any(word in token for word in words):
+                found.update(positions)
+        return found
+
+    def of_type(self, *types: str) -> Set[int]:
+        return {position for t in types for position in self.by_type.get(t, ())}
+
+
+_vectorizer = None
+_vectorizer_lock = threading.Lock()
+
+
+def get_element_vectorizer():
+    """
+    Shared hashed character n-gram vectorizer (None without scikit-learn)
+
+    Hashing needs no vocabulary, so "fitting" is just construction - done
+    once (at startup by the warmup) and reused by every snapshot and prompt.
+    """
+    global _vectorizer
+    if HashingVectorizer is None:
+        return None
+    if _vectorizer is None:
+        with _vectorizer_lock:
+            if _vectorizer is None:
+                _vectorizer = HashingVectorizer(
+                    analyzer="char_wb",
+                    ngram_range=(3, 4),
+                    n_features=2 ** 16,
+                    alternate_sign=False,
+                    norm="l2",
+                )
+    return _vectorizer
+
+
+class ElementTable(ElementIndex):
+    """
+    Columnar view of a page snapshot for batched scoring
+
+    Role features are boolean columns (one entry per element) and element
+    text is a sparse hashed n-gram matrix, all computed once per snapshot.
+    Per prompt only the intent-word column and one sparse matrix-vector
+    product are computed.
+    """
+
+    __slots__ = ("is_button", "is_typeable", "type_username_password", "type_email",
+                 "type_button", "login_text", "click_text", "submit_like", "vectors")
+
+    def __init__(self, elements: List[Dict[str, Any]], vectorizer):
+        super().__init__(elements)
+        self.is_button = self._mask(self.buttons)
+        self.is_typeable = self._mask(self.of_type(*TYPEABLE_TYPES))
+        self.type_username_password = self._mask(self.of_type("username", "password"))
+        self.type_email = self._mask(self.of_type("email"))
+        self.type_button = self._mask(self.of_type("button"))
+        self.login_text = self._mask(self.containing("text", LOGIN_TEXT_WORDS))
+        self.click_text = self._mask(self.containing("text", CLICK_TEXT_WORDS))
+        self.submit_like = self.type_button & (
+            self._mask(self.containing("text", ("submit",))) | self._mask(self.by_input_type.get("submit", ()))
+        )
+        self.vectors = vectorizer.transform([
+            " ".join(str(elem.get(field) or "") for field in SIMILARITY_FIELDS) for elem in elements
+        ])
+
+    def _mask(self, positions: Iterable[int]):
+        mask = np.zeros(self.size, dtype=bool)
+        mask[list(positions)] = True
+        return mask
+
+    def role_confidence(self, intent_lower: str, task_type: str):
+        """Confidence tier per element (same rules as _score_positions, as column operations)"""
+        confidence = np.zeros(self.size)
+        if task_type in ["login", "register"] or "login" in intent_lower or "register" in intent_lower:
+            confidence[self.login_text | self.type_email] = 0.8
+            confidence[self.type_username_password] = 0.9
+        elif "click" in intent_lower:
+            intent_words = [word for word in intent_lower.split() if len(word) > 3]
+            confidence[self.is_button] = 0.6
+            confidence[self._mask(self.containing("text", intent_words))] = 0.8
+            confidence[self.click_text] = 0.9
+        elif "type" in intent_lower or "enter" in intent_lower or "fill" in intent_lower:
+            confidence[self.is_typeable] = 0.7
+        elif "submit" in intent_lower:
+            confidence[self.submit_like] = 0.9
+        return confidence
+
+    def top_k(self, intent_lower: str, task_type: str, k: int):
+        """[(position, confidence, similarity)] best first"""
+        confidence = self.role_confidence(intent_lower, task_type)
+        eligible = np.flatnonzero(confidence > 0.4)
+        if not eligible.size:
+            return []
+        query = get_element_vectorizer().transform([intent_lower])
+        similarity = (self.vectors[eligible] @ query.T).toarray().ravel()
+        score = confidence[eligible] + SIMILARITY_WEIGHT * similarity
+        if eligible.size > k:
+            keep = np.argpartition(-score, k - 1)[:k]
+            eligible, score, similarity = eligible[keep], score[keep], similarity[keep]
+        order = np.lexsort((eligible, -score))  # best score first, document order breaks ties
+        return [
+            (int(eligible[i]), float(confidence[eligible[i]]), float(similarity[i]))
+            for i in order
+        ]
+
+
+def build_element_index(elements: List[Dict[str, Any]]) -> ElementIndex:
+    """Columnar table (or plain token index without numpy) attached as page_data["index"]"""
+    vectorizer = get_element_vectorizer()
+    if vectorizer is not None and elements:
+        return ElementTable(elements, vectorizer)
+    return ElementIndex(elements)
+
+
+def _score_positions(index: ElementIndex, intent_lower: str, task_type: str) -> Dict[int, float]:
+    """Confidence per element position (same rules as the per-element scan)"""
+    scores: Dict[int, float] = {}
+
+    # Login/Register tasks
+    if task_type in ["login", "register"] or "login" in intent_lower or "register" in intent_lower:
+        # Assigned lowest precedence first; type matches override text matches
+        for position in index.containing("text", LOGIN_TEXT_WORDS):
+            scores[position] = 0.8
+        for position in index.of_type("email"):
+            scores[position] = 0.8
+        for position in index.of_type("username", "password"):
+            scores[position] = 0.9
+
+    # Click tasks
+    elif "click" in intent_lower:
+        intent_words = [word for word in intent_lower.split() if len(word) > 3]
+        for position in index.buttons:
+            scores[position] = 0.6  # Any button is a reasonable match for "click"
+        for position in index.containing("text", intent_words):
+            scores[position] = 0.8
+        # Check for specific button text matches
+        for position in index.containing("text", CLICK_TEXT_WORDS):
+            scores[position] = 0.9
+
+    # Type tasks
+    elif "type" in intent_lower or "enter" in intent_lower or "fill" in intent_lower:
+        for position in index.of_type(*TYPEABLE_TYPES):
+            scores[position] = 0.7
+
+    # Submit tasks
+    elif "submit" in intent_lower:
+        submit_like = index.containing("text", ("submit",)).union(index.by_input_type.get("submit", ()))
+        for position in index.of_type("button") & submit_like:
+            scores[position] = 0.9
+
+    return scores
+
+
+def score_elements(page_data: Dict[str, Any], intent: str, task_type: str) -> List[Dict[str, Any]]:
+    """
+    Analyze DOM and generate selectors based on intent
+
+    Args:
+        page_data: Page data from fetch_page (uses its prebuilt "index" if present)
+        intent: User intent (prompt)
+        task_type: Type of task (login, register, etc.)
+
+    Returns:
+        List of selector candidates with confidence scores (IWA format)
+    """
+    if not page_data or "elements" not in page_data:
+        return []
+
+    elements = page_data.get("elements", [])
+    index = page_data.get("index")
+    if index is None or index.size != len(elements):
+        index = build_element_index(elements)
+
+    if isinstance(index, ElementTable):
+        candidates = []
+        for position, confidence, similarity in index.top_k(intent.lower(), task_type, MAX_CANDIDATES):
+            elem = elements[position]
+            candidates.append({
+                "selector": css_to_iwa_selector(elem.get("selector", ""), elem),  # IWA format selector
+                "type": elem.get("type", "unknown"),
+                "role": element_role(elem),
+                "confidence": confidence,
+                "similarity": round(similarity, 4),
+                "element": elem
+            })
+        return candidates
+
+    scores = _score_positions(index, intent.lower(), task_type)
+
+    # Top-k by confidence (document order breaks ties); only candidates with reasonable confidence
+    top = heapq.nsmallest(
+        MAX_CANDIDATES,
+        ((-confidence, position) for position, confidence in scores.items() if confidence > 0.4),
+    )
+
+    # Selectors are only converted to IWA format for returned candidates
+    candidates = []
+    for negative_confidence, position in top:
+        elem = elements[position]
+        candidates.append({
+            "selector": css_to_iwa_selector(elem.get("selector", ""), elem),  # IWA format selector
+            "type": elem.get("type", "unknown"),
+            "role": element_role(elem),
+            "confidence": -negative_confidence,
+            "element": elem
+        })
+    return candidates
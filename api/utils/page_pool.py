@@ -0,0 +1,203 @@
+"""
+Pool of prewarmed Playwright contexts/pages for live page analysis
+
+Creating a BrowserContext + Page and registering the resource-blocking route
+costs tens of milliseconds of CDP round trips per task. The pool creates
+page_pool_size context/page pairs once per browser instance (when the
+BrowserManager launches it), with the blocking route already installed, and
+leases them out per fetch.
+
+Returned pages are reset in the background (storage cleared, about:blank,
+cookies dropped) so the next lease starts clean without the caller paying
+for it. A page that fails to reset (crashed, closed) is replaced.
+
+Resource blocking is browser-side by default: a CDP Network.setBlockedURLs
+blocklist per page, so allowed requests never cross into Python. The Python
+route handler is only installed when resource_blocking = "route".
+"""
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .metrics import get_metrics
+
+logger = logging.getLogger(__name__)
+
+# Resources never needed for DOM/selector analysis
+BLOCKED_RESOURCE_TYPES = ("image", "media")
+BLOCKED_FONT_EXTENSIONS = (".woff", ".woff2", ".ttf", ".otf", ".eot")
+BLOCKED_TRACKERS = ("google-analytics", "gtag", "analytics", "tracking")
+# URL-pattern equivalents of the above for the browser-side blocklist ("*" wildcards).
+# Images without a file extension are covered by the imagesEnabled=false launch flag.
+BLOCKED_MEDIA_EXTENSIONS = (
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".avif", ".svg", ".ico", ".bmp",
+    ".mp4", ".webm", ".ogg", ".mp3", ".wav", ".m4a", ".mov",
+)
+BLOCKED_URL_PATTERNS = tuple(
+    pattern
+    for ext in BLOCKED_MEDIA_EXTENSIONS + BLOCKED_FONT_EXTENSIONS
+    for pattern in (f"*{ext}", f"*{ext}?*")
+) + tuple(f"*{tracker}*" for tracker in BLOCKED_TRACKERS)
+
+_CLEAR_STORAGE_JS = "() => { try { localStorage.clear(); sessionStorage.clear(); } catch (e) {} }"
+
+
+async def block_heavy_resources(route):
+    """Route handler: abort images, media, fonts and trackers; continue everything else"""
+    request = route.request
+    url_path = request.url.lower()
+    if (
+        request.resource_type in BLOCKED_RESOURCE_TYPES
+        or any(ext in url_path for ext in BLOCKED_FONT_EXTENSIONS)
+        or any(tracker in url_path for tracker in BLOCKED_TRACKERS)
+    ):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+async def install_resource_blocking(context, page, mode: Optional[str] = None):
+    """
+    Block heavy resources for page
+    
+    mode "cdp" (default): Network.setBlockedURLs on the page's CDP session - matched
+    inside Chromium, no per-request Python round trip. mode "route": the Python
+    route handler on the context (every subrequest goes through Python).
+    """
+    if mode is None:
+        from config.settings import settings
+        mode = getattr(settings, 'resource_blocking', 'cdp')
+    if mode == "route":
+        await context.route("**/*", block_heavy_resources)
+        return
+    session = await context.new_cdp_session(page)
+    await session.send("Network.enable")
+    await session.send("Network.setBlockedURLs", {"urls": list(BLOCKED_URL_PATTERNS)})
+
+
+class PagePool:
+    """Fixed-size pool of (context, page) pairs with routes preinstalled"""
+
+    def __init__(self, browser, size: int = 4, lease_timeout: float = 2.0):
+        """
+        Args:
+            browser: Playwright Browser the pages belong to
+            size: Number of pooled context/page pairs
+            lease_timeout: Max seconds to wait for a free page
+        """
+        self.browser = browser
+        self.size = max(1, int(size))
+        self.lease_timeout = float(lease_timeout)
+        self._idle: "asyncio.Queue[Tuple[Any, Any]]" = asyncio.Queue()
+        self._resetting: Set[asyncio.Task] = set()
+        self._slots = 0
+        self._leased = 0
+        self._closed = False
+        self.leases = 0
+        self.lease_timeouts = 0
+        self.replaced = 0
+        self._wait_hist = get_metrics().histogram(
+            "browser_page_lease_wait_seconds",
+            "Time spent waiting for a pooled browser page",
+        )
+
+    async def start(self):
+        """Create all pooled pages (in parallel)"""
+        results = await asyncio.gather(
+            *(self._new_slot() for _ in range(self.size)), return_exceptions=True
+        )
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Failed to prewarm pooled page: {result}")
+            else:
+                self._slots += 1
+                self._idle.put_nowait(result)
+        logger.info(f"✅ Browser page pool ready: {self._slots}/{self.size} pages prewarmed")
+
+    async def _new_slot(self) -> Tuple[Any, Any]:
+        context = await self.browser.new_context()
+        page = await context.new_page()
+        await install_resource_blocking(context, page)
+        return context, page
+
+    @asynccontextmanager
+    async def lease(self, timeout: Optional[float] = None):
+        """
+        Borrow a clean page for the duration of the block
+
+        Raises:
+            asyncio.TimeoutError: no page became free within the lease timeout
+        """
+        wait_start = time.perf_counter()
+        try:
+            slot = await asyncio.wait_for(
+                self._idle.get(), timeout=self.lease_timeout if timeout is None else timeout
+            )
+        except asyncio.TimeoutError:
+            self.lease_timeouts += 1
+            raise
+        self._wait_hist.observe(time.perf_counter() - wait_start, ())
+        self.leases += 1
+        self._leased += 1
+        try:
+            yield slot[1]
+        finally:
+            self._leased -= 1
+            task = asyncio.ensure_future(self._recycle(slot))
+            self._resetting.add(task)
+            task.add_done_callback(self._resetting.discard)
+
+    async def _recycle(self, slot: Tuple[Any, Any]):
+        """Reset a returned page (or replace it) and put it back in the pool"""
+        context, page = slot
+        if self._closed:
+            await self._close_slot(slot)
+            return
+        try:
+            if page.is_closed():
+                raise RuntimeError("page closed")
+            await page.evaluate(_CLEAR_STORAGE_JS)  # storage belongs to the last origin
+            await page.goto("about:blank")
+            await context.clear_cookies()
+        except Exception as e:
+            logger.debug(f"Pooled page reset failed, replacing: {e}")
+            await self._close_slot(slot)
+            try:
+                slot = await self._new_slot()
+                self.replaced += 1
+            except Exception as create_err:
+                self._slots -= 1
+                logger.warning(f"⚠️ Could not replace pooled page ({self._slots} left): {create_err}")
+                return
+        self._idle.put_nowait(slot)
+
+    @staticmethod
+    async def _close_slot(slot: Tuple[Any, Any]):
+        try:
+            await slot[0].close()
+        except Exception:
+            pass
+
+    async def close(self):
+        """Close every pooled context (leased pages are closed when returned)"""
+        self._closed = True
+        if self._resetting:
+            await asyncio.gather(*self._resetting, return_exceptions=True)
+        slots: List[Tuple[Any, Any]] = []
+        while not self._idle.empty():
+            slots.append(self._idle.get_nowait())
+        await asyncio.gather(*(self._close_slot(slot) for slot in slots))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get pool utilization counters"""
+        return {
+            "size": self._slots,
+            "idle": self._idle.qsize(),
+            "leased": self._leased,
+            "utilization": self._leased / self._slots if self._slots else 0.0,
+            "leases": self.leases,
+            "lease_timeouts": self.lease_timeouts,
+            "replaced": self.replaced,
+        }
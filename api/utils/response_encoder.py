@@ -0,0 +1,58 @@
+"""Single-pass response encoder for /solve_task
+
+Normalizes the agent's actions into the playground contract once and
+serializes the response body straight to bytes exactly once:
+{actions: [], web_agent_id: str, recording: str}
+"""
+import json
+import logging
+from typing import Dict, Any, List, Optional
+from ..actions.codec import encode_sequence
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_actions(actions: Optional[List[Dict[str, Any]]], fallback_url: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Normalize a whole action list in one pass - GUARANTEED non-empty"""
+    return encode_sequence(actions, fallback_url)[0]
+
+
+def build_response_content(
+    actions: Optional[List[Dict[str, Any]]],
+    web_agent_id: str,
+    fallback_url: Optional[str] = None,
+    errors: Optional[List[str]] = None,
+) -> Dict[str, Any]:
+    """
+    Build response dict with ONLY the allowed fields (actions, web_agent_id, recording)
+
+    errors: if given, IWA validation errors found during normalization are appended
+    """
+    normalized, validation_errors = encode_sequence(actions, fallback_url)
+    if errors is not None:
+        errors.extend(validation_errors)
+    return {
+        "actions": normalized,
+        "web_agent_id": web_agent_id,
+        "recording": "",
+    }
+
+
+def encode_response_content(content: Dict[str, Any]) -> bytes:
+    """Serialize an already-built response dict (the one and only json.dumps)"""
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def encode_cached_response(actions_json: str, web_agent_id: str) -> bytes:
+    """Response body around an already-encoded, already-normalized actions array (solve cache hits)"""
+    agent_id_json = json.dumps(web_agent_id, ensure_ascii=False)
+    return f'{{"actions":{actions_json},"web_agent_id":{agent_id_json},"recording":""}}'.encode("utf-8")
+
+
+def encode_solve_response(
+    actions: Optional[List[Dict[str, Any]]],
+    web_agent_id: str,
+    fallback_url: Optional[str] = None,
+) -> bytes:
+    """Normalize actions once and serialize the response body to bytes once"""
+    return encode_response_content(build_response_content(actions, web_agent_id, fallback_url))
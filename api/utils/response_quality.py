@@ -1,6 +1,7 @@
 """Response quality improvements for better accuracy and success rates"""
 from typing import Dict, Any, List
 import logging
+from ..actions.codec import canonicalize_selector
 
 logger = logging.getLogger(__name__)
 
@@ -71,29 +72,10 @@ class ResponseQualityEnhancer:
                     # Will be added by optimizer
                     pass
         
-        # Ensure proper selector format
-        if "selector" in enhanced and isinstance(enhanced["selector"], dict):
-            selector = enhanced["selector"]
-            # CRITICAL FIX: Use camelCase (caseSensitive) not snake_case (case_sensitive)
-            if "caseSensitive" not in selector:
-                # Convert snake_case to camelCase if present
-                if "case_sensitive" in selector:
-                    selector["caseSensitive"] = selector.pop("case_sensitive")
-                else:
-                    selector["caseSensitive"] = False
-            
-            # Ensure attribute is set for attributeValueSelector
-            if selector.get("type") == "attributeValueSelector" and not selector.get("attribute"):
-                # Try to infer attribute
-                value = selector.get("value", "")
-                if value.startswith("#"):
-                    selector["attribute"] = "id"
-                    selector["value"] = value[1:]
-                elif value.startswith("."):
-                    selector["attribute"] = "class"
-                    selector["value"] = value[1:]
-                else:
-                    selector["attribute"] = "name"
+        # Ensure proper selector format (camelCase caseSensitive, attributeValueSelector attribute)
+        # Interned selectors (create_selector) are complete and immutable - returned as-is
+        if isinstance(enhanced.get("selector"), dict):
+            enhanced["selector"] = canonicalize_selector(enhanced["selector"], infer_attribute=True)
         
         return enhanced
     
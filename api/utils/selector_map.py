@@ -0,0 +1,238 @@
+"""
+Persisted per-site semantic selector map
+
+Login, registration and search tasks keep landing on the same pages of the
+same demo sites, and live analysis keeps rediscovering the same
+username/password/submit/search-box selectors there. This map remembers them:
+
+    site (host) -> page path -> semantic role -> ranked IWA selectors
+
+It is loaded from JSON at startup, updated from every successful live
+analysis and written back periodically (atomically) and on shutdown. A fresh
+entry lets the generator fill selectors instantly without touching the
+browser; a stale one is still used while live analysis refreshes it in the
+background. Provisional entries (startup warmup, scored against generic
+intents) are only used when live analysis is unavailable, and are replaced by
+the first real analysis of the page.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from .page_elements import element_role
+
+logger = logging.getLogger(__name__)
+
+MAX_SELECTORS_PER_ROLE = 3
+
+# Task type -> (roles that must all be mapped, roles used when present), in candidate order
+# Only task types whose elements don't depend on the prompt: booking and click tasks pick
+# their target button from the prompt text, so they always go through live analysis.
+TASK_ROLES: Dict[str, Tuple[Tuple[str, ...], Tuple[str, ...]]] = {
+    "login": (("username", "password"), ("email", "submit")),
+    "form": (("username", "email", "password"), ("submit",)),  # registration (FORM_WORDS incl. "register")
+    "search": (("search",), ("search_button",)),
+    "job_search": (("search",), ("search_button",)),
+}
+
+
+def page_key(url: str) -> Optional[Tuple[str, str]]:
+    """(host, path) a page's selectors are stored under (None for non-http URLs)"""
+    parts = urlsplit((url or "").strip())
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        return None
+    host = parts.hostname.lower() + (f":{parts.port}" if parts.port else "")
+    return host, parts.path.rstrip("/") or "/"
+
+
+def semantic_role(candidate: Dict[str, Any]) -> str:
+    """Role of a live-analysis candidate (tagged by analyze_dom; derived for older candidates)"""
+    return candidate.get("role") or element_role(candidate.get("element") or {"type": candidate.get("type")})
+
+
+class SelectorMap:
+    """(site, page path, role) -> ranked IWA selectors, persisted as JSON"""
+
+    def __init__(self, path: str, ttl: float = 86400.0, save_interval: float = 30.0):
+        """
+        Args:
+            path: JSON file the map is loaded from and saved to
+            ttl: Seconds after which an entry is stale (used, but refreshed in the background)
+            save_interval: Minimum seconds between background saves
+        """
+        self.path = path
+        self.ttl = ttl
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._sites: Dict[str, Dict[str, Dict[str, Dict[str, Any]]]] = {}
+        self._dirty = False
+        self._last_save = time.time()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.updates = 0
+        self.saves = 0
+
+    def load(self) -> int:
+        """Load the map from disk; returns the number of (page, role) entries"""
+        if not os.path.exists(self.path):
+            return 0
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Failed to load selector map {self.path}: {e}")
+            return 0
+        with self._lock:
+            self._sites = data.get("sites", {}) if isinstance(data, dict) else {}
+            count = sum(len(roles) for pages in self._sites.values() for roles in pages.values())
+        logger.info(f"🗺️ Selector map loaded: {count} entries for {len(self._sites)} sites")
+        return count
+
+    def save(self):
+        """Write the map atomically (temp file + rename) if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            payload = json.dumps({"version": 1, "sites": self._sites}, indent=1, sort_keys=True)
+            self._dirty = False
+            self._last_save = time.time()
+        tmp_path = f"{self.path}.tmp"
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(tmp_path, "w") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+            self.saves += 1
+        except Exception as e:
+            self._dirty = True  # retry on the next save
+            logger.error(f"Failed to save selector map {self.path}: {e}")
+
+    def save_due(self) -> bool:
+        return self._dirty and time.time() - self._last_save >= self.save_interval
+
+    def lookup(self, url: str, task_type: str, include_provisional: bool = False) -> Tuple[List[Dict[str, Any]], bool]:
+        """
+        Mapped candidates for a task on a page, in live-analysis candidate format
+
+        Only roles relevant to task_type are returned, and only when every
+        required role is mapped (otherwise live analysis has to run anyway).
+        Provisional entries count only with include_provisional.
+
+        Returns:
+            (candidates best first, stale) - ([], False) on a miss
+        """
+        key = page_key(url)
+        required, optional = TASK_ROLES.get(task_type, ((), ()))
+        if not key or not required:
+            return [], False
+        now = time.time()
+        stale = False
+        candidates = []
+        with self._lock:
+            roles = {
+                role: entry for role, entry in self._sites.get(key[0], {}).get(key[1], {}).items()
+                if include_provisional or not entry.get("provisional")
+            }
+            if not all(role in roles for role in required):
+                self.misses += 1
+                return [], False
+            for role in required + optional:
+                entry = roles.get(role)
+                if not entry:
+                    continue
+                stale = stale or now - entry.get("updated_at", 0) > self.ttl
+                for ranked in entry.get("selectors", [])[:1]:  # best selector per role
+                    candidates.append({
+                        "selector": ranked["selector"],
+                        "type": ranked.get("type", "unknown"),
+                        "confidence": ranked.get("confidence", 0.5),
+                        "role": role,
+                        "source": "selector_map",
+                    })
+        if stale:
+            self.stale_hits += 1
+        else:
+            self.hits += 1
+        return candidates, stale
+
+    def record(self, url: str, candidates: List[Dict[str, Any]], provisional: bool = False):
+        """
+        Merge live-analysis candidates into the page's entries (newest first per role)
+
+        provisional: candidates not scored against a real prompt (warmup) - never
+            overwrite a real entry and are only served with include_provisional
+        """
+        key = page_key(url)
+        if not key or not candidates:
+            return
+        by_role: Dict[str, List[Dict[str, Any]]] = {}
+        for candidate in candidates:
+            if candidate.get("source") == "selector_map" or not isinstance(candidate.get("selector"), dict):
+                continue
+            by_role.setdefault(semantic_role(candidate), []).append({
+                "selector": candidate["selector"],
+                "type": candidate.get("type", "unknown"),
+                "confidence": candidate.get("confidence", 0.5),
+            })
+        if not by_role:
+            return
+        now = time.time()
+        with self._lock:
+            roles = self._sites.setdefault(key[0], {}).setdefault(key[1], {})
+            for role, fresh in by_role.items():
+                entry = roles.get(role, {})
+                if provisional and entry and not entry.get("provisional"):
+                    continue
+                merged = list(fresh)
+                for ranked in entry.get("selectors", []):
+                    if all(ranked["selector"] != kept["selector"] for kept in merged):
+                        merged.append(ranked)
+                roles[role] = {"selectors": merged[:MAX_SELECTORS_PER_ROLE], "updated_at": now}
+                if provisional:
+                    roles[role]["provisional"] = True
+            self._dirty = True
+            self.updates += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            entries = sum(len(roles) for pages in self._sites.values() for roles in pages.values())
+            pages = sum(len(site_pages) for site_pages in self._sites.values())
+        lookups = self.hits + self.stale_hits + self.misses
+        return {
+            "sites": len(self._sites),
+            "pages": pages,
+            "entries": entries,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "updates": self.updates,
+            "saves": self.saves,
+            "hit_rate": (self.hits + self.stale_hits) / lookups if lookups else 0.0,
+        }
+
+
+# Global selector map instance
+_selector_map: Optional[SelectorMap] = None
+
+
+def get_selector_map() -> Optional[SelectorMap]:
+    """Get or create (and load) the global selector map (None if disabled)"""
+    global _selector_map
+    from config.settings import settings, data_path
+    if not getattr(settings, 'selector_map_enabled', True):
+        return None
+    if _selector_map is None:
+        _selector_map = SelectorMap(
+            path=data_path(settings.selector_map_path),
+            ttl=settings.selector_map_ttl,
+            save_interval=settings.selector_map_save_interval,
+        )
+        _selector_map.load()
+    return _selector_map
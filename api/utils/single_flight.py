@@ -0,0 +1,74 @@
+"""
+Single-flight coalescing of concurrent identical work
+
+When several validators send the same task at the same moment, only the first
+caller (the leader) starts the work; every other caller with the same key
+awaits the same shared task. Callers await through asyncio.shield, so one
+caller timing out or being cancelled never cancels the work for the others.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlight:
+    """Deduplicate concurrent awaits of the same key onto one shared task"""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+        self.leaders = 0
+        self.coalesced = 0
+
+    async def do(self, key: Hashable, factory: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run factory() once per key among concurrent callers
+
+        Args:
+            key: Work identity (callers with equal keys share one result)
+            factory: Zero-arg callable returning the awaitable to run
+
+        Returns:
+            The shared result - callers must copy it before mutating
+        """
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(factory())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t, k=key: self._forget(k, t))
+            self.leaders += 1
+        else:
+            self.coalesced += 1
+            logger.info(f"🔗 Joining in-flight generation ({len(self._inflight)} in flight)")
+        return await asyncio.shield(task)
+
+    def _forget(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved - every caller may already have given up
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._inflight)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get coalescing counters"""
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "coalesced": self.coalesced,
+        }
+
+
+# Global solve single-flight instance
+_solve_flight: Optional[SingleFlight] = None
+
+
+def get_solve_flight() -> SingleFlight:
+    """Get or create global single-flight instance for /solve_task"""
+    global _solve_flight
+    if _solve_flight is None:
+        _solve_flight = SingleFlight()
+    return _solve_flight
@@ -0,0 +1,196 @@
+"""
+Request-level solve cache
+
+Validators resend the same IWA task templates constantly. This caches the
+final IWA action list per normalized task so a repeat costs a dict lookup
+instead of a full parse/generate/finalize (and possibly a browser fetch).
+
+Entries are stored as templates: the per-request agent id that was spliced
+into the prompt is swapped back for the <web_agent_id> placeholder, and the
+caller's own agent id is spliced in again when the entry is served. That swap
+is a plain substitution, so it is only done for ids shaped like the UUID
+prefix the endpoint derives (8 hex digits); tasks with other ids ("1", "42",
+"abc" could also be part of a URL or typed text) are not cached.
+
+Only already-normalized (codec output) actions are stored, and they are kept
+as their encoded JSON array: a hit splices the agent id into that string and
+the endpoint wraps it into the response body without re-normalizing or
+re-serializing the actions.
+"""
+import copy
+import json
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+WEB_AGENT_ID_PLACEHOLDER = "<web_agent_id>"
+
+# First segment of a task UUID - distinctive enough to substitute in generated plans
+TEMPLATABLE_AGENT_ID = re.compile(r"[0-9a-fA-F]{8}")
+
+CacheKey = Tuple[str, str, str]
+
+
+def _substitute(obj: Any, old: str, new: str) -> Any:
+    """Return a copy of obj with old replaced by new in every string value"""
+    if isinstance(obj, str):
+        return obj.replace(old, new) if old in obj else obj
+    if isinstance(obj, dict):
+        return {k: _substitute(v, old, new) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_substitute(item, old, new) for item in obj]
+    return obj
+
+
+def is_templatable_agent_id(agent_id: str) -> bool:
+    """True if agent_id can be swapped for the placeholder without touching unrelated text"""
+    return not agent_id or TEMPLATABLE_AGENT_ID.fullmatch(agent_id) is not None
+
+
+def templatize_actions(actions: List[Dict[str, Any]], agent_id: str) -> List[Dict[str, Any]]:
+    """Copy of actions with agent_id swapped back to the <web_agent_id> placeholder (plain copy if not templatable)"""
+    if not agent_id or not is_templatable_agent_id(agent_id):
+        return copy.deepcopy(actions)
+    return _substitute(actions, agent_id, WEB_AGENT_ID_PLACEHOLDER)
+
+
+def personalize_actions(template: List[Dict[str, Any]], agent_id: str) -> List[Dict[str, Any]]:
+    """Copy of a templatized action list with agent_id spliced into the placeholder"""
+    if not agent_id or not is_templatable_agent_id(agent_id):
+        return copy.deepcopy(template)
+    return _substitute(template, WEB_AGENT_ID_PLACEHOLDER, agent_id)
+
+
+def encode_actions_json(actions: List[Dict[str, Any]]) -> str:
+    """Compact JSON array of actions (same encoding as the /solve_task response body)"""
+    return json.dumps(actions, ensure_ascii=False, separators=(",", ":"))
+
+
+def make_solve_key(prompt: str, url: str, version: str) -> CacheKey:
+    """
+    Normalized cache key for a task
+
+    Args:
+        prompt: Original prompt, with <web_agent_id> still as a placeholder
+        url: Task URL (may be empty)
+        version: Generator version - bumping it invalidates all entries
+    """
+    return (" ".join((prompt or "").split()), (url or "").strip().rstrip("/"), version)
+
+
+class SolveCache:
+    """In-process LRU + TTL cache of final IWA action lists"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 600.0):
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl)
+        self._entries: "OrderedDict[CacheKey, Tuple[float, str, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.untemplatable = 0
+
+    def get_encoded(self, key: CacheKey, agent_id: str) -> Optional[Tuple[str, str]]:
+        """
+        Look up a task without decoding its actions
+
+        Returns:
+            (JSON array of the actions with agent_id spliced in, task_type) or None on miss
+        """
+        if not is_templatable_agent_id(agent_id):
+            with self._lock:
+                self.untemplatable += 1
+                self.misses += 1
+            return None
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, actions_json, task_type = entry
+            if now - stored_at > self.ttl:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # Templatable ids are plain hex digits - nothing to escape inside the JSON
+        if agent_id:
+            actions_json = actions_json.replace(WEB_AGENT_ID_PLACEHOLDER, agent_id)
+        return actions_json, task_type
+
+    def get(self, key: CacheKey, agent_id: str) -> Optional[Tuple[List[Dict[str, Any]], str]]:
+        """
+        Look up a task
+
+        Returns:
+            (actions with agent_id spliced in, task_type) or None on miss
+        """
+        cached = self.get_encoded(key, agent_id)
+        if cached is None:
+            return None
+        return json.loads(cached[0]), cached[1]
+
+    def put(self, key: CacheKey, actions: List[Dict[str, Any]], agent_id: str, task_type: str = "generic"):
+        """
+        Store a task's final actions, templatizing agent_id back to the placeholder
+
+        actions must already be normalized (codec output) - hits are served as-is
+        """
+        if not actions or not is_templatable_agent_id(agent_id):
+            return
+        actions_json = encode_actions_json(templatize_actions(actions, agent_id))
+        with self._lock:
+            self._entries[key] = (time.monotonic(), actions_json, task_type)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "untemplatable": self.untemplatable,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Global solve cache instance
+_solve_cache: Optional[SolveCache] = None
+
+
+def get_solve_cache() -> SolveCache:
+    """Get or create global solve cache instance"""
+    global _solve_cache
+    if _solve_cache is None:
+        from config.settings import settings
+        _solve_cache = SolveCache(
+            max_entries=settings.solve_cache_max_entries,
+            ttl=settings.solve_cache_ttl,
+        )
+    return _solve_cache
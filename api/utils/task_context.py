@@ -0,0 +1,130 @@
+"""
+Parse-once task context
+
+A TaskContext is built once per /solve_task request and threaded through
+TemplateAgent.solve_task into ActionGenerator.generate and its handlers, so
+no stage re-parses the prompt, re-lowercases it or re-infers the site.
+"""
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Any, Mapping, Optional, Tuple
+
+from .deadline import Deadline
+from .keywords import extract_keywords
+from .metrics import stage_timer
+from .task_parser import TaskParser
+
+# Site inference table (first keyword hit wins) - shared by endpoint and generator
+SITE_URLS: Tuple[Tuple[Tuple[str, ...], str], ...] = (
+    (("book", "books"), "https://autobooks.autoppia.com"),
+    (("work", "consultation"), "https://autowork.autoppia.com"),
+    (("cinema", "movie"), "https://autocinema.autoppia.com"),
+    (("calendar",), "https://autocalendar.autoppia.com"),
+    (("delivery",), "https://autodelivery.autoppia.com"),
+    (("lodge",), "https://autolodge.autoppia.com"),
+    (("list",), "https://autolist.autoppia.com"),
+    (("zone",), "https://autozone.autoppia.com"),
+)
+DEFAULT_SITE_URL = "https://autobooks.autoppia.com"  # Default for benchmark tasks
+
+_parser: Optional[TaskParser] = None
+
+
+def _get_parser() -> TaskParser:
+    global _parser
+    if _parser is None:
+        _parser = TaskParser()
+    return _parser
+
+
+def infer_site_url(prompt_lower: str) -> str:
+    """Infer the Autoppia demo site URL from a lowercased prompt"""
+    for words, site_url in SITE_URLS:
+        if any(word in prompt_lower for word in words):
+            return site_url
+    return DEFAULT_SITE_URL
+
+
+def _normalize_url(url: Any) -> str:
+    """Ensure url is always a string (playground may send None or a dict)"""
+    if url is None:
+        return ""
+    if isinstance(url, dict):
+        return url.get("url", url.get("href", ""))
+    if not isinstance(url, str):
+        return str(url) if url else ""
+    return url
+
+
+def _category(parsed: Mapping[str, Any]) -> str:
+    """Coarse task category used for metrics and learning"""
+    if parsed.get("has_login"):
+        return "login"
+    if parsed.get("has_form"):
+        return "form"
+    if parsed.get("has_search"):
+        return "search"
+    if parsed.get("has_modify"):
+        return "modify"
+    return "generic"
+
+
+@dataclass(frozen=True)
+class TaskContext:
+    """Immutable per-request view of a parsed task"""
+    prompt: str
+    prompt_lower: str
+    url: str
+    parsed: Mapping[str, Any]  # read-only view of TaskParser.parse_task output
+    keywords: Mapping[str, Any]  # extract_keywords hits
+    site_url: str  # inferred from the prompt (used when no URL is given)
+    category: str = "generic"  # login/form/search/modify/generic
+    deadline: Optional[Deadline] = None  # request budget shared by every stage
+    degradation: int = 0  # admission level: 1 = no live analysis, 2 = no enrichers, 3 = template only
+
+    @classmethod
+    def build(cls, prompt: str, url: Any = "", deadline: Optional[Deadline] = None, degradation: int = 0) -> "TaskContext":
+        """Parse prompt once and capture everything downstream stages need"""
+        prompt = prompt or ""
+        url = _normalize_url(url)
+        prompt_lower = prompt.lower()
+        with stage_timer("parse_task"):
+            parsed = _get_parser().parse_task(prompt, url)
+        return cls(
+            prompt=prompt,
+            prompt_lower=prompt_lower,
+            url=url,
+            parsed=MappingProxyType(parsed),
+            keywords=MappingProxyType(extract_keywords(prompt)),
+            site_url=infer_site_url(prompt_lower),
+            category=_category(parsed),
+            deadline=deadline,
+            degradation=degradation,
+        )
+
+    def for_step(self, description: str, url: Any = "") -> "TaskContext":
+        """Context for one step of a multi-step task (shares this request's deadline and level)"""
+        return TaskContext.build(description, url, deadline=self.deadline, degradation=self.degradation)
+
+    def with_deadline(self, deadline: Optional[Deadline]) -> "TaskContext":
+        return replace(self, deadline=deadline)
+
+    def with_degradation(self, degradation: int) -> "TaskContext":
+        return replace(self, degradation=degradation)
+
+    @property
+    def allows_live_analysis(self) -> bool:
+        return self.degradation < 1
+
+    @property
+    def allows_enrichers(self) -> bool:
+        return self.degradation < 2
+
+    @property
+    def task_type(self) -> str:
+        """Fine-grained parser task type (booking, job_apply, login, ...)"""
+        return self.parsed.get("task_type", "generic")
+
+    def budget(self) -> Deadline:
+        """The request deadline (unbounded when built without one)"""
+        return self.deadline if self.deadline is not None else Deadline.unbounded()
@@ -1,73 +1,222 @@
-"""Advanced task parsing and extraction"""
+"""Advanced task parsing and extraction
+
+The whole pattern bank is compiled once at import. Every pattern is paired
+with a literal trigger that any match must contain, and parse_task lowers
+the prompt once and only runs the patterns whose trigger is present - a
+typical prompt touches a handful of regexes instead of all of them.
+
+Triggers are only trusted for ASCII prompts: with IGNORECASE a few
+non-ASCII characters (e.g. 'ſ', the Kelvin sign) match ASCII letters, so
+non-ASCII prompts run every pattern.
+
+IWA prompts come from a finite set of templates that differ in quoted
+literals and numbers. parse_task splits a prompt into (template, slots),
+keeps the parse of each template in a bounded LRU and re-binds the slot
+values into it on a hit, skipping the pattern cascade. A template is only
+cached after re-binding reproduced the full parse of the prompt it was
+first seen with; slots containing a keyword or trigger never hit.
+"""
+import marshal
 import re
-from typing import Dict, Any, Optional, List
+import string
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Any, Optional, List, Tuple, Pattern, Callable
+
+_I = re.IGNORECASE
+
+
+def _bank(patterns: List[Tuple[str, str]], flags: int = 0) -> Tuple[Tuple[str, Pattern], ...]:
+    """[(trigger, pattern)] -> ((trigger, compiled pattern), ...)"""
+    return tuple((trigger, re.compile(pattern, flags)) for trigger, pattern in patterns)
+
+
+# Credentials - searched in the lowered prompt, first matching pattern per field wins
+CREDENTIAL_PATTERNS = {
+    "username": _bank([
+        ("username", r"username[:\s=]+([^\s<,]+)"),
+        ("user", r"user[:\s=]+([^\s<,]+)"),
+        ("login", r"login[:\s=]+([^\s<,]+)"),
+        ("user", r"user\s+name[:\s=]+([^\s<,]+)"),
+        ("uname", r"uname[:\s=]+([^\s<,]+)"),
+    ], _I),
+    "password": _bank([
+        ("password", r"password[:\s=]+([^\s<,]+)"),
+        ("pass", r"pass[:\s=]+([^\s<,]+)"),
+        ("pwd", r"pwd[:\s=]+([^\s<,]+)"),
+    ], _I),
+    "email": _bank([
+        ("email", r"email[:\s=]+([^\s<,]+@[^\s<,]+)"),
+        ("e-mail", r"e-mail[:\s=]+([^\s<,]+@[^\s<,]+)"),
+        ("mail", r"mail[:\s=]+([^\s<,]+@[^\s<,]+)"),
+    ], _I),
+}
+
+# Email retried on the original (case-preserving) prompt when the lowered scan found none
+EMAIL_FALLBACK_PATTERNS = _bank([
+    ("email", r"email:\s*['\"]([^'\"]+@[^'\"]+)['\"]"),
+    ("email", r"email:\s*([^\s,]+@[^\s,]+)"),
+    ("email", r"email\s+['\"]([^'\"]+@[^'\"]+)['\"]"),
+], _I)
+
+URL_PATTERNS = _bank([
+    ("http", r"https?://[^\s]+"),
+    ("www.", r"www\.[^\s]+"),
+    ("navigate to ", r"navigate to ([^\s]+)"),
+    ("go to ", r"go to ([^\s]+)"),
+], _I)
+
+TEXT_PATTERNS = _bank([
+    ("type ", r"type ['\"]([^'\"]+)['\"]"),
+    ("enter ", r"enter ['\"]([^'\"]+)['\"]"),
+    ("fill with ", r"fill with ['\"]([^'\"]+)['\"]"),
+    ("contains the word ", r"contains the word ['\"]([^'\"]+)['\"]"),
+    ("contains ", r"contains ['\"]([^'\"]+)['\"]"),
+], _I)
+
+# Target element - searched in the lowered prompt (case-sensitive, so triggers are always exact)
+TARGET_PATTERNS = _bank([
+    ("click ", r"click (?:the |a |on )?([^,\.]+?)(?: button|link|element|tab|option)?"),
+    ("select ", r"select (?:the |a )?([^,\.]+?)(?: button|link|element|option|view)?"),
+    ("choose ", r"choose (?:the |a )?([^,\.]+?)(?: button|link|element|option)?"),
+    ("find ", r"find (?:the |a )?([^,\.]+?)(?: button|link|element)?"),
+    ("switch ", r"switch (?:to |the )?([^,\.]+?)(?: view|mode|tab)?"),
+    ("toggle ", r"toggle (?:the |to )?([^,\.]+?)(?: view|mode)?"),
+    ("view ", r"view (?:the |a )?([^,\.]+?)(?: view|mode)?"),
+    ("change ", r"change (?:to |the )?([^,\.]+?)(?: view|mode)?"),
+    ("open ", r"open (?:the |a )?([^,\.]+?)(?: button|link|tab)?"),
+    ("press ", r"press (?:the |a )?([^,\.]+?)(?: button|key)?"),
+])
+TARGET_FILLER_WORDS = re.compile(r"\b(the|a|an|on|in|at|to|for|with|from)\b")
+COMMON_TARGETS = (
+    ("month view", "month"),
+    ("week view", "week"),
+    ("day view", "day"),
+    ("year view", "year"),
+    ("login button", "login"),
+    ("submit button", "submit"),
+    ("search button", "search"),
+    ("profile", "profile"),
+    ("settings", "settings"),
+)
+
+# Negative constraints - every pattern contains "not"
+NEGATIVE_PATTERNS = tuple(
+    (field, trigger, re.compile(pattern, _I)) for field, trigger, pattern in (
+        ("exclude_text", "contain", r"does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]"),
+        ("exclude_text", "contain", r"NOT\s+contain\s+['\"]([^'\"]+)['\"]"),
+        ("exclude_text", "equal", r"NOT\s+equal\s+to\s+['\"]([^'\"]+)['\"]"),
+        ("exclude_location", "location", r"location\s+does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]"),
+        ("exclude_company", "company", r"company\s+does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]"),
+        ("exclude_date", "date", r"date\s+is\s+NOT\s+equal\s+to\s+['\"]([^'\"]+)['\"]"),
+    )
+)
+
+# Job fields - later patterns for the same field override earlier matches
+JOB_TITLE_PATTERNS = _bank([
+    ("title", r"job[_\s]?title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]"),
+    ("title", r"job\s+title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]"),
+], _I)
+TITLE_PATTERN = re.compile(r"title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]", _I)
+COMPANY_PATTERNS = _bank([
+    ("company", r"company\s+(?:that\s+)?contains\s+['\"]([^'\"]+)['\"]"),
+    ("company", r"company\s+name\s+contains\s+['\"]([^'\"]+)['\"]"),
+], _I)
+LOCATION_PATTERN = re.compile(r"location\s+(?:does\s+NOT\s+contain|contains)\s+['\"]([^'\"]+)['\"]", _I)
+QUERY_PATTERN = re.compile(r"query\s+(?:that\s+)?(?:does\s+NOT\s+contain|contains)\s+['\"]([^'\"]+)['\"]", _I)
+
+# Booking filters: filter name -> (trigger, pattern)
+BOOKING_FILTER_PATTERNS = tuple(
+    (name, trigger, re.compile(pattern, _I)) for name, trigger, pattern in (
+        ("name_contains", "name contains ", r"name contains ['\"]([^'\"]+)['\"]"),
+        ("rate_not_contains", "rate does not contain ", r"rate does not contain ['\"]([^'\"]+)['\"]"),
+        ("role_not_equal", "role is not equal to ", r"role is not equal to ['\"]([^'\"]+)['\"]"),
+        ("country_not_equal", "country is not equal to ", r"country is not equal to ['\"]([^'\"]+)['\"]"),
+        ("rating_equals", "rating equals ", r"rating equals ([\d.]+)"),
+    )
+)
+
+# Task type keyword sets
+LOGIN_WORDS = ("login", "sign in", "log in", "authenticate")
+FORM_WORDS = ("form", "fill", "submit", "enter", "register")
+SEARCH_WORDS = ("search", "find", "look for", "seek")
+MODIFY_WORDS = ("modify", "edit", "change", "update", "delete", "remove")
+CLICK_WORDS = ("click", "select", "choose", "switch", "toggle", "view")
+TYPE_WORDS = ("type", "enter", "input", "write")
+COMMENT_WORDS = ("comment", "post", "reply", "write a comment")
+SCROLL_WORDS = ("scroll", "move down", "move up")
+EXTRACT_WORDS = ("extract", "get", "read", "retrieve", "fetch")
+MULTISTEP_WORDS = ("and", "then", "after", "before", "first", "next")
+BOOKING_PHRASES = ("book a consultation", "book consultation", "book a", "booking")
+JOB_APPLY_PHRASES = ("apply for", "apply_for_job", "apply to job")
+JOB_VIEW_PHRASES = ("view job", "view_job", "retrieve details", "job posting", "job details")
+JOB_SEARCH_PHRASES = ("search jobs", "search_jobs", "search for jobs", "find jobs")
+
+# Prompt templates - quoted literals and numbers are the slots, the rest of the prompt is the template
+SLOT_PATTERN = re.compile(r"'([^']+)'|\"([^\"]+)\"|([0-9]+(?:\.[0-9]+)?)")
+MAX_SLOTS = 64
+# Placeholders: quoted slot i -> one private-use character, number slot i -> i in Arabic-Indic digits (still \d)
+_QUOTED_SLOT_BASE = 0xE000
+_NUMBER_SLOT_DIGITS = str.maketrans("0123456789", "\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669")
+_PLACEHOLDER = re.compile("[\ue000-\uf8ff]|[\u0660-\u0669]+")
+# Slot shape: character classes the patterns distinguish (case kept for lowered fields), runs collapsed
+_SHAPE_CLASSES = str.maketrans(
+    string.ascii_lowercase + string.ascii_uppercase + string.digits + string.whitespace,
+    "a" * 26 + "A" * 26 + "9" * 10 + " " * len(string.whitespace),
+)
+_SHAPE_RUNS = re.compile(r"([aA9 ])\1+")
+# A slot containing any keyword, trigger or leading pattern literal could change the parse - never re-bound
+SLOT_GUARD_WORDS = frozenset(
+    LOGIN_WORDS + FORM_WORDS + SEARCH_WORDS + MODIFY_WORDS + CLICK_WORDS + TYPE_WORDS + COMMENT_WORDS
+    + SCROLL_WORDS + EXTRACT_WORDS + MULTISTEP_WORDS + BOOKING_PHRASES + JOB_APPLY_PHRASES
+    + JOB_VIEW_PHRASES + JOB_SEARCH_PHRASES
+    + tuple(trigger for bank in CREDENTIAL_PATTERNS.values() for trigger, _ in bank)
+    + tuple(trigger for bank in (EMAIL_FALLBACK_PATTERNS, URL_PATTERNS, TEXT_PATTERNS, TARGET_PATTERNS,
+                                 JOB_TITLE_PATTERNS, COMPANY_PATTERNS) for trigger, _ in bank)
+    + tuple(trigger for _, trigger, _ in NEGATIVE_PATTERNS + BOOKING_FILTER_PATTERNS)
+    + tuple(phrase for phrase, _ in COMMON_TARGETS)
+    + ("not", "doe", "job", "title", "location", "query", "consultation", "web_agent_id")
+)
+_SLOT_GUARD = re.compile("|".join(re.escape(word) for word in sorted(SLOT_GUARD_WORDS, key=len, reverse=True)))
+
+
+def _first_group(bank, text: str, prompt_lower: str, prefilter: bool) -> Optional[str]:
+    """group(1) of the first pattern in the bank that matches (triggers checked when prefilter)"""
+    for trigger, pattern in bank:
+        if prefilter and trigger not in prompt_lower:
+            continue
+        match = pattern.search(text)
+        if match:
+            return match.group(1)
+    return None
 
 
 class TaskParser:
     """Parse and extract information from task prompts"""
-    
+
     def __init__(self):
-        # Common patterns for extraction
+        # Common patterns for extraction (compiled banks are module-level)
         self.credential_patterns = {
-            "username": [
-                r"username[:\s]+([^\s<]+)",
-                r"user[:\s]+([^\s<]+)",
-                r"login[:\s]+([^\s<]+)",
-            ],
-            "password": [
-                r"password[:\s]+([^\s<]+)",
-                r"pass[:\s]+([^\s<]+)",
-            ],
-            "email": [
-                r"email[:\s]+([^\s@]+@[^\s@]+\.[^\s@]+)",
-                r"e-mail[:\s]+([^\s@]+@[^\s@]+\.[^\s@]+)",
-            ],
+            field: [pattern.pattern for _, pattern in bank] for field, bank in CREDENTIAL_PATTERNS.items()
         }
-        
-        self.url_patterns = [
-            r"https?://[^\s]+",
-            r"www\.[^\s]+",
-            r"navigate to ([^\s]+)",
-            r"go to ([^\s]+)",
-        ]
-        
-        self.text_patterns = [
-            r"type ['\"]([^'\"]+)['\"]",
-            r"enter ['\"]([^'\"]+)['\"]",
-            r"fill with ['\"]([^'\"]+)['\"]",
-            r"contains the word ['\"]([^'\"]+)['\"]",
-            r"contains ['\"]([^'\"]+)['\"]",
-        ]
-    
+        self.url_patterns = [pattern.pattern for _, pattern in URL_PATTERNS]
+        self.text_patterns = [pattern.pattern for _, pattern in TEXT_PATTERNS]
+        # Shared prompt template cache (None if disabled)
+        self.template_cache = get_template_cache()
+
     def extract_credentials(self, prompt: str) -> Dict[str, Optional[str]]:
         """Extract credentials from prompt - Enhanced with more patterns"""
-        prompt_lower = prompt.lower()
+        return self._extract_credentials(prompt, prompt.lower(), prompt.isascii())
+
+    def _extract_credentials(self, prompt: str, prompt_lower: str, prefilter: bool) -> Dict[str, Optional[str]]:
         credentials = {}
-        
-        # Enhanced patterns for better extraction
-        enhanced_patterns = {
-            "username": [
-                r"username[:\s=]+([^\s<,]+)",
-                r"user[:\s=]+([^\s<,]+)",
-                r"login[:\s=]+([^\s<,]+)",
-                r"user\s+name[:\s=]+([^\s<,]+)",
-                r"uname[:\s=]+([^\s<,]+)",
-            ],
-            "password": [
-                r"password[:\s=]+([^\s<,]+)",
-                r"pass[:\s=]+([^\s<,]+)",
-                r"pwd[:\s=]+([^\s<,]+)",
-            ],
-            "email": [
-                r"email[:\s=]+([^\s<,]+@[^\s<,]+)",
-                r"e-mail[:\s=]+([^\s<,]+@[^\s<,]+)",
-                r"mail[:\s=]+([^\s<,]+@[^\s<,]+)",
-            ],
-        }
-        
-        for cred_type, patterns in enhanced_patterns.items():
-            for pattern in patterns:
-                match = re.search(pattern, prompt_lower, re.IGNORECASE)
+
+        for cred_type, bank in CREDENTIAL_PATTERNS.items():
+            for trigger, pattern in bank:
+                if prefilter and trigger not in prompt_lower:
+                    continue
+                match = pattern.search(prompt_lower)
                 if match:
                     value = match.group(1)
                     # Clean up common placeholders and separators
@@ -78,106 +227,80 @@ class TaskParser:
                     if value and len(value) > 0:
                         credentials[cred_type] = value
                         break
-        
+
         # CRITICAL FIX: Also try extracting email from the original prompt (case-sensitive)
         # The email pattern might fail if quotes are in the way
         if not credentials.get("email"):
-            email_patterns = [
-                r"email:\s*['\"]([^'\"]+@[^'\"]+)['\"]",
-                r"email:\s*([^\s,]+@[^\s,]+)",
-                r"email\s+['\"]([^'\"]+@[^'\"]+)['\"]",
-            ]
-            for pattern in email_patterns:
-                match = re.search(pattern, prompt, re.IGNORECASE)
+            for trigger, pattern in EMAIL_FALLBACK_PATTERNS:
+                if prefilter and trigger not in prompt_lower:
+                    continue
+                match = pattern.search(prompt)
                 if match:
                     email = match.group(1).replace("<web_agent_id>", "").strip("'\"")
                     if email and "@" in email:
                         credentials["email"] = email
                         break
-        
+
         return credentials
-    
+
     def extract_url(self, prompt: str, default_url: str = "") -> str:
         """Extract URL from prompt"""
+        return self._extract_url(prompt, prompt.lower(), prompt.isascii(), default_url)
+
+    def _extract_url(self, prompt: str, prompt_lower: str, prefilter: bool, default_url: str) -> str:
         # CRITICAL: Ensure default_url is a string (not a dict)
         if default_url is None:
             default_url = ""
         elif isinstance(default_url, dict):
-            default_url = default_url.get("url", default_url.get("href", "")) if isinstance(default_url, dict) else str(default_url)
+            default_url = default_url.get("url", default_url.get("href", ""))
         elif not isinstance(default_url, str):
             default_url = str(default_url) if default_url else ""
-        
-        for pattern in self.url_patterns:
-            match = re.search(pattern, prompt, re.IGNORECASE)
+
+        for trigger, pattern in URL_PATTERNS:
+            if prefilter and trigger not in prompt_lower:
+                continue
+            match = pattern.search(prompt)
             if match:
                 url = match.group(1) if match.groups() else match.group(0)
-                # Ensure url is a string before calling startswith
-                if not isinstance(url, str):
-                    url = str(url) if url else ""
                 # Ensure protocol
-                if url and isinstance(url, str) and not url.startswith(("http://", "https://")):
+                if url and not url.startswith(("http://", "https://")):
                     url = "https://" + url
                 return url
-        
+
         return default_url
-    
+
     def extract_text_to_type(self, prompt: str) -> Optional[str]:
         """Extract text that needs to be typed"""
-        for pattern in self.text_patterns:
-            match = re.search(pattern, prompt, re.IGNORECASE)
-            if match:
-                return match.group(1)
-        
-        return None
-    
+        return _first_group(TEXT_PATTERNS, prompt, prompt.lower(), prompt.isascii())
+
     def extract_target_element(self, prompt: str) -> Optional[str]:
         """Extract target element description - Enhanced patterns"""
-        prompt_lower = prompt.lower()
-        
-        # Enhanced patterns for better extraction
-        patterns = [
-            r"click (?:the |a |on )?([^,\.]+?)(?: button|link|element|tab|option)?",
-            r"select (?:the |a )?([^,\.]+?)(?: button|link|element|option|view)?",
-            r"choose (?:the |a )?([^,\.]+?)(?: button|link|element|option)?",
-            r"find (?:the |a )?([^,\.]+?)(?: button|link|element)?",
-            r"switch (?:to |the )?([^,\.]+?)(?: view|mode|tab)?",
-            r"toggle (?:the |to )?([^,\.]+?)(?: view|mode)?",
-            r"view (?:the |a )?([^,\.]+?)(?: view|mode)?",
-            r"change (?:to |the )?([^,\.]+?)(?: view|mode)?",
-            r"open (?:the |a )?([^,\.]+?)(?: button|link|tab)?",
-            r"press (?:the |a )?([^,\.]+?)(?: button|key)?",
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, prompt_lower)
+        return self._extract_target_element(prompt.lower())
+
+    def _extract_target_element(self, prompt_lower: str) -> Optional[str]:
+        for trigger, pattern in TARGET_PATTERNS:
+            if trigger not in prompt_lower:
+                continue
+            match = pattern.search(prompt_lower)
             if match:
                 target = match.group(1).strip()
                 # Remove common words
-                target = re.sub(r"\b(the|a|an|on|in|at|to|for|with|from)\b", "", target).strip()
+                target = TARGET_FILLER_WORDS.sub("", target).strip()
                 if target and len(target) > 1:
                     return target
-        
+
         # Try to extract from common phrases
-        common_targets = {
-            "month view": "month",
-            "week view": "week",
-            "day view": "day",
-            "year view": "year",
-            "login button": "login",
-            "submit button": "submit",
-            "search button": "search",
-            "profile": "profile",
-            "settings": "settings",
-        }
-        
-        for phrase, target in common_targets.items():
+        for phrase, target in COMMON_TARGETS:
             if phrase in prompt_lower:
                 return target
-        
+
         return None
-    
+
     def extract_negative_constraints(self, prompt: str) -> Dict[str, List[str]]:
         """Extract negative constraints like 'NOT contain', 'does NOT contain', 'NOT equal'"""
+        return self._extract_negative_constraints(prompt, prompt.lower(), prompt.isascii())
+
+    def _extract_negative_constraints(self, prompt: str, prompt_lower: str, prefilter: bool) -> Dict[str, List[str]]:
         constraints = {
             "exclude_text": [],
             "exclude_location": [],
@@ -185,35 +308,27 @@ class TaskParser:
             "exclude_company": [],
             "exclude_job_title": [],
         }
-        
-        # Pattern: "does NOT contain 'text'"
-        not_contains = re.findall(r"does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_text"].extend(not_contains)
-        
-        # Pattern: "NOT contain 'text'"
-        not_contains2 = re.findall(r"NOT\s+contain\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_text"].extend(not_contains2)
-        
-        # Pattern: "NOT equal to 'value'"
-        not_equal = re.findall(r"NOT\s+equal\s+to\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_text"].extend(not_equal)
-        
-        # Pattern: "location does NOT contain"
-        location_not = re.findall(r"location\s+does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_location"].extend(location_not)
-        
-        # Pattern: "company does NOT contain"
-        company_not = re.findall(r"company\s+does?\s+NOT\s+contain\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_company"].extend(company_not)
-        
-        # Pattern: "date is NOT equal to"
-        date_not = re.findall(r"date\s+is\s+NOT\s+equal\s+to\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        constraints["exclude_date"].extend(date_not)
-        
+        if prefilter and "not" not in prompt_lower:
+            return constraints
+
+        for field, trigger, pattern in NEGATIVE_PATTERNS:
+            if prefilter and trigger not in prompt_lower:
+                continue
+            constraints[field].extend(pattern.findall(prompt))
+
         return constraints
-    
+
     def extract_job_info(self, prompt: str) -> Dict[str, Any]:
         """Extract job-related information from prompt"""
+        return self._extract_job_info(prompt, prompt.lower(), prompt.isascii())
+
+    def _extract_job_info(
+        self,
+        prompt: str,
+        prompt_lower: str,
+        prefilter: bool,
+        negative_constraints: Optional[Dict[str, List[str]]] = None
+    ) -> Dict[str, Any]:
         job_info = {
             "job_title": None,
             "company": None,
@@ -221,9 +336,7 @@ class TaskParser:
             "use_case": None,
             "constraints": {},
         }
-        
-        prompt_lower = prompt.lower()
-        
+
         # Detect use case
         if "apply_for_job" in prompt_lower or "apply for" in prompt_lower:
             job_info["use_case"] = "APPLY_FOR_JOB"
@@ -231,85 +344,63 @@ class TaskParser:
             job_info["use_case"] = "VIEW_JOB"
         elif "search_jobs" in prompt_lower or "search for jobs" in prompt_lower:
             job_info["use_case"] = "SEARCH_JOBS"
-        
-        # Extract job_title
-        # Pattern: "job_title is equal to 'X'"
-        job_title_match = re.search(r"job[_\s]?title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if job_title_match:
-            job_info["job_title"] = job_title_match.group(1)
-        
-        # Pattern: "job title is equal to 'X'"
-        job_title_match2 = re.search(r"job\s+title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if job_title_match2:
-            job_info["job_title"] = job_title_match2.group(1)
-        
-        # Pattern: "title is equal to 'X'"
-        title_match = re.search(r"title\s+is\s+equal\s+to\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if title_match and not job_info["job_title"]:
-            job_info["job_title"] = title_match.group(1)
-        
-        # Extract company
-        # Pattern: "company that contains 'X'"
-        company_match = re.search(r"company\s+(?:that\s+)?contains\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if company_match:
-            job_info["company"] = company_match.group(1)
-        
-        # Pattern: "company name contains 'X'"
-        company_match2 = re.search(r"company\s+name\s+contains\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if company_match2:
-            job_info["company"] = company_match2.group(1)
-        
-        # Extract location
-        # Pattern: "location does NOT contain 'X'"
-        location_match = re.search(r"location\s+(?:does\s+NOT\s+contain|contains)\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if location_match:
-            job_info["location"] = location_match.group(1)
-        
-        # Extract search query
-        # Pattern: "query that does NOT contain 'X'"
-        query_match = re.search(r"query\s+(?:that\s+)?(?:does\s+NOT\s+contain|contains)\s+['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if query_match:
-            job_info["search_query"] = query_match.group(1)
-        
+
+        # Extract job_title ("job_title is equal to 'X'", then "job title is equal to 'X'", then "title is equal to 'X'")
+        if not prefilter or "title" in prompt_lower:
+            for _, pattern in JOB_TITLE_PATTERNS:
+                match = pattern.search(prompt)
+                if match:
+                    job_info["job_title"] = match.group(1)
+            if not job_info["job_title"]:
+                match = TITLE_PATTERN.search(prompt)
+                if match:
+                    job_info["job_title"] = match.group(1)
+
+        # Extract company ("company that contains 'X'", then "company name contains 'X'")
+        if not prefilter or "company" in prompt_lower:
+            for _, pattern in COMPANY_PATTERNS:
+                match = pattern.search(prompt)
+                if match:
+                    job_info["company"] = match.group(1)
+
+        # Extract location ("location does NOT contain 'X'")
+        if not prefilter or "location" in prompt_lower:
+            match = LOCATION_PATTERN.search(prompt)
+            if match:
+                job_info["location"] = match.group(1)
+
+        # Extract search query ("query that does NOT contain 'X'")
+        if not prefilter or "query" in prompt_lower:
+            match = QUERY_PATTERN.search(prompt)
+            if match:
+                job_info["search_query"] = match.group(1)
+
         # Extract negative constraints
-        job_info["constraints"] = self.extract_negative_constraints(prompt)
-        
+        if negative_constraints is None:
+            negative_constraints = self._extract_negative_constraints(prompt, prompt_lower, prefilter)
+        job_info["constraints"] = negative_constraints
+
         return job_info
-    
+
     def extract_booking_info(self, prompt: str) -> Dict[str, Any]:
         """Extract booking/consultation information from prompt"""
+        return self._extract_booking_info(prompt, prompt.lower(), prompt.isascii())
+
+    def _extract_booking_info(self, prompt: str, prompt_lower: str, prefilter: bool) -> Dict[str, Any]:
         booking_info = {
             "filters": {},
             "use_case": "BOOK_A_CONSULTATION",
         }
-        
-        # Extract name contains
-        name_match = re.search(r"name contains ['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if name_match:
-            booking_info["filters"]["name_contains"] = name_match.group(1)
-        
-        # Extract rate does not contain
-        rate_match = re.search(r"rate does not contain ['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if rate_match:
-            booking_info["filters"]["rate_not_contains"] = rate_match.group(1)
-        
-        # Extract role is not equal to
-        role_match = re.search(r"role is not equal to ['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if role_match:
-            booking_info["filters"]["role_not_equal"] = role_match.group(1)
-        
-        # Extract country is not equal to
-        country_match = re.search(r"country is not equal to ['\"]([^'\"]+)['\"]", prompt, re.IGNORECASE)
-        if country_match:
-            booking_info["filters"]["country_not_equal"] = country_match.group(1)
-        
-        # Extract rating equals
-        rating_match = re.search(r"rating equals ([\d.]+)", prompt, re.IGNORECASE)
-        if rating_match:
-            booking_info["filters"]["rating_equals"] = rating_match.group(1)
-        
+
+        for name, trigger, pattern in BOOKING_FILTER_PATTERNS:
+            if prefilter and trigger not in prompt_lower:
+                continue
+            match = pattern.search(prompt)
+            if match:
+                booking_info["filters"][name] = match.group(1)
+
         return booking_info
-    
+
     def parse_task(self, prompt: str, url: str = "") -> Dict[str, Any]:
         """Parse task and extract all relevant information - Enhanced"""
         # CRITICAL: Ensure url is always a string (not a dict)
@@ -317,34 +408,41 @@ class TaskParser:
         if url is None:
             url = ""
         elif isinstance(url, dict):
-            url = url.get("url", url.get("href", "")) if isinstance(url, dict) else str(url)
+            url = url.get("url", url.get("href", ""))
         elif not isinstance(url, str):
             url = str(url) if url else ""
-        
+
+        if self.template_cache is not None:
+            return self.template_cache.parse(prompt, url, self._parse_task)
+        return self._parse_task(prompt, url)
+
+    def _parse_task(self, prompt: str, url: str) -> Dict[str, Any]:
+        # Lowered once and shared by every extractor (triggers only trusted for ASCII prompts)
         prompt_lower = prompt.lower()
-        
+        prefilter = prompt.isascii()
+
         # Enhanced task type detection
-        has_login = any(word in prompt_lower for word in ["login", "sign in", "log in", "authenticate"])
-        has_form = any(word in prompt_lower for word in ["form", "fill", "submit", "enter", "register"])
-        has_search = any(word in prompt_lower for word in ["search", "find", "look for", "seek"])
-        has_modify = any(word in prompt_lower for word in ["modify", "edit", "change", "update", "delete", "remove"])
-        has_click = any(word in prompt_lower for word in ["click", "select", "choose", "switch", "toggle", "view"])
-        has_type = any(word in prompt_lower for word in ["type", "enter", "input", "write"])
-        has_comment = any(word in prompt_lower for word in ["comment", "post", "reply", "write a comment"])
-        has_scroll = any(word in prompt_lower for word in ["scroll", "move down", "move up"])
-        has_extract = any(word in prompt_lower for word in ["extract", "get", "read", "retrieve", "fetch"])
-        has_multistep = any(word in prompt_lower for word in ["and", "then", "after", "before", "first", "next"])
-        
+        has_login = any(word in prompt_lower for word in LOGIN_WORDS)
+        has_form = any(word in prompt_lower for word in FORM_WORDS)
+        has_search = any(word in prompt_lower for word in SEARCH_WORDS)
+        has_modify = any(word in prompt_lower for word in MODIFY_WORDS)
+        has_click = any(word in prompt_lower for word in CLICK_WORDS)
+        has_type = any(word in prompt_lower for word in TYPE_WORDS)
+        has_comment = any(word in prompt_lower for word in COMMENT_WORDS)
+        has_scroll = any(word in prompt_lower for word in SCROLL_WORDS)
+        has_extract = any(word in prompt_lower for word in EXTRACT_WORDS)
+        has_multistep = any(word in prompt_lower for word in MULTISTEP_WORDS)
+
         # Booking/Consultation task detection (HIGH PRIORITY)
-        has_booking = any(phrase in prompt_lower for phrase in ["book a consultation", "book consultation", "book a", "booking"])
+        has_booking = any(phrase in prompt_lower for phrase in BOOKING_PHRASES)
         has_consultation = "consultation" in prompt_lower
-        
+
         # Job-related task detection (HIGH PRIORITY)
-        has_job_apply = any(phrase in prompt_lower for phrase in ["apply for", "apply_for_job", "apply to job"])
-        has_job_view = any(phrase in prompt_lower for phrase in ["view job", "view_job", "retrieve details", "job posting", "job details"])
-        has_job_search = any(phrase in prompt_lower for phrase in ["search jobs", "search_jobs", "search for jobs", "find jobs"])
+        has_job_apply = any(phrase in prompt_lower for phrase in JOB_APPLY_PHRASES)
+        has_job_view = any(phrase in prompt_lower for phrase in JOB_VIEW_PHRASES)
+        has_job_search = any(phrase in prompt_lower for phrase in JOB_SEARCH_PHRASES)
         has_job = has_job_apply or has_job_view or has_job_search or "job" in prompt_lower
-        
+
         # Determine task type with priority (booking and job tasks have high priority)
         if has_booking or has_consultation:
             task_type = "booking"
@@ -376,26 +474,29 @@ class TaskParser:
             task_type = "multistep"
         else:
             task_type = "generic"
-        
+
         # Extract booking information if booking-related
         booking_info = {}
         if has_booking or has_consultation:
-            booking_info = self.extract_booking_info(prompt)
-        
+            booking_info = self._extract_booking_info(prompt, prompt_lower, prefilter)
+
+        # Extract negative constraints (scanned once, shared with job_info as a copy)
+        negative_constraints = self._extract_negative_constraints(prompt, prompt_lower, prefilter)
+
         # Extract job information if job-related
         job_info = {}
         if has_job:
-            job_info = self.extract_job_info(prompt)
-        
-        # Extract negative constraints
-        negative_constraints = self.extract_negative_constraints(prompt)
-        
+            job_info = self._extract_job_info(
+                prompt, prompt_lower, prefilter,
+                negative_constraints={field: list(values) for field, values in negative_constraints.items()}
+            )
+
         parsed = {
             "original_prompt": prompt,
-            "url": self.extract_url(prompt, url),
-            "credentials": self.extract_credentials(prompt),
-            "text_to_type": self.extract_text_to_type(prompt),
-            "target_element": self.extract_target_element(prompt),
+            "url": self._extract_url(prompt, prompt_lower, prefilter, url),
+            "credentials": self._extract_credentials(prompt, prompt_lower, prefilter),
+            "text_to_type": _first_group(TEXT_PATTERNS, prompt, prompt_lower, prefilter),
+            "target_element": self._extract_target_element(prompt_lower),
             "has_login": has_login,
             "has_form": has_form,
             "has_search": has_search,
@@ -416,6 +517,229 @@ class TaskParser:
             "job_info": job_info,
             "negative_constraints": negative_constraints,
         }
-        
+
+        return parsed
+
+
+@lru_cache(maxsize=4096)
+def _slot_shape(value: str) -> Optional[str]:
+    """Shape of a quoted slot value (None if it contains a guarded word and must stay in the template)"""
+    if _SLOT_GUARD.search(value.lower()):
+        return None
+    return _SHAPE_RUNS.sub(r"\1", value.translate(_SHAPE_CLASSES))
+
+
+def split_prompt_template(prompt: str) -> Optional[Tuple[str, Tuple[str, ...], Tuple[str, ...]]]:
+    """
+    Split a prompt into its template and slot values
+
+    Quoted literals containing a guarded word are kept in the template as-is.
+
+    Returns:
+        (template with slot placeholders, slot values, slot shapes) - None for
+        prompts that are never re-bound (non-ASCII, more than MAX_SLOTS slots)
+    """
+    if not prompt.isascii():
+        return None
+    pieces = []
+    slots = []
+    shapes = []
+    last = 0
+    for match in SLOT_PATTERN.finditer(prompt):
+        value = match.group(3)
+        if value is None:
+            value = match.group(1) or match.group(2)
+            shape = _slot_shape(value)
+            if shape is None:
+                continue
+            placeholder = chr(_QUOTED_SLOT_BASE + len(slots))
+            placeholder = prompt[match.start()] + placeholder + prompt[match.start()]
+        else:
+            shape = "9.9" if "." in value else "9"
+            placeholder = str(len(slots)).translate(_NUMBER_SLOT_DIGITS)
+        if len(slots) == MAX_SLOTS:
+            return None
+        pieces.append(prompt[last:match.start()])
+        pieces.append(placeholder)
+        slots.append(value)
+        shapes.append(shape)
+        last = match.end()
+    pieces.append(prompt[last:])
+    return "".join(pieces), tuple(slots), tuple(shapes)
+
+
+def _slot_parts(template_value: str) -> Any:
+    """Template string -> slot index (whole value is one slot) or tuple of literal pieces and slot indexes"""
+    parts = []
+    last = 0
+    for match in _PLACEHOLDER.finditer(template_value):
+        if match.start() > last:
+            parts.append(template_value[last:match.start()])
+        placeholder = match.group(0)
+        parts.append(ord(placeholder) - _QUOTED_SLOT_BASE if placeholder >= "\ue000" else int(placeholder))
+        last = match.end()
+    if last < len(template_value):
+        parts.append(template_value[last:])
+    return parts[0] if len(parts) == 1 else tuple(parts)
+
+
+def _bind_parts(parts: Any, slots: Tuple[str, ...]) -> str:
+    if type(parts) is int:
+        return slots[parts]
+    return "".join([slots[part] if type(part) is int else part for part in parts])
+
+
+def _placeholder_values(node: Any, path: Tuple[Any, ...] = ()):
+    """(path, string) for every string in a parse that contains a placeholder"""
+    if isinstance(node, dict):
+        items = node.items()
+    elif isinstance(node, list):
+        items = enumerate(node)
+    else:
+        if isinstance(node, str) and _PLACEHOLDER.search(node):
+            yield path, node
+        return
+    for key, value in items:
+        yield from _placeholder_values(value, path + (key,))
+
+
+class TemplateParse:
+    """A template's parse plus where each slot value is re-bound into it"""
+
+    __slots__ = ("skeleton", "bindings")
+
+    def __init__(self, skeleton: bytes, bindings: Tuple[Tuple[Tuple[Any, ...], Any, bool], ...]):
+        self.skeleton = skeleton  # marshalled template parse (loads = fast deep copy)
+        self.bindings = bindings  # (path, parts, lowered) - original_prompt excluded
+
+    @classmethod
+    def build(cls, template_parsed: Dict[str, Any], parsed: Dict[str, Any],
+              slots: Tuple[str, ...]) -> Optional["TemplateParse"]:
+        """Bindings that turn template_parsed into parsed, or None if re-binding cannot reproduce it"""
+        lowered_slots = tuple(slot.lower() for slot in slots)
+        bindings = []
+        for path, template_value in _placeholder_values(template_parsed):
+            if path == ("original_prompt",):
+                continue
+            parts = _slot_parts(template_value)
+            if any(type(part) is int and part >= len(slots) for part in (parts if type(parts) is tuple else (parts,))):
+                return None
+            try:
+                expected = parsed
+                for key in path:
+                    expected = expected[key]
+            except (KeyError, IndexError, TypeError):
+                return None
+            # Lowered fields (credentials, target element) come from prompt.lower()
+            if _bind_parts(parts, slots) == expected:
+                bindings.append((path, parts, False))
+            elif _bind_parts(parts, lowered_slots) == expected:
+                bindings.append((path, parts, True))
+            else:
+                return None
+        entry = cls(marshal.dumps(template_parsed), tuple(bindings))
+        return entry if entry.bind(parsed["original_prompt"], slots) == parsed else None
+
+    def bind(self, prompt: str, slots: Tuple[str, ...]) -> Dict[str, Any]:
+        """Fresh parse of prompt with the slot values re-bound"""
+        parsed = marshal.loads(self.skeleton)
+        parsed["original_prompt"] = prompt
+        lowered_slots = None
+        for path, parts, lowered in self.bindings:
+            if lowered and lowered_slots is None:
+                lowered_slots = tuple(slot.lower() for slot in slots)
+            node = parsed
+            for key in path[:-1]:
+                node = node[key]
+            node[path[-1]] = _bind_parts(parts, lowered_slots if lowered else slots)
         return parsed
 
+
+_MISSING = object()
+
+TemplateKey = Tuple[str, Tuple[str, ...], str]
+
+
+class PromptTemplateCache:
+    """In-process LRU of parses per prompt template (template, slot shapes, url)"""
+
+    def __init__(self, max_entries: int = 2048):
+        self.max_entries = max(1, int(max_entries))
+        # None marks a template that re-binding cannot reproduce (always parsed in full)
+        self._entries: "OrderedDict[TemplateKey, Optional[TemplateParse]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.uncacheable = 0
+        self.evictions = 0
+
+    def parse(self, prompt: str, url: str, parse_fn: Callable[[str, str], Dict[str, Any]]) -> Dict[str, Any]:
+        """parse_fn(prompt, url), served from the template's cached parse when possible"""
+        split = split_prompt_template(prompt)
+        if split is None:
+            self.bypassed += 1
+            return parse_fn(prompt, url)
+        template, slots, shapes = split
+        key = (template, shapes, url)
+        with self._lock:
+            entry = self._entries.get(key, _MISSING)
+            if entry is not _MISSING:
+                self._entries.move_to_end(key)
+        if entry is None:
+            self.bypassed += 1
+            return parse_fn(prompt, url)
+        if entry is not _MISSING:
+            self.hits += 1
+            return entry.bind(prompt, slots)
+
+        self.misses += 1
+        parsed = parse_fn(prompt, url)
+        entry = TemplateParse.build(parse_fn(template, url), parsed, slots) if slots else \
+            TemplateParse(marshal.dumps(parsed), ())
+        if entry is None:
+            self.uncacheable += 1
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return parsed
+
+    def clear(self):
+        """Drop all entries (counters are kept)"""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache counters"""
+        lookups = self.hits + self.misses + self.bypassed
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "bypassed": self.bypassed,
+            "uncacheable": self.uncacheable,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+# Global prompt template cache instance
+_template_cache: Optional[PromptTemplateCache] = None
+
+
+def get_template_cache() -> Optional[PromptTemplateCache]:
+    """Get or create the global prompt template cache (None if disabled)"""
+    global _template_cache
+    from config.settings import settings
+    if not getattr(settings, 'parse_cache_enabled', True):
+        return None
+    if _template_cache is None:
+        _template_cache = PromptTemplateCache(max_entries=settings.parse_cache_max_entries)
+    return _template_cache
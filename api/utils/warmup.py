@@ -0,0 +1,180 @@
+"""
+Startup warmup for a freshly (re)started miner
+
+Runs once from the server lifespan hook, in the background so the server
+accepts requests immediately:
+
+1. Compiles the regex tables by pushing one representative prompt per demo
+   site through TaskParser and the ActionGenerator handlers (no live fetch),
+   and builds the element vectorizer used by DOM candidate scoring.
+2. Visits every demo-site entry URL concurrently through BrowserAnalyzer so
+   the page pool is exercised and the snapshot cache is populated, then scores
+   each page's elements and records their roles in the selector map as
+   provisional entries: they stand in only while live analysis is degraded
+   off, so the first real request on a page still runs prompt-scored analysis.
+
+Progress and readiness are reported by /health.
+"""
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+
+from .metrics import begin_request
+from .task_context import SITE_URLS, TaskContext
+
+logger = logging.getLogger(__name__)
+
+# One representative prompt per demo site (exercises the main handler families)
+WARMUP_PROMPTS = (
+    "Search for books in the genre 'Horror' and show details of the first book",
+    "Book a consultation whose name contains 'Alex'",
+    "Add the movie 'Inception' to my watchlist",
+    "Click the month view button and add an event for tomorrow",
+    "Add 'Margherita Pizza' to the cart and proceed to checkout",
+    "Reserve a room for 2 guests at a lodge in Paris",
+    "Login where username equals 'user' and password equals 'PASSWORD'",
+    "Register with username: user email: user@gmail.com password: Passw0rd!",
+    "Fill the contact form with name 'John' and message 'Hello'",
+    "Scroll down and take a screenshot",
+)
+
+# (task_type, intent) pairs covering each candidate scoring rule (login fields, typeable fields, buttons)
+WARMUP_ROLE_INTENTS = (
+    ("login", "login with username and password"),
+    ("form", "fill the form fields"),
+    ("click", "click the search or submit button"),
+)
+
+_state: Dict[str, Any] = {
+    "status": "pending",  # pending -> running -> ready (or failed / skipped)
+    "started_at": None,
+    "duration_seconds": None,
+    "regex_seconds": None,
+    "sites": {},
+    "selector_roles": {},
+}
+
+
+def default_warmup_urls() -> List[str]:
+    """Entry URLs of the known Autoppia demo sites"""
+    return [site_url for _, site_url in SITE_URLS]
+
+
+def get_warmup_state() -> Dict[str, Any]:
+    """Snapshot of warmup progress for /health"""
+    state = dict(_state)
+    state["sites"] = dict(_state["sites"])
+    state["selector_roles"] = dict(_state["selector_roles"])
+    state["ready"] = _state["status"] in ("ready", "skipped", "failed")
+    return state
+
+
+async def _warm_regex_tables():
+    """Run representative prompts through the parser and handlers (compiles every pattern used)"""
+    from ..actions.generator import ActionGenerator
+    generator = ActionGenerator()
+    for prompt in WARMUP_PROMPTS:
+        context = TaskContext.build(prompt, "")
+        await generator.generate(prompt, "", task_id="warmup", task_context=context)
+
+
+def _warm_element_scorer():
+    """Create the shared vectorizer and score one tiny page (imports scikit-learn/numpy up front)"""
+    from .page_elements import build_element_index, score_elements
+    elements = [{"type": "button", "tag": "button", "text": "Submit", "selector": "button"}]
+    score_elements({"elements": elements, "index": build_element_index(elements)}, WARMUP_PROMPTS[0], "click")
+
+
+def _map_site_roles(analyzer, url: str, page_data: Dict[str, Any]) -> List[str]:
+    """Score a warmed page with the warmup intents and record its roles as provisional map entries (sorted role names)"""
+    from .selector_map import get_selector_map, semantic_role
+    selector_map = get_selector_map()
+    if selector_map is None:
+        return []
+    candidates = []
+    for task_type, intent in WARMUP_ROLE_INTENTS:
+        candidates.extend(analyzer.analyze_dom(page_data, intent, task_type) or [])
+    selector_map.record(url, candidates, provisional=True)
+    return sorted({semantic_role(candidate) for candidate in candidates if isinstance(candidate.get("selector"), dict)})
+
+
+async def _warm_site(analyzer, url: str, timeout: float, semaphore: asyncio.Semaphore) -> str:
+    async with semaphore:
+        start = time.perf_counter()
+        try:
+            page_data = await asyncio.wait_for(analyzer.fetch_page(url, timeout=timeout), timeout=timeout + 0.5)
+        except asyncio.TimeoutError:
+            return "timeout"
+        except Exception as e:
+            logger.debug(f"Warmup fetch failed for {url}: {e}")
+            return "failed"
+        if not page_data:
+            return "failed"
+        try:
+            roles = await asyncio.to_thread(_map_site_roles, analyzer, url, page_data)
+        except Exception as e:
+            logger.debug(f"Warmup selector mapping failed for {url}: {e}")
+            roles = []
+        _state["selector_roles"][url] = roles
+        logger.info(f"🔥 Warmed {url}: {len(page_data.get('elements', []))} elements, "
+                    f"{len(roles)} selector roles in {time.perf_counter() - start:.2f}s")
+        return "ok"
+
+
+async def _warm_sites(urls: List[str], concurrency: int, timeout: float):
+    from config.settings import settings
+    if not settings.enable_browser_automation:
+        for url in urls:
+            _state["sites"][url] = "skipped"
+        return
+    try:
+        from .browser_analyzer import get_browser_analyzer
+    except ImportError:
+        for url in urls:
+            _state["sites"][url] = "skipped"  # Playwright not installed
+        return
+    analyzer = await get_browser_analyzer()
+    if analyzer is None:
+        for url in urls:
+            _state["sites"][url] = "failed"
+        return
+    semaphore = asyncio.Semaphore(max(1, concurrency))
+    results = await asyncio.gather(*(_warm_site(analyzer, url, timeout, semaphore) for url in urls))
+    _state["sites"].update(zip(urls, results))
+
+    from .selector_map import get_selector_map
+    selector_map = get_selector_map()
+    if selector_map is not None:
+        await asyncio.to_thread(selector_map.save)
+
+
+async def run_warmup(urls: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Warm regex tables, site snapshots and the selector map; returns the final warmup state"""
+    from config.settings import settings
+    if not getattr(settings, 'warmup_enabled', True):
+        _state["status"] = "skipped"
+        return get_warmup_state()
+
+    urls = list(urls or settings.warmup_urls or default_warmup_urls())
+    begin_request()  # keep warmup stage timings out of the request histograms (never flushed)
+    _state.update(status="running", started_at=time.time(), sites={url: "pending" for url in urls}, selector_roles={})
+    start = time.perf_counter()
+    try:
+        await _warm_regex_tables()
+        await asyncio.to_thread(_warm_element_scorer)
+        _state["regex_seconds"] = round(time.perf_counter() - start, 3)
+        await _warm_sites(urls, settings.warmup_concurrency, settings.warmup_timeout)
+        _state["status"] = "ready"
+    except asyncio.CancelledError:
+        _state["status"] = "failed"
+        raise
+    except Exception as e:
+        logger.warning(f"⚠️ Warmup failed (non-critical): {e}")
+        _state["status"] = "failed"
+    finally:
+        _state["duration_seconds"] = round(time.perf_counter() - start, 3)
+
+    warmed = sum(1 for result in _state["sites"].values() if result == "ok")
+    logger.info(f"🔥 Warmup {_state['status']} in {_state['duration_seconds']}s ({warmed}/{len(urls)} sites warmed)")
+    return get_warmup_state()
@@ -1,12 +1,15 @@
 """Settings management using pydantic"""
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import List, Optional
 import os
 from dotenv import load_dotenv
 
 # Load .env file
 load_dotenv()
 
+# Relative data_dir values resolve against the project root, not the process CWD
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
 
 class Settings(BaseSettings):
     """Application settings"""
@@ -14,6 +17,7 @@ class Settings(BaseSettings):
     # API Configuration
     api_host: str = "0.0.0.0"
     api_port: int = 8080
+    data_dir: str = "data"  # Persisted artifacts (HAR files, selector map); relative = under the project root
     
     # Agent Configuration
     agent_type: str = "template"  # SIMPLIFIED: Use simple template agent
@@ -44,10 +48,64 @@ class Settings(BaseSettings):
     
     # Performance Optimization Settings
     fast_mode: bool = True  # Enable fast mode: optimize for speed while maintaining accuracy
+    static_analysis_enabled: bool = True  # Try plain HTTP + lxml before escalating to the browser
+    static_fetch_timeout: float = 2.0  # Timeout for the static HTML fetch (seconds)
     browser_fetch_timeout: float = 3.0  # Reduced from 5.0s - faster browser fetching
     dom_analysis_timeout: float = 1.5  # Reduced from 2.0s - faster DOM analysis
     enable_selector_caching: bool = True  # Cache common selectors for faster responses
     parallel_processing: bool = True  # Enable parallel processing where possible
+    browser_instances: int = 2  # Chromium processes (pages go to the least-loaded one)
+    page_pool_size: int = 4  # Prewarmed browser contexts/pages per instance (created at startup)
+    page_pool_lease_timeout: float = 2.0  # Max wait for a free pooled page (seconds)
+    browser_recycle_after_pages: int = 2000  # Replace a Chromium instance after this many pages (0 = never)
+    browser_recycle_rss_mb: float = 1536.0  # Replace an instance whose process tree RSS exceeds this (0 = never)
+    browser_watchdog_interval: float = 30.0  # Seconds between browser RSS samples
+    browser_drain_timeout: float = 30.0  # Max wait for in-flight pages before closing a recycled instance
+    resource_blocking: str = "cdp"  # "cdp" = browser-side URL blocklist, "route" = Python route handler (opt-in)
+    selector_map_enabled: bool = True  # Reuse selectors found by live analysis per (site, page, role)
+    selector_map_path: str = "selector_map.json"  # Persisted selector map, loaded at startup (relative = under data_dir)
+    selector_map_ttl: float = 86400.0  # Entries older than this are refreshed in the background (seconds)
+    selector_map_save_interval: float = 30.0  # Minimum seconds between selector map writes
+    browser_har_mode: str = "off"  # "record" saves navigations to HAR files, "replay" serves them offline
+    browser_har_dir: str = "har"  # Recorded HAR files, one per URL (relative = under data_dir)
+    snapshot_cache_enabled: bool = True  # Reuse fetched page elements per URL
+    snapshot_cache_max_entries: int = 256  # LRU size bound
+    snapshot_cache_ttl: float = 300.0  # Fresh lifetime of a page snapshot (seconds)
+    snapshot_cache_stale_seconds: float = 0.0  # Serve stale while refreshing for this long (0 = off)
+    
+    # Startup Warmup (regex tables + demo-site snapshots, reported on /health)
+    warmup_enabled: bool = True  # Warm caches in the background at startup
+    warmup_urls: List[str] = []  # Entry URLs to crawl (empty = the known Autoppia demo sites)
+    warmup_concurrency: int = 4  # Sites fetched at once
+    warmup_timeout: float = 10.0  # Per-site fetch timeout (seconds)
+    
+    # Hedged Generation (race heuristic-only vs browser-augmented plans)
+    hedged_generation: bool = False  # Opt-in: return the heuristic plan if live analysis is slow
+    hedge_budget_seconds: float = 1.5  # Max wait for the browser-augmented plan (set near the live path's p50)
+    
+    # Request Budget (end-to-end deadline for /solve_task, fallback included)
+    request_budget_seconds: float = 36.0  # No request may run longer than this (above the 30s fast-mode generation cap)
+    fallback_reserve_seconds: float = 5.0  # Kept back from generation/queueing so fallback actions can still run
+    
+    # Admission Control (bounded queue in front of generation + degradation ladder)
+    admission_max_concurrent: int = 16  # Generations running at once
+    admission_max_queue: int = 64  # Waiting requests before serving template plans only
+    degrade_queue_depths: List[int] = [4, 16, 48]  # Queue depth for levels 1/2/3
+    degrade_p95_seconds: List[float] = [8.0, 15.0, 25.0]  # p95 latency for levels 1/2/3
+    degrade_cooldown_seconds: float = 10.0  # Time below threshold before stepping back up
+    degrade_window_seconds: float = 60.0  # Latency window used for p95
+    
+    # Batch Endpoint (/solve_tasks)
+    batch_concurrency: int = 8  # Max tasks solved at once per batch request
+    
+    # Solve Cache Configuration (final IWA actions per normalized task)
+    solve_cache_enabled: bool = True  # Serve repeated task templates from memory
+    solve_cache_max_entries: int = 1024  # LRU size bound
+    solve_cache_ttl: float = 600.0  # Entry lifetime (seconds)
+    
+    # Prompt Template Cache (TaskParser.parse_task re-binds slot values into cached template parses)
+    parse_cache_enabled: bool = True  # Skip the pattern cascade for repeated prompt templates
+    parse_cache_max_entries: int = 2048  # LRU size bound (template shapes)
     
     class Config:
         env_file = ".env"
@@ -59,3 +117,8 @@ class Settings(BaseSettings):
 # Global settings instance
 settings = Settings()
 
+
+def data_path(path: str) -> str:
+    """Absolute location of a persisted artifact (relative paths live under settings.data_dir)"""
+    return os.path.join(PROJECT_ROOT, settings.data_dir, path)
+
@@ -6,7 +6,7 @@ import os
 import asyncio
 import argparse
 import time
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from dotenv import load_dotenv
 import bittensor as bt
 import httpx
@@ -15,6 +15,23 @@ from .protocol import StartRoundSynapse, TaskSynapse
 
 load_dotenv()
 
+# Site used for guaranteed minimal actions when a task carries no URL
+FALLBACK_URL = "https://autobooks.autoppia.com"
+
+
+def minimal_actions(url: str) -> List[Dict[str, Any]]:
+    """
+    Guaranteed minimal action sequence (navigate, wait, screenshot)
+
+    Same shape as api.actions.codec.minimal_actions - not imported here because
+    importing the api package loads the whole server at miner startup.
+    """
+    return [
+        {"type": "NavigateAction", "url": url},
+        {"type": "WaitAction", "timeSeconds": 1.0},
+        {"type": "ScreenshotAction"},
+    ]
+
 
 class AutoppiaMiner:
     def __init__(self, config: Optional[bt.config] = None):
@@ -216,32 +233,20 @@ class AutoppiaMiner:
                 if not synapse.actions or len(synapse.actions) == 0:
                     bt.logging.error(f"🚨 API returned empty actions after retry for task {task_id}")
                     # Generate minimal meaningful action sequence instead of just screenshot
-                    synapse.actions = [
-                        {"type": "NavigateAction", "url": url or "https://autobooks.autoppia.com"},
-                        {"type": "WaitAction", "time_seconds": 1.0},
-                        {"type": "ScreenshotAction"}
-                    ]
+                    synapse.actions = minimal_actions(url or FALLBACK_URL)
                 
                 bt.logging.info(f"Task {task_id} processed successfully, {len(synapse.actions)} actions generated")
             else:
                 # API error - try to generate meaningful actions based on prompt
                 bt.logging.warning(f"API returned status {response.status_code} for task {task_id}")
                 # Generate minimal meaningful action sequence instead of just screenshot
-                synapse.actions = [
-                    {"type": "NavigateAction", "url": url or "https://autobooks.autoppia.com"},
-                    {"type": "WaitAction", "time_seconds": 1.0},
-                    {"type": "ScreenshotAction"}
-                ]
+                synapse.actions = minimal_actions(url or FALLBACK_URL)
                 synapse.success = False
             
         except Exception as e:
             # Error occurred - generate minimal meaningful actions instead of just screenshot
             bt.logging.error(f"Error processing task: {e}")
-            synapse.actions = [
-                {"type": "NavigateAction", "url": url or "https://autobooks.autoppia.com"},
-                {"type": "WaitAction", "time_seconds": 1.0},
-                {"type": "ScreenshotAction"}
-            ]
+            synapse.actions = minimal_actions(url or FALLBACK_URL)
             synapse.success = False
             import traceback
             traceback.print_exc()
@@ -250,11 +255,7 @@ class AutoppiaMiner:
         if not synapse.actions or len(synapse.actions) == 0:
             bt.logging.error(f"🚨 CRITICAL: Actions is empty for task {task_id} after all processing")
             # Last resort: minimal meaningful action sequence
-            synapse.actions = [
-                {"type": "NavigateAction", "url": url or "https://autobooks.autoppia.com"},
-                {"type": "WaitAction", "time_seconds": 1.0},
-                {"type": "ScreenshotAction"}
-            ]
+            synapse.actions = minimal_actions(url or FALLBACK_URL)
         
         return synapse
     
@@ -497,11 +498,11 @@ class AutoppiaMiner:
                 success = getattr(result, 'success', False)
                 actions = getattr(result, 'actions', [])
                 
-                # Validate IWA format
+                # Validate IWA format (imported lazily: the api package loads the whole server)
                 validation_status = "⚠️ VALIDATOR_NOT_AVAILABLE"
                 try:
-                    from api.utils.iwa_validator import validate_iwa_action_sequence
-                    is_valid, errors = validate_iwa_action_sequence(actions)
+                    from api.actions.codec import validate_actions
+                    is_valid, errors = validate_actions(actions)
                     validation_status = "✅ VALID" if is_valid else f"❌ INVALID ({len(errors)} errors)"
                     
                     if not is_valid:
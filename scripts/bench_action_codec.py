@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Benchmark per-sequence action post-processing - legacy layers vs the action codec
+
+An action sequence passes three layers on its way to the response: the
+generator converts raw actions, the template agent converts them again, and
+the endpoint normalizes and then validates them. "Before" is a condensed
+copy of the legacy per-layer code (type_map rebuilt per call, separate
+normalize and validate loops; logging removed, work kept). "After" is
+api.actions.codec: encode_actions twice (the second pass hits the canonical
+fast path) and one encode_sequence (canonicalize + validate in one pass).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import logging
+import time
+from api.actions.codec import encode_actions, encode_sequence
+from api.actions.selectors import create_selector
+
+logging.disable(logging.CRITICAL)
+
+
+def _sample_actions(n_clicks: int):
+    """Generator-style plan: action_type keys, snake_case waits, interned + string selectors"""
+    actions = [{"action_type": "navigate", "url": "http://localhost:8001/"}]
+    for i in range(n_clicks):
+        actions.append({"action_type": "wait", "time_seconds": 1.0})
+        actions.append({"action_type": "click", "selector": create_selector("tagContainsSelector", f"Item {i}")})
+        actions.append({"action_type": "type", "text": f"value {i}", "selector": f"#field_{i}"})
+        actions.append({
+            "action_type": "click",
+            "selector": {"type": "xpathSelector", "value": f"//button[{i}]", "case_sensitive": False},
+        })
+    actions.append({"action_type": "screenshot"})
+    return actions
+
+
+def _legacy_convert(action):
+    action_type = action.get("type") or action.get("action_type", "")
+    if action_type:
+        action_type = action_type.replace("Action", "").lower()
+    type_map = {
+        "click": "ClickAction", "type": "TypeAction", "wait": "WaitAction", "navigate": "NavigateAction",
+        "goto": "NavigateAction", "screenshot": "ScreenshotAction", "scroll": "ScrollAction",
+    }
+    iwa_type = type_map.get(action_type, action.get("type", "ScreenshotAction"))
+    if iwa_type.endswith("Action") and iwa_type in ["ClickAction", "TypeAction", "WaitAction",
+                                                      "NavigateAction", "ScreenshotAction", "ScrollAction"]:
+        result = {"type": iwa_type}
+    else:
+        result = {"type": type_map.get(action_type, "ScreenshotAction")}
+    if "selector" in action and action["selector"]:
+        selector = action["selector"]
+        if isinstance(selector, dict):
+            cleaned = dict(selector)
+            if "case_sensitive" in cleaned:
+                cleaned["caseSensitive"] = cleaned.pop("case_sensitive")
+            if "caseSensitive" not in cleaned:
+                cleaned["caseSensitive"] = False
+            result["selector"] = cleaned
+        else:
+            selector_str = str(selector)
+            if selector_str.startswith("#"):
+                result["selector"] = {"type": "attributeValueSelector", "attribute": "id",
+                                      "value": selector_str[1:], "caseSensitive": False}
+            else:
+                result["selector"] = {"type": "tagContainsSelector", "value": selector_str, "caseSensitive": False}
+    if iwa_type == "WaitAction":
+        if "timeSeconds" in action:
+            result["timeSeconds"] = action["timeSeconds"]
+        elif "time_seconds" in action:
+            result["timeSeconds"] = action["time_seconds"]
+        elif "duration" in action:
+            result["timeSeconds"] = action["duration"]
+        else:
+            result["timeSeconds"] = 1.0
+        if "time_seconds" in result:
+            del result["time_seconds"]
+        if "duration" in result:
+            del result["duration"]
+    elif iwa_type == "TypeAction":
+        if "text" in action:
+            result["text"] = action["text"]
+    elif iwa_type == "NavigateAction":
+        if "url" in action:
+            result["url"] = action["url"]
+    return result
+
+
+def _legacy_normalize(action):
+    normalized = {k: v for k, v in action.items() if "_" not in k and k != "webAgentId"}
+    if normalized.get("type") == "WaitAction":
+        if "time_seconds" in action:
+            normalized["timeSeconds"] = action["time_seconds"]
+        elif "duration" in action:
+            normalized["timeSeconds"] = action["duration"]
+        normalized.pop("duration", None)
+        if "timeSeconds" not in normalized:
+            normalized["timeSeconds"] = 1.0
+    selector = normalized.get("selector")
+    if isinstance(selector, dict):
+        cleaned = {k: v for k, v in selector.items() if k != "case_sensitive" and k != "webAgentId"}
+        if "case_sensitive" in selector:
+            cleaned["caseSensitive"] = selector["case_sensitive"]
+        elif "caseSensitive" not in cleaned:
+            cleaned["caseSensitive"] = False
+        normalized["selector"] = cleaned
+    return normalized
+
+
+def _legacy_validate_selector(selector):
+    valid_types = {"tagContainsSelector", "attributeValueSelector", "cssSelector", "xpathSelector"}
+    if not isinstance(selector, dict) or "type" not in selector or selector["type"] not in valid_types:
+        return False
+    if "case_sensitive" in selector and "caseSensitive" not in selector:
+        selector["caseSensitive"] = selector["case_sensitive"]
+    if selector["type"] == "attributeValueSelector" and "attribute" not in selector:
+        return False
+    return "value" in selector
+
+
+def _legacy_validate(actions):
+    valid_types = {"ClickAction", "TypeAction", "WaitAction", "NavigateAction", "ScreenshotAction", "ScrollAction"}
+    errors = []
+    for i, action in enumerate(actions):
+        action_type = action.get("type")
+        if action_type not in valid_types:
+            errors.append(i)
+        elif action_type == "WaitAction":
+            if not isinstance(action.get("timeSeconds", action.get("time_seconds")), (int, float)):
+                errors.append(i)
+        elif action_type in ("TypeAction", "ClickAction"):
+            if (action_type == "TypeAction" and "text" not in action) or "selector" not in action \
+                    or not _legacy_validate_selector(action["selector"]):
+                errors.append(i)
+        elif action_type == "NavigateAction" and not isinstance(action.get("url"), str):
+            errors.append(i)
+    return not errors, errors
+
+
+def legacy_pipeline(raw_actions):
+    """generator convert -> agent convert -> endpoint normalize -> endpoint validate"""
+    generated = [_legacy_convert(action) for action in raw_actions]
+    agent = [_legacy_convert(action) for action in generated]
+    normalized = [_legacy_normalize(action) for action in agent]
+    _legacy_validate(normalized)
+    return normalized
+
+
+def codec_pipeline(raw_actions):
+    generated = encode_actions(raw_actions)
+    agent = encode_actions(generated)
+    normalized, _errors = encode_sequence(agent)
+    return normalized
+
+
+def _cpu_per_call(fn, actions, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(actions)
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    print("=" * 70)
+    print("🧪 IWA Action Codec - CPU per action sequence")
+    print("=" * 70)
+    print()
+
+    iterations = int(os.getenv("BENCH_ITERATIONS", "5000"))
+    for n_clicks in (1, 5, 20):
+        actions = _sample_actions(n_clicks)
+
+        # Same contract: identical JSON output
+        legacy_out = json.dumps(legacy_pipeline(actions), sort_keys=True)
+        codec_out = json.dumps(codec_pipeline(actions), sort_keys=True)
+        if legacy_out != codec_out:
+            print(f"   ❌ Output mismatch for {len(actions)} actions")
+            sys.exit(1)
+
+        before = _cpu_per_call(legacy_pipeline, actions, iterations)
+        after = _cpu_per_call(codec_pipeline, actions, iterations)
+        print(f"{len(actions):3d} actions:")
+        print(f"   Before: {before * 1e6:8.1f} µs CPU/sequence ({before * 1e6 / len(actions):.2f} µs/action)")
+        print(f"   After:  {after * 1e6:8.1f} µs CPU/sequence ({after * 1e6 / len(actions):.2f} µs/action)")
+        print(f"   ✅ Speedup: {before / after:.1f}x (identical output)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
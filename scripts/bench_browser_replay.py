@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Offline, deterministic benchmark of the browser path (fetch_page + analyze_dom)
+
+Drives ActionGenerator.generate over a prompt corpus with the browser path
+forced on (static fast path, hedging and the snapshot cache disabled) and
+every navigation served from HAR files, so run-to-run differences come from
+the code, not from the demo sites.
+
+1. Record once (needs network):   python scripts/bench_browser_replay.py record
+2. Replay anywhere (air-gapped):   python scripts/bench_browser_replay.py replay
+
+Env: BENCH_ITERATIONS (default 5), BENCH_HAR_DIR (default har/bench, under DATA_DIR),
+BENCH_PROMPTS (file with one prompt per line; default: the warmup prompts).
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+MODE = sys.argv[1] if len(sys.argv) > 1 else "replay"
+if MODE not in ("record", "replay"):
+    print(f"Usage: {sys.argv[0]} [record|replay]")
+    sys.exit(2)
+
+# Settings are read at import time - pin the browser path before importing the app
+os.environ["BROWSER_HAR_MODE"] = MODE
+os.environ["BROWSER_HAR_DIR"] = os.getenv("BENCH_HAR_DIR", os.path.join("har", "bench"))
+os.environ["ENABLE_BROWSER_AUTOMATION"] = "true"
+os.environ["STATIC_ANALYSIS_ENABLED"] = "false"
+os.environ["HEDGED_GENERATION"] = "false"
+os.environ["SNAPSHOT_CACHE_ENABLED"] = "false"
+
+import asyncio
+import statistics
+import time
+from collections import defaultdict
+from api.actions.generator import ActionGenerator
+from api.utils.browser_analyzer import close_browser
+from api.utils.metrics import begin_request
+from api.utils.task_context import TaskContext, infer_site_url
+from api.utils.warmup import WARMUP_PROMPTS
+from config.settings import data_path
+
+
+def _load_prompts():
+    path = os.getenv("BENCH_PROMPTS")
+    if not path:
+        return list(WARMUP_PROMPTS)
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+async def _run_once(generator: ActionGenerator, prompt: str, index: int):
+    """One generate() call; returns (total seconds, {stage: seconds}, action count)"""
+    url = infer_site_url(prompt.lower())
+    context = TaskContext.build(prompt, url)
+    recorder = begin_request()  # collect stage timings for this call only (never flushed)
+    start = time.perf_counter()
+    actions = await generator.generate(prompt, url, task_id=f"bench-{index}", task_context=context)
+    total = time.perf_counter() - start
+    stages = defaultdict(float)
+    for stage, seconds in recorder.stages:
+        stages[stage] += seconds
+    return total, stages, len(actions)
+
+
+async def main():
+    iterations = 1 if MODE == "record" else int(os.getenv("BENCH_ITERATIONS", "5"))
+    prompts = _load_prompts()
+
+    print("=" * 70)
+    print(f"🧪 Browser path benchmark ({MODE} mode, HAR dir {data_path(os.environ['BROWSER_HAR_DIR'])})")
+    print("=" * 70)
+    print(f"   Prompts: {len(prompts)}, iterations: {iterations}")
+    print()
+
+    generator = ActionGenerator()
+    totals = []
+    stage_samples = defaultdict(list)
+    try:
+        await _run_once(generator, prompts[0], -1)  # launch browsers outside the measured runs
+        for i, prompt in enumerate(prompts):
+            samples = []
+            for _ in range(iterations):
+                total, stages, n_actions = await _run_once(generator, prompt, i)
+                samples.append(total)
+                for stage, seconds in stages.items():
+                    stage_samples[stage].append(seconds)
+            totals.extend(samples)
+            print(f"   {statistics.median(samples) * 1000:8.1f} ms  ({n_actions:2d} actions)  {prompt[:50]}")
+    finally:
+        await close_browser()
+
+    print()
+    print("=" * 70)
+    if MODE == "record":
+        print(f"✅ Recorded {len(prompts)} prompts - rerun with 'replay' to benchmark offline")
+    else:
+        print(f"✅ generate(): median {statistics.median(totals) * 1000:.1f} ms, "
+              f"mean {statistics.mean(totals) * 1000:.1f} ms over {len(totals)} runs")
+        for stage in ("fetch_page", "analyze_dom"):
+            if stage_samples[stage]:
+                print(f"   {stage:>12}: median {statistics.median(stage_samples[stage]) * 1000:.1f} ms "
+                      f"({len(stage_samples[stage])} samples)")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
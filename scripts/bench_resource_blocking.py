@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Benchmark navigation time on the demo sites: Python route handler vs CDP blocklist
+
+"route" installs the async Python route handler (every subrequest makes a
+CDP -> Python -> CDP round trip). "cdp" installs Network.setBlockedURLs so
+matching happens inside Chromium. Both run on the same browser, same pages,
+alternating per iteration so network noise hits both modes equally.
+
+Usage: BENCH_ITERATIONS=5 BENCH_URLS=https://autobooks.autoppia.com python scripts/bench_resource_blocking.py
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import asyncio
+import statistics
+import time
+from playwright.async_api import async_playwright
+from api.utils.browser_manager import CHROMIUM_ARGS
+from api.utils.page_pool import install_resource_blocking, block_heavy_resources
+from api.utils.warmup import default_warmup_urls
+
+MODES = ("route", "cdp")
+
+
+async def _navigate(browser, url: str, mode: str, timeout: float):
+    """One navigation in a fresh context; returns (seconds, python_route_calls) or None"""
+    context = await browser.new_context()
+    calls = 0
+    try:
+        page = await context.new_page()
+        if mode == "route":
+            async def counting_handler(route):
+                nonlocal calls
+                calls += 1
+                await block_heavy_resources(route)
+            await context.route("**/*", counting_handler)
+        else:
+            await install_resource_blocking(context, page, mode="cdp")
+        start = time.perf_counter()
+        await page.goto(url, wait_until="domcontentloaded", timeout=timeout * 1000)
+        return time.perf_counter() - start, calls
+    except Exception as e:
+        print(f"   ⚠️ {mode} {url}: {e}")
+        return None
+    finally:
+        await context.close()
+
+
+async def main():
+    iterations = int(os.getenv("BENCH_ITERATIONS", "5"))
+    timeout = float(os.getenv("BENCH_TIMEOUT", "15"))
+    urls = [u for u in os.getenv("BENCH_URLS", "").split(",") if u] or default_warmup_urls()
+
+    print("=" * 70)
+    print("🧪 Resource blocking benchmark: Python route handler vs CDP blocklist")
+    print("=" * 70)
+    print(f"   Sites: {len(urls)}, iterations per mode: {iterations}")
+    print()
+
+    playwright = await async_playwright().start()
+    browser = await playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+    totals = {mode: [] for mode in MODES}
+    try:
+        for url in urls:
+            samples = {mode: [] for mode in MODES}
+            route_calls = []
+            await _navigate(browser, url, "cdp", timeout)  # warm DNS/TLS/HTTP cache for both modes
+            for _ in range(iterations):
+                for mode in MODES:
+                    result = await _navigate(browser, url, mode, timeout)
+                    if result is None:
+                        continue
+                    samples[mode].append(result[0])
+                    if mode == "route":
+                        route_calls.append(result[1])
+            print(f"🌐 {url}")
+            for mode in MODES:
+                if samples[mode]:
+                    totals[mode].extend(samples[mode])
+                    print(f"   {mode:>5}: median {statistics.median(samples[mode]) * 1000:7.1f} ms, "
+                          f"mean {statistics.mean(samples[mode]) * 1000:7.1f} ms ({len(samples[mode])} runs)")
+            if route_calls:
+                print(f"   Python route callbacks per navigation: {statistics.mean(route_calls):.0f}")
+            print()
+    finally:
+        await browser.close()
+        await playwright.stop()
+
+    print("=" * 70)
+    if totals["route"] and totals["cdp"]:
+        route_median = statistics.median(totals["route"])
+        cdp_median = statistics.median(totals["cdp"])
+        print(f"✅ Overall median: route {route_median * 1000:.1f} ms, cdp {cdp_median * 1000:.1f} ms "
+              f"({(route_median - cdp_median) * 1000:+.1f} ms saved per navigation)")
+    else:
+        print("❌ Not enough successful navigations to compare")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Benchmark /solve_task response post-processing - per-request CPU before and after
+
+"Before" is a condensed copy of the legacy pipeline (deepcopy cleanup loop,
+final conversion loop, in-place safety loop, ensure_camelcase_response,
+three recursive webAgentId filters and the dumps/loads verification round
+trips). "After" is the single-pass response encoder.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import copy
+import json
+import time
+from api.utils.response_encoder import build_response_content, encode_response_content
+
+AGENT_ID = "1be0c85d-5e8a-4ccf-b4a2-000000000001"
+
+
+def _sample_actions(n_clicks: int):
+    """Realistic template-only plan: navigate, waits, typed form fields, clicks"""
+    actions = [{"type": "NavigateAction", "url": "http://localhost:8001/"}]
+    for i in range(n_clicks):
+        actions.append({"type": "WaitAction", "time_seconds": 1.0})
+        actions.append({
+            "type": "ClickAction",
+            "selector": {"type": "xpathSelector", "value": f"//button[contains(text(), 'Item {i}')]", "case_sensitive": False},
+        })
+        actions.append({
+            "type": "TypeAction",
+            "text": f"value {i}",
+            "selector": {"type": "attributeValueSelector", "attribute": "name", "value": f"field_{i}"},
+        })
+    actions.append({"type": "ScreenshotAction"})
+    return actions
+
+
+def _remove_webagentid_recursive(obj):
+    if isinstance(obj, dict):
+        obj.pop("webAgentId", None)
+        return {k: _remove_webagentid_recursive(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_remove_webagentid_recursive(item) for item in obj]
+    return obj
+
+
+def _camelcase_pass(actions, copy_selector):
+    out = []
+    for action in actions:
+        action = dict(action)
+        if copy_selector and isinstance(action.get("selector"), dict):
+            action["selector"] = dict(action["selector"])
+        if action.get("type") == "WaitAction":
+            if "time_seconds" in action:
+                action["timeSeconds"] = action.pop("time_seconds")
+            elif "duration" in action:
+                action["timeSeconds"] = action.pop("duration")
+            action.setdefault("timeSeconds", 1.0)
+        selector = action.get("selector")
+        if isinstance(selector, dict):
+            if "case_sensitive" in selector:
+                selector["caseSensitive"] = selector.pop("case_sensitive")
+            selector.setdefault("caseSensitive", False)
+        out.append(action)
+    return out
+
+
+def legacy_encode(actions, web_agent_id):
+    """Condensed legacy post-processing (logging removed, work kept)"""
+    cleaned = []
+    for action in actions:
+        action = copy.deepcopy(action)
+        cleaned.extend(_camelcase_pass([action], copy_selector=False))
+        for key in [k for k in list(cleaned[-1].keys()) if "_" in k]:
+            del cleaned[-1][key]
+    final_actions = _camelcase_pass(cleaned, copy_selector=True)
+    json.dumps(final_actions[0])
+    final_actions = _camelcase_pass(final_actions, copy_selector=False)
+
+    content = {"actions": final_actions, "web_agent_id": web_agent_id, "recording": ""}
+    content = _remove_webagentid_recursive(content)
+    content["actions"] = _camelcase_pass(content["actions"], copy_selector=False)
+    json.dumps(content)
+    content = _remove_webagentid_recursive(content)
+    content = _remove_webagentid_recursive(content)
+    json.dumps(content)  # logged response preview
+    len(json.dumps(content))  # diagnostic response_size
+
+    clean = {"actions": content["actions"], "web_agent_id": content["web_agent_id"], "recording": ""}
+    body = json.dumps(clean, ensure_ascii=False)
+    parsed = json.loads(body)
+    body = json.dumps(parsed, ensure_ascii=False)
+    json.loads(body)
+    json.loads(body)
+    final_check = _remove_webagentid_recursive(json.loads(body))
+    final_check = _remove_webagentid_recursive(final_check)
+    body = (
+        '{"actions":' + json.dumps(final_check["actions"], ensure_ascii=False)
+        + ',"web_agent_id":' + json.dumps(final_check["web_agent_id"], ensure_ascii=False)
+        + ',"recording":""}'
+    )
+    json.loads(body)
+    return body.encode("utf-8")
+
+
+def encoder_encode(actions, web_agent_id):
+    content = build_response_content(actions, web_agent_id)
+    return encode_response_content(content)
+
+
+def _cpu_per_call(fn, actions, iterations):
+    start = time.process_time()
+    for _ in range(iterations):
+        fn(actions, AGENT_ID)
+    return (time.process_time() - start) / iterations
+
+
+def main():
+    print("=" * 70)
+    print("🧪 /solve_task Response Encoding - CPU per request")
+    print("=" * 70)
+    print()
+
+    iterations = int(os.getenv("BENCH_ITERATIONS", "2000"))
+    for n_clicks in (1, 5, 20):
+        actions = _sample_actions(n_clicks)
+
+        # Same contract: identical decoded output
+        legacy_out = json.loads(legacy_encode(actions, AGENT_ID))
+        encoder_out = json.loads(encoder_encode(actions, AGENT_ID))
+        if legacy_out != encoder_out:
+            print(f"   ❌ Output mismatch for {len(actions)} actions")
+            sys.exit(1)
+
+        before = _cpu_per_call(legacy_encode, actions, iterations)
+        after = _cpu_per_call(encoder_encode, actions, iterations)
+        print(f"{len(actions):3d} actions:")
+        print(f"   Before: {before * 1e6:8.1f} µs CPU/request")
+        print(f"   After:  {after * 1e6:8.1f} µs CPU/request")
+        print(f"   ✅ Speedup: {before / after:.1f}x (identical output)")
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Golden check for TaskParser.parse_task - identical output, CPU per prompt
+
+Runs parse_task over a fixed prompt corpus (demo-site tasks, credentials,
+URLs, negative constraints, job and booking filters, non-ASCII edge cases)
+and compares every result with scripts/golden/task_parser.json - once cold
+and once more served from the prompt template cache.
+
+Usage:
+    python scripts/check_task_parser_golden.py           # compare + time
+    python scripts/check_task_parser_golden.py --update  # rewrite the golden file
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import json
+import time
+from api.utils.task_parser import TaskParser
+from api.utils.warmup import WARMUP_PROMPTS
+
+GOLDEN_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "golden", "task_parser.json")
+
+CORPUS = [(prompt, "") for prompt in WARMUP_PROMPTS] + [
+    ("Login where username equals '<web_agent_id>' and password equals 'PASSWORD'", ""),
+    ("Login with username: user<web_agent_id> and password: PASSWORD", "http://localhost:8001"),
+    ("Log in using user=alice, pass=s3cret; then open the dashboard", ""),
+    ("Sign in as uname: bob pwd: hunter2.", ""),
+    ("Authenticate with user name: Carol, password: 'Pa55!'", ""),
+    ("Register with username: user<web_agent_id> email: user<web_agent_id>@gmail.com password: Passw0rd!", ""),
+    ("Register with username testuser and password PASSWORD", ""),
+    ("Subscribe with email: 'Jane.Doe@Example.com' to the newsletter", ""),
+    ("Contact us with e-mail: info@site.org and mail: other@site.org", ""),
+    ("Update the email 'New.Address@Mail.com' on the profile", ""),
+    ("First, authenticate with username 'user<web_agent_id>' and password 'PASSWORD'. Then, register a book "
+     "with a rating equal to 0.5, a page count less than or equal to 450, and an author whose name contains 'rebel'.", ""),
+    ("Navigate to https://example.com and take a screenshot", ""),
+    ("Navigate to example.com", ""),
+    ("Go to www.autobooks.autoppia.com/books?page=2 then click Next", ""),
+    ("go to the cart and checkout", "https://autozone.autoppia.com"),
+    ("Open HTTP://UPPER.EXAMPLE.COM/Path and wait", ""),
+    ("Navigate to homepage and click login button", {"url": "https://autodining.autoppia.com"}),
+    ("Take a screenshot", None),
+    ("Type 'hello world' into the search box", ""),
+    ("Enter \"John Smith\" in the name field", ""),
+    ("Fill with 'lorem ipsum' and submit", ""),
+    ("Show posts whose title contains the word 'python'", ""),
+    ("Find emails whose subject contains 'invoice'", ""),
+    ("Search for 'test query' in the search box", ""),
+    ("Click the 'More information...' link", ""),
+    ("Click on the login button", ""),
+    ("Click the month view button", "https://autocalendar.autoppia.com"),
+    ("Switch to week view in the calendar", ""),
+    ("Toggle to day view", ""),
+    ("Select the year view, then press the submit button", ""),
+    ("Choose a lodge near the lake", ""),
+    ("Change the settings for notifications", ""),
+    ("Open the profile tab", ""),
+    ("View a list of deliveries", ""),
+    ("Press Enter", ""),
+    ("Apply for job where job_title is equal to 'Engineer' at company that contains 'Acme'", ""),
+    ("Apply for a job where job title is equal to 'Data Scientist' and location does NOT contain 'Remote'", ""),
+    ("Retrieve details of the job posting where title is equal to 'Designer' and company name contains 'Studio'", ""),
+    ("Search for jobs with a query that does NOT contain 'senior' where location contains 'Berlin'", ""),
+    ("search_jobs where query contains 'python' and company does NOT contain 'Corp'", ""),
+    ("View job where the date is NOT equal to '2024-01-01'", ""),
+    ("Show jobs whose title is equal to \"Chef\"", ""),
+    ("Book a consultation whose name contains 'Alex'", "https://autowork.autoppia.com"),
+    ("Book a consultation where rate does not contain '$50' and role is not equal to 'Intern'", ""),
+    ("Book consultation with an expert whose country is not equal to 'Spain' and rating equals 4.5", ""),
+    ("Booking: name contains \"Maria\" and rating equals 5", ""),
+    ("Comment 'Great work!' on the post where poster name does NOT contain 'zox'", ""),
+    ("Show movies where the genre does NOT contain 'Horror' and the title NOT equal to 'Up'", ""),
+    ("List books whose author doesn't contain 'King' and NOT contain 'Rowling'", ""),
+    ("Edit the restaurant review, then delete the old one", ""),
+    ("Scroll down and take a screenshot", ""),
+    ("Move up to the header", ""),
+    ("Extract the price of the first product", ""),
+    ("Write a comment saying hello", ""),
+    ("Wait 2 seconds then take a screenshot", ""),
+    ("Connect with user whose name equals Michael Chan", ""),
+    ("", ""),
+    ("random words", ""),
+    ("   ", ""),
+    # Non-ASCII: case-insensitive matching must not depend on ASCII-only shortcuts
+    ("Login with uſername: ſtefan and paſſword: geheim", ""),
+    ("Log in with USERNAME: ÅSA and PASSWORD: Ünïcode", ""),
+    ("Type 'café crème' and go to https://ünicode.example/ß", ""),
+    ("Book a consultation whose NAME CONTAINS 'Zoë' and RATING EQUALS 4.0", ""),
+    ("Apply for job where JOB TITLE IS EQUAL TO 'Ingeniero' and LOCATION DOES NOT CONTAIN 'Madrid'", ""),
+    ("Location does NOT contain 'K' with Kelvin sign K and e-mail: ǅemal@ex.com", ""),
+]
+
+
+def _parse_all(parser: TaskParser):
+    return [parser.parse_task(prompt, url) for prompt, url in CORPUS]
+
+
+def _compare(golden, results, label: str) -> int:
+    mismatches = 0
+    for expected, parsed in zip(golden, results):
+        if json.loads(json.dumps(parsed)) != expected["parsed"]:
+            mismatches += 1
+            print(f"   ❌ [{label}] {expected['prompt'][:60]!r}")
+            for key in sorted(set(parsed) | set(expected["parsed"])):
+                if json.loads(json.dumps(parsed.get(key))) != expected["parsed"].get(key):
+                    print(f"      {key}: expected {expected['parsed'].get(key)!r}, got {parsed.get(key)!r}")
+    return mismatches
+
+
+def _cpu_per_prompt(parser: TaskParser, iterations: int) -> float:
+    start = time.process_time()
+    for _ in range(iterations):
+        _parse_all(parser)
+    return (time.process_time() - start) / (iterations * len(CORPUS))
+
+
+def main():
+    parser = TaskParser()
+    results = _parse_all(parser)
+
+    if "--update" in sys.argv:
+        os.makedirs(os.path.dirname(GOLDEN_PATH), exist_ok=True)
+        golden = [{"prompt": prompt, "url": url, "parsed": parsed} for (prompt, url), parsed in zip(CORPUS, results)]
+        with open(GOLDEN_PATH, "w") as f:
+            json.dump(golden, f, indent=1, ensure_ascii=False, sort_keys=True)
+            f.write("\n")
+        print(f"✅ Wrote {len(golden)} golden results to {GOLDEN_PATH}")
+        return
+
+    print("=" * 70)
+    print("🧪 TaskParser.parse_task golden check")
+    print("=" * 70)
+    with open(GOLDEN_PATH) as f:
+        golden = json.load(f)
+    if [[g["prompt"], g["url"]] for g in golden] != json.loads(json.dumps(CORPUS)):
+        print("❌ Golden corpus is out of date - rerun with --update on a known-good tree")
+        sys.exit(1)
+
+    # Second pass is served from the prompt template cache (re-bound slot values)
+    mismatches = _compare(golden, results, "cold") + _compare(golden, _parse_all(parser), "template cache")
+    if mismatches:
+        print(f"❌ {mismatches} results differ from the golden output")
+        sys.exit(1)
+    print(f"   ✅ {len(golden)}/{len(golden)} prompts identical to the golden output (cold and template cache)")
+
+    iterations = int(os.getenv("BENCH_ITERATIONS", "200"))
+    full_parser = TaskParser()
+    full_parser.template_cache = None
+    full = _cpu_per_prompt(full_parser, iterations)
+    cached = _cpu_per_prompt(parser, iterations)
+    print(f"   ⏱️ parse_task (full parse):     {full * 1e6:.1f} µs CPU/prompt ({len(CORPUS)} prompts x {iterations})")
+    print(f"   ⏱️ parse_task (template cache): {cached * 1e6:.1f} µs CPU/prompt")
+    if parser.template_cache is not None:
+        stats = parser.template_cache.get_stats()
+        print(f"   📊 Template cache: {stats['size']} templates, hit rate {stats['hit_rate']:.1%}, "
+              f"{stats['bypassed']} bypassed, {stats['uncacheable']} uncacheable")
+    print("=" * 70)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Admission control: bounded queue, deadline-bound waits and the degradation ladder"""
+import asyncio
+
+import pytest
+
+from api.utils import admission as admission_module
+from api.utils.admission import (
+    AdmissionController, AdmissionRejected, LEVEL_NORMAL, LEVEL_NO_BROWSER, LEVEL_NO_ENRICHERS,
+)
+from api.utils.deadline import Deadline
+
+
+class Clock:
+    """Stand-in for the time module inside the admission module"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(admission_module, "time", fake)
+    return fake
+
+
+def test_ladder_steps_up_at_once_and_down_one_level_per_cooldown(clock):
+    controller = AdmissionController(queue_thresholds=(1, 2, 3), p95_thresholds=(5.0, 10.0, 20.0),
+                                     cooldown=10.0, window=60.0)
+    assert controller.level() == LEVEL_NORMAL
+
+    controller._samples.extend([(clock.now, 12.0)] * 20)  # p95 past the level-2 threshold
+    assert controller.level() == LEVEL_NO_ENRICHERS  # straight up two levels
+
+    clock.now += 61.0  # samples age out of the window: load is gone
+    assert controller.level() == LEVEL_NO_BROWSER  # cooldown since the step up has passed
+    assert controller.level() == LEVEL_NO_BROWSER  # but only one level per cooldown
+    clock.now += 10.0
+    assert controller.level() == LEVEL_NORMAL
+    assert controller.get_stats()["level_changes"] == 3
+
+
+def test_queue_depth_drives_the_ladder():
+    controller = AdmissionController(max_concurrent=1, queue_thresholds=(1, 5, 9), cooldown=0.0)
+
+    async def _hold_and_queue():
+        release = asyncio.Event()
+
+        async def _holder():
+            async with controller.slot():
+                await release.wait()
+
+        async def _waiter():
+            async with controller.slot():
+                pass
+
+        holder = asyncio.ensure_future(_holder())
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(_waiter())
+        await asyncio.sleep(0)
+        level_while_queued = controller.level()
+        release.set()
+        await asyncio.gather(holder, waiter)
+        return level_while_queued
+
+    assert asyncio.run(_hold_and_queue()) == LEVEL_NO_BROWSER
+    assert controller.level() == LEVEL_NORMAL
+
+
+def test_queued_request_gives_up_when_its_budget_runs_out():
+    controller = AdmissionController(max_concurrent=1, max_queue=4)
+
+    async def _run():
+        release = asyncio.Event()
+
+        async def _holder():
+            async with controller.slot():
+                await release.wait()
+
+        holder = asyncio.ensure_future(_holder())
+        await asyncio.sleep(0)
+        with pytest.raises(asyncio.TimeoutError):
+            async with controller.slot(Deadline(0.05)):
+                pass
+        queue_depth = controller.get_stats()["queue_depth"]
+        release.set()
+        await holder
+        async with controller.slot(Deadline(1.0)):  # the abandoned waiter never got the slot
+            return queue_depth
+
+    assert asyncio.run(_run()) == 0
+    stats = controller.get_stats()
+    assert stats["abandoned"] == 1
+    assert stats["admitted"] == 2
+    assert stats["in_flight"] == 0
+
+
+def test_full_queue_rejects_immediately():
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+
+    async def _run():
+        async with controller.slot():
+            with pytest.raises(AdmissionRejected):
+                async with controller.slot():
+                    pass
+
+    asyncio.run(_run())
+    assert controller.get_stats()["rejected"] == 1
+
+
+def test_freed_slot_goes_to_the_oldest_waiter():
+    controller = AdmissionController(max_concurrent=1, max_queue=8)
+    order = []
+
+    async def _run():
+        release = asyncio.Event()
+
+        async def _holder():
+            async with controller.slot():
+                await release.wait()
+
+        async def _waiter(name):
+            async with controller.slot():
+                order.append(name)
+
+        holder = asyncio.ensure_future(_holder())
+        await asyncio.sleep(0)
+        waiters = []
+        for name in ("first", "second", "third"):
+            waiters.append(asyncio.ensure_future(_waiter(name)))
+            await asyncio.sleep(0)
+        release.set()
+        await asyncio.gather(holder, *waiters)
+
+    asyncio.run(_run())
+    assert order == ["first", "second", "third"]
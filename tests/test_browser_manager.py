@@ -0,0 +1,194 @@
+"""Browser manager: sharding, crash relaunch, drained recycles, deadline-bound leases and HAR contexts in its accounting"""
+import asyncio
+import time
+
+import pytest
+
+from api.utils import browser_analyzer as browser_analyzer_module
+from api.utils import browser_manager as browser_manager_module
+from api.utils.browser_analyzer import BrowserAnalyzer, har_path_for
+from api.utils.browser_manager import BrowserManager, NoBrowserAvailable
+from api.utils.page_pool import PagePool
+from config.settings import settings
+
+
+class FakePage:
+    def is_closed(self):
+        return False
+
+    def set_default_timeout(self, timeout):
+        pass
+
+    async def evaluate(self, script):
+        return None
+
+    async def goto(self, url, **kwargs):
+        return None
+
+
+class FakeContext:
+    def __init__(self):
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage()
+
+    async def clear_cookies(self):
+        pass
+
+    async def route_from_har(self, path, **kwargs):
+        pass
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = []
+
+    async def new_context(self, **options):
+        context = FakeContext()
+        self.contexts.append((context, options))
+        return context
+
+
+def _manager(pool_size: int = 1) -> BrowserManager:
+    """Running manager with one fake instance whose pool holds pool_size pages"""
+    manager = BrowserManager(instances=1, lease_timeout=2.0)
+    instance = manager.instances[0]
+    instance.browser = FakeBrowser()
+    instance.pool = PagePool(instance.browser, size=pool_size, lease_timeout=manager.lease_timeout)
+    for _ in range(pool_size):
+        instance.pool._slots += 1
+        instance.pool._idle.put_nowait((FakeContext(), FakePage()))
+    manager.running = True
+    return manager
+
+
+def test_fetch_page_lease_wait_follows_the_callers_timeout(monkeypatch):
+    manager = _manager(pool_size=1)
+    monkeypatch.setattr(browser_analyzer_module, "get_browser_manager", lambda: manager)
+    monkeypatch.setattr(browser_analyzer_module, "_snapshot_cache", None)
+    monkeypatch.setattr(settings, "snapshot_cache_enabled", False)
+    monkeypatch.setattr(settings, "browser_har_mode", "off")
+    analyzer = BrowserAnalyzer(manager.instances[0].browser)
+
+    async def _fetch_while_pool_is_busy():
+        async with manager.page():  # the only pooled page is taken
+            start = time.perf_counter()
+            page_data = await analyzer.fetch_page("https://example.com/", timeout=1.0, lease_timeout=0.05)
+            return page_data, time.perf_counter() - start
+
+    page_data, waited = asyncio.run(_fetch_while_pool_is_busy())
+    assert page_data is None
+    assert waited < 0.5  # not the manager's 2.0s default
+    assert manager.instances[0].pool.lease_timeouts == 1
+
+
+def test_har_fetch_is_counted_as_in_flight(tmp_path, monkeypatch):
+    manager = _manager(pool_size=1)
+    instance = manager.instances[0]
+    monkeypatch.setattr(browser_analyzer_module, "get_browser_manager", lambda: manager)
+    url = "https://autobooks.autoppia.com/login"
+    open(har_path_for(url, str(tmp_path)), "w").close()
+    analyzer = BrowserAnalyzer(None)  # never used while the manager runs
+    seen = {}
+
+    async def _load_page(page, url, timeout):
+        seen["in_flight"] = instance.in_flight[instance.browser]
+        seen["active_pages"] = instance.active_pages
+        return {"url": url, "elements": []}
+
+    async def _no_blocking(context, page):
+        pass
+
+    monkeypatch.setattr(analyzer, "_load_page", _load_page)
+    monkeypatch.setattr(browser_analyzer_module, "install_resource_blocking", _no_blocking)
+    page_data = asyncio.run(analyzer._fetch_page_har(url, 1.0, "replay", str(tmp_path)))
+
+    assert page_data == {"url": url, "elements": []}
+    assert seen == {"in_flight": 1, "active_pages": 1}
+    assert instance.in_flight[instance.browser] == 0 and instance.active_pages == 0
+    context, options = instance.browser.contexts[-1]
+    assert context.closed and options == {"service_workers": "block"}
+
+
+def test_pages_go_to_the_least_loaded_live_instance():
+    manager = BrowserManager(instances=3)
+    for instance in manager.instances:
+        instance.browser = FakeBrowser()
+    manager.instances[0].active_pages = 2
+    manager.instances[1].active_pages = 1
+    manager.instances[2].active_pages = 1
+    assert manager.pick() is manager.instances[1]  # lowest index wins ties
+    manager.instances[1].browser = None  # crashed
+    assert manager.pick() is manager.instances[2]
+    for instance in manager.instances:
+        instance.browser = None
+    with pytest.raises(NoBrowserAvailable):
+        manager.pick()
+
+
+def test_crashed_instance_is_relaunched_in_the_background(monkeypatch):
+    manager = _manager(pool_size=1)
+    instance = manager.instances[0]
+    crashed_browser = instance.browser
+    relaunched = FakeBrowser()
+
+    async def _launch(inst):
+        await asyncio.sleep(0.01)
+        inst.browser, inst.pool = relaunched, None
+        return True
+
+    monkeypatch.setattr(manager, "_launch", _launch)
+
+    async def _crash():
+        manager._on_disconnected(instance, crashed_browser)
+        during = (instance.live, instance.pool)
+        with pytest.raises(NoBrowserAvailable):
+            manager.pick()  # no dead Browser handed out while relaunching
+        await asyncio.gather(*manager._relaunch_tasks)
+        return during
+
+    assert asyncio.run(_crash()) == (False, None)
+    assert instance.live and instance.browser is relaunched
+    assert instance.crashes == 1
+    manager._on_disconnected(instance, crashed_browser)  # late event from the old process
+    assert instance.crashes == 1
+
+
+def test_recycle_drains_in_flight_pages_before_closing_the_old_process(monkeypatch):
+    monkeypatch.setattr(browser_manager_module, "DRAIN_POLL_INTERVAL", 0.01)
+    manager = _manager(pool_size=1)
+    manager.recycle_after_pages = 2
+    instance = manager.instances[0]
+    old_browser, fresh_browser = instance.browser, FakeBrowser()
+    closed = []
+
+    async def _open_browser(inst):
+        return fresh_browser, None, "fresh"
+
+    async def _close_browser(browser, pool):
+        closed.append(browser)
+
+    monkeypatch.setattr(manager, "_open_browser", _open_browser)
+    monkeypatch.setattr(manager, "_close_browser", _close_browser)
+
+    async def _run():
+        async with manager.context():  # still in flight on the old process
+            async with manager.context():
+                pass
+            async with manager.context():
+                pass  # second page served -> recycle
+            await asyncio.sleep(0.05)
+            swapped = instance.browser is fresh_browser
+            closed_while_in_flight = list(closed)
+        await asyncio.gather(*manager._relaunch_tasks)
+        return swapped, closed_while_in_flight
+
+    swapped, closed_while_in_flight = asyncio.run(_run())
+    assert swapped and closed_while_in_flight == []
+    assert closed == [old_browser]
+    assert instance.recycles == 1 and instance.pages_served == 0
+    assert old_browser not in instance.in_flight
@@ -0,0 +1,70 @@
+"""Request deadline: exhausted stages are counted and the fallback keeps its reserved slice"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from api import endpoints
+from api.utils import admission as admission_module
+from api.utils.admission import AdmissionController
+from api.utils.deadline import Deadline
+from api.utils.metrics import get_metrics
+from config.settings import settings
+
+
+def _exhausted(stage: str) -> float:
+    return get_metrics().counter("solve_deadline_exhausted_total", "").value((stage,))
+
+
+def test_stage_cut_short_by_the_budget_is_counted():
+    before = _exhausted("unit_stage")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(Deadline(0.05).run(asyncio.sleep(1.0), "unit_stage", cap=5.0))
+    assert _exhausted("unit_stage") == before + 1
+
+
+def test_stage_cap_timeout_is_not_a_budget_exhaustion():
+    before = _exhausted("capped_stage")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(Deadline(5.0).run(asyncio.sleep(1.0), "capped_stage", cap=0.05))
+    assert _exhausted("capped_stage") == before
+
+
+def test_no_budget_left_skips_the_stage():
+    deadline = Deadline(1.0)
+    assert deadline.timeout(cap=10.0, reserve=2.0) == 0.0
+    before = _exhausted("skipped_stage")
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(deadline.run(asyncio.sleep(0), "skipped_stage", reserve=2.0))
+    assert _exhausted("skipped_stage") == before + 1
+
+
+class _HangingAgent:
+    async def solve_task(self, **kwargs):
+        await asyncio.sleep(60)
+
+
+def test_generation_timeout_leaves_the_fallback_its_slice(monkeypatch):
+    for name, value in (("request_budget_seconds", 1.5), ("fallback_reserve_seconds", 1.0),
+                        ("solve_cache_enabled", False), ("learning_enabled", False),
+                        ("static_analysis_enabled", False), ("enable_browser_automation", False),
+                        ("selector_map_enabled", False)):
+        monkeypatch.setattr(settings, name, value)
+    monkeypatch.setattr(admission_module, "_admission", AdmissionController())
+    monkeypatch.setattr(endpoints, "agent", _HangingAgent())
+    request = endpoints.TaskRequest(
+        id="1be0c85d-5e8a-4ccf-b4a2-93eebdc39507",
+        prompt="Login where username equals 'user' and password equals 'PASSWORD'",
+        url="https://autobooks.autoppia.com/login",
+    )
+    before = _exhausted("generate")
+
+    start = time.perf_counter()
+    response = asyncio.run(endpoints.solve_task(request, None))
+    elapsed = time.perf_counter() - start
+
+    assert _exhausted("generate") == before + 1
+    assert elapsed < settings.request_budget_seconds + 0.5
+    action_types = [action["type"] for action in json.loads(response.body)["actions"]]
+    assert "TypeAction" in action_types  # a real login plan, not the minimal navigate/wait/screenshot
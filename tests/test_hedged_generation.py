@@ -0,0 +1,56 @@
+"""Hedged generation: browser-augmented plan vs heuristic plan under the hedge budget"""
+import asyncio
+
+import pytest
+
+from api.actions import generator as generator_module
+from api.actions.generator import ActionGenerator
+from api.utils.deadline import Deadline
+from config.settings import settings
+
+LIVE_SELECTORS = [{"selector": {"type": "attributeValueSelector", "attribute": "id", "value": "username"}}]
+
+
+def _plan_inputs():
+    return {"url": "https://example.com/login", "task_context": type("Ctx", (), {"prompt_lower": "login"})(),
+            "task_type": "login"}
+
+
+@pytest.fixture
+def generator(monkeypatch):
+    monkeypatch.setattr(settings, "hedge_budget_seconds", 0.5)
+    gen = ActionGenerator()
+    # Plan source is visible in the result: live selectors -> "browser", none -> "heuristic"
+    monkeypatch.setattr(gen, "_dispatch", lambda inputs, live: [{"plan": "browser" if live else "heuristic"}])
+    return gen
+
+
+def _live_after(delay: float):
+    async def _run_live_analysis(url, prompt_lower, task_type, deadline):
+        await asyncio.sleep(delay)
+        return LIVE_SELECTORS
+    return _run_live_analysis
+
+
+def test_hedged_generation_is_opt_in():
+    assert type(settings).model_fields["hedged_generation"].default is False
+
+
+def test_browser_plan_inside_budget_is_returned(generator, monkeypatch):
+    monkeypatch.setattr(generator, "_run_live_analysis", _live_after(0.05))
+    plan = asyncio.run(generator._generate_hedged(_plan_inputs(), Deadline(5.0)))
+    assert plan == [{"plan": "browser"}]
+
+
+def test_heuristic_plan_when_budget_expires(generator, monkeypatch):
+    monkeypatch.setattr(generator, "_run_live_analysis", _live_after(1.0))
+    late_plans = []
+
+    async def _solve():
+        plan = await generator._generate_hedged(_plan_inputs(), Deadline(5.0), late_plans.append)
+        await asyncio.gather(*generator_module._late_live_tasks)  # let the background analysis land
+        return plan
+
+    plan = asyncio.run(_solve())
+    assert plan == [{"plan": "heuristic"}]
+    assert late_plans == [[{"plan": "browser"}]]
@@ -0,0 +1,63 @@
+"""finalize_actions: role-keyed live-selector override and its upgrade counter"""
+import asyncio
+
+from api.actions import generator as generator_module
+from api.actions.generator import ActionGenerator, best_role_match, live_selectors_by_role
+from api.utils import selector_map as selector_map_module
+from api.utils.metrics import MetricsRegistry
+from api.utils.selector_map import SelectorMap
+
+REGISTER_URL = "https://autobooks.autoppia.com/register"
+REGISTER_PROMPT = "Register with username: user<web_agent_id> email: user<web_agent_id>@gmail.com password: Passw0rd!"
+
+
+def _candidate(role, element_id, elem_type="input"):
+    candidate = {
+        "selector": {"type": "attributeValueSelector", "attribute": "id", "value": element_id, "caseSensitive": False},
+        "type": elem_type,
+        "confidence": 0.9,
+    }
+    if role:
+        candidate["role"] = role
+    return candidate
+
+
+def test_earliest_ranked_candidate_of_a_role_wins():
+    live = [
+        _candidate("submit", "go", "button"),
+        _candidate("password", "pw-1"),
+        _candidate("password", "pw-2"),
+        _candidate(None, "legacy-user", "username"),  # untagged: role from its type
+        _candidate("apply_button", "apply", "button"),
+    ]
+    by_role = live_selectors_by_role(live)
+    assert by_role["password"] == (1, live[1])
+    assert by_role["username"] == (3, live[3])
+    assert best_role_match(by_role, "password") is live[1]
+    assert best_role_match(by_role, "apply-now") is live[4]
+    assert best_role_match(by_role, "submit-password") is live[0]  # both named; lower rank wins
+    assert best_role_match(by_role, "search") is None
+
+
+def test_mapped_selectors_upgrade_actions_and_are_counted(monkeypatch, tmp_path):
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    selector_map.record(REGISTER_URL, [
+        _candidate("username", "live-user"),
+        _candidate("email", "live-email"),
+        _candidate("password", "live-pass"),
+        _candidate("submit", "live-submit", "button"),
+    ])
+    registry = MetricsRegistry()
+    monkeypatch.setattr(selector_map_module, "_selector_map", selector_map)
+    monkeypatch.setattr(generator_module, "get_metrics", lambda: registry)
+
+    actions = asyncio.run(ActionGenerator().generate(REGISTER_PROMPT, REGISTER_URL, task_id="roles-1"))
+    targeted = [a for a in actions if a["type"] in ("ClickAction", "TypeAction") and a.get("selector")]
+    live_ids = {"live-user", "live-email", "live-pass", "live-submit"}
+    assert targeted and all(a["selector"]["value"] in live_ids for a in targeted)
+    typed = {a["selector"]["value"] for a in targeted if a["type"] == "TypeAction"}
+    assert "live-pass" in typed  # the password field, matched by role
+
+    upgrades = registry.counter("solve_live_selector_upgrades_total", "", ("match",))
+    assert upgrades.value(("role",)) >= 1
+    assert upgrades.value(("role",)) + upgrades.value(("fallback",)) == len(targeted)
@@ -0,0 +1,51 @@
+"""/metrics: per-request stage recording and component stats typed as counters or gauges"""
+from api.utils.metrics import MetricsRegistry, RequestRecorder
+
+
+def _types(text: str):
+    return dict(line.split()[2:4] for line in text.splitlines() if line.startswith("# TYPE"))
+
+
+def test_monotonic_stats_render_as_counters():
+    registry = MetricsRegistry()
+    text = registry.render_prometheus(stats={
+        "solve_cache": {"size": 3, "hits": 5, "misses": 2, "hit_rate": 0.71},
+        "page_pool": {"idle": 2, "leases": 9, "lease_timeouts": 1},
+        "browser": {"active_pages": 1, "instance_0_crashes": 2, "instance_0_live": True},
+    })
+    types = _types(text)
+    assert types["solve_cache_hits_total"] == "counter"
+    assert types["solve_cache_misses_total"] == "counter"
+    assert types["page_pool_leases_total"] == "counter"
+    assert types["page_pool_lease_timeouts_total"] == "counter"
+    assert types["browser_instance_0_crashes_total"] == "counter"
+    assert types["solve_cache_size"] == "gauge"
+    assert types["solve_cache_hit_rate"] == "gauge"
+    assert types["page_pool_idle"] == "gauge"
+    assert types["browser_active_pages"] == "gauge"
+    assert "solve_cache_hits 5" not in text and "solve_cache_hits_total 5" in text
+    assert "browser_instance_0_live" not in text  # booleans are skipped
+
+
+def test_stats_never_duplicate_a_registered_metric():
+    registry = MetricsRegistry()
+    registry.counter("browser_crashes_total", "Chromium disconnects/crashes detected", ("instance",)).inc(("0",))
+    text = registry.render_prometheus(stats={"browser": {"crashes": 1, "live": 2}})
+    assert text.count("# TYPE browser_crashes_total") == 1
+    assert 'browser_crashes_total{instance="0"} 1' in text
+    assert "browser_live 2" in text
+
+
+def test_request_stages_are_labelled_when_flushed():
+    registry = MetricsRegistry()
+    recorder = RequestRecorder()
+    recorder.add("request_parse", 0.002)
+    recorder.add("fetch_page", 0.8)
+    recorder.task_type, recorder.live = "login", True  # only known once the request is done
+    recorder.flush(registry)
+    recorder.flush(registry)  # flushing twice never double counts
+
+    text = registry.render_prometheus()
+    assert 'solve_stage_seconds_count{stage="fetch_page",task_type="login",live="true"} 1' in text
+    assert 'solve_stage_seconds_bucket{stage="request_parse",task_type="login",live="true",le="0.0025"} 1' in text
+    assert 'solve_stage_seconds_count{stage="total",task_type="login",live="true"} 1' in text
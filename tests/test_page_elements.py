@@ -0,0 +1,84 @@
+"""Snapshot element index: postings-based scoring and the columnar table for analyze_dom"""
+import pytest
+
+from api.utils.page_elements import (
+    MAX_CANDIDATES,
+    ElementIndex,
+    ElementTable,
+    _score_positions,
+    build_element_index,
+    score_elements,
+)
+
+LOGIN_PAGE = [
+    {"tag": "a", "type": "link", "text": "Forgot password?", "selector": "a.forgot"},
+    {"tag": "input", "type": "email", "id": "email", "selector": "#email"},
+    {"tag": "input", "type": "username", "id": "user", "name": "username", "selector": "#user"},
+    {"tag": "input", "type": "password", "id": "pw", "selector": "#pw"},
+    {"tag": "button", "type": "button", "text": "Login now", "input_type": "submit", "selector": "#go"},
+]
+
+
+def _scored(elements, intent, task_type):
+    page_data = {"elements": elements, "index": ElementIndex(elements)}  # plain token index path
+    return [(c["element"]["selector"], c["confidence"]) for c in score_elements(page_data, intent, task_type)]
+
+
+def test_substring_matches_fall_inside_tokens():
+    index = ElementIndex(LOGIN_PAGE)
+    assert index.containing("text", ("login",)) == {4}
+    assert index.containing("text", ("pass",)) == {0}  # "password?" token
+    assert index.containing("text", ()) == set()
+    assert index.of_type("username", "password") == {2, 3}
+    assert index.buttons == [4]
+
+
+def test_login_candidates_rank_by_confidence_then_document_order():
+    assert _scored(LOGIN_PAGE, "Login with username and password", "login") == [
+        ("#user", 0.9), ("#pw", 0.9), ("#email", 0.8), ("#go", 0.8),
+    ]
+
+
+def test_click_and_submit_tiers():
+    page = [
+        {"tag": "button", "type": "button", "text": "Cancel", "selector": "#cancel"},
+        {"tag": "button", "type": "button", "text": "Checkout", "selector": "#checkout"},
+        {"tag": "button", "type": "button", "text": "Save", "selector": "#save"},
+    ]
+    assert _scored(page, "click the checkout link", "click") == [("#save", 0.9), ("#checkout", 0.8), ("#cancel", 0.6)]
+    assert _scored(LOGIN_PAGE, "submit it", "generic") == [("#go", 0.9)]
+
+
+def test_candidates_are_capped():
+    page = [{"tag": "input", "type": "text", "id": f"f{i}", "selector": f"#f{i}"} for i in range(MAX_CANDIDATES + 5)]
+    scored = _scored(page, "fill the form", "form")
+    assert [selector for selector, _ in scored] == [f"#f{i}" for i in range(MAX_CANDIDATES)]
+
+
+def test_table_tiers_match_the_token_index():
+    pytest.importorskip("sklearn")
+    table = build_element_index(LOGIN_PAGE)
+    assert isinstance(table, ElementTable)
+    for intent, task_type in (
+        ("login with username and password", "login"),
+        ("click the login button", "click"),
+        ("fill in your email", "form"),
+        ("submit it", "generic"),
+    ):
+        confidence = table.role_confidence(intent, task_type)
+        tiers = {position: float(value) for position, value in enumerate(confidence) if value > 0}
+        assert tiers == _score_positions(ElementIndex(LOGIN_PAGE), intent, task_type)
+
+
+def test_similarity_reorders_within_a_tier_only():
+    pytest.importorskip("sklearn")
+    page = [
+        {"tag": "button", "type": "button", "text": "Save", "selector": "#save"},
+        {"tag": "button", "type": "button", "text": "Submit order", "selector": "#order"},
+        {"tag": "button", "type": "button", "text": "Order history", "selector": "#history"},
+    ]
+    candidates = score_elements({"elements": page}, "click the submit order button", "click")
+    assert [(c["element"]["selector"], c["confidence"]) for c in candidates] == [
+        ("#order", 0.9), ("#save", 0.9), ("#history", 0.8),  # shares "order", but stays in its lower tier
+    ]
+    assert candidates[0]["similarity"] > candidates[1]["similarity"]
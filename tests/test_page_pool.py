@@ -0,0 +1,111 @@
+"""Page pool: prewarmed pages are reset on return and replaced when broken"""
+import asyncio
+
+import pytest
+
+from api.utils import page_pool as page_pool_module
+from api.utils.page_pool import PagePool
+
+
+class FakePage:
+    def __init__(self):
+        self.visited = []
+        self.broken = False
+
+    def is_closed(self):
+        return self.broken
+
+    async def evaluate(self, script):
+        return None
+
+    async def goto(self, url, **kwargs):
+        self.visited.append(url)
+
+
+class FakeContext:
+    def __init__(self):
+        self.cookies_cleared = 0
+        self.closed = False
+
+    async def new_page(self):
+        return FakePage()
+
+    async def clear_cookies(self):
+        self.cookies_cleared += 1
+
+    async def close(self):
+        self.closed = True
+
+
+class FakeBrowser:
+    def __init__(self):
+        self.contexts = 0
+
+    async def new_context(self, **options):
+        self.contexts += 1
+        return FakeContext()
+
+
+@pytest.fixture(autouse=True)
+def no_resource_blocking(monkeypatch):
+    async def _install(context, page, mode=None):
+        pass
+    monkeypatch.setattr(page_pool_module, "install_resource_blocking", _install)
+
+
+async def _settle(pool: PagePool):
+    await asyncio.gather(*pool._resetting)
+
+
+def test_pages_are_created_once_and_reset_between_leases():
+    browser = FakeBrowser()
+    pool = PagePool(browser, size=2)
+
+    async def _run():
+        await pool.start()
+        async with pool.lease() as first:
+            pass
+        await _settle(pool)
+        async with pool.lease() as second, pool.lease() as third:
+            leased = {id(second), id(third)}
+        await _settle(pool)
+        return first, leased
+
+    first, leased = asyncio.run(_run())
+    assert browser.contexts == 2  # no context/page created per lease
+    assert id(first) in leased
+    assert first.visited == ["about:blank", "about:blank"]  # reset after each of its two leases
+    stats = pool.get_stats()
+    assert stats["leases"] == 3 and stats["idle"] == 2 and stats["replaced"] == 0
+
+
+def test_broken_page_is_replaced():
+    browser = FakeBrowser()
+    pool = PagePool(browser, size=1)
+
+    async def _run():
+        await pool.start()
+        async with pool.lease() as page:
+            page.broken = True  # crashed renderer / closed page
+        await _settle(pool)
+        async with pool.lease() as replacement:
+            return page, replacement
+
+    page, replacement = asyncio.run(_run())
+    assert replacement is not page
+    assert browser.contexts == 2
+    assert pool.get_stats()["replaced"] == 1
+
+
+def test_lease_times_out_when_every_page_is_busy():
+    pool = PagePool(FakeBrowser(), size=1, lease_timeout=0.05)
+
+    async def _run():
+        await pool.start()
+        async with pool.lease():
+            with pytest.raises(asyncio.TimeoutError):
+                async with pool.lease():
+                    pass
+
+    asyncio.run(_run())
+    assert pool.get_stats()["lease_timeouts"] == 1
@@ -0,0 +1,60 @@
+"""TaskParser template cache: repeated templates re-bind their slot values instead of re-parsing"""
+from api.utils.task_parser import PromptTemplateCache, TaskParser, split_prompt_template
+
+URL = "https://autobooks.autoppia.com/"
+
+
+def _parser():
+    parser = TaskParser()
+    parser.template_cache = None  # the full pattern cascade, for reference parses
+    return parser
+
+
+def test_template_hit_rebinds_quoted_and_lowered_slots():
+    parser, cache = _parser(), PromptTemplateCache()
+    cache.parse("Login with username 'alice' and password 'S3cret'", URL, parser._parse_task)
+    prompt = "Login with username 'bobby' and password 'H4nter'"
+    parsed = cache.parse(prompt, URL, parser._parse_task)
+    assert cache.get_stats()["hits"] == 1
+    assert parsed == parser._parse_task(prompt, URL)
+    assert parsed["credentials"] == {"username": "bobby", "password": "h4nter"}
+    assert parsed["original_prompt"] == prompt
+
+
+def test_number_and_text_slots_rebind():
+    parser, cache = _parser(), PromptTemplateCache()
+    for first, second in (
+        ("Search for jobs with rating equals 4 in 'Berlin'", "Search for jobs with rating equals 7 in 'Madrid'"),
+        ("Type 'hello world' into the search box", "Type 'goodbye moon' into the search box"),
+    ):
+        cache.parse(first, URL, parser._parse_task)
+        assert cache.parse(second, URL, parser._parse_task) == parser._parse_task(second, URL)
+    assert cache.get_stats()["hits"] == 2
+    assert cache.parse("Type 'goodbye moon' into the search box", URL, parser._parse_task)["text_to_type"] == "goodbye moon"
+
+
+def test_hits_are_independent_copies():
+    parser, cache = _parser(), PromptTemplateCache()
+    prompt = "Type 'hello world' into the search box"
+    cache.parse(prompt, URL, parser._parse_task)
+    cache.parse(prompt, URL, parser._parse_task)["negative_constraints"]["exclude_text"].append("mutated")
+    assert cache.parse(prompt, URL, parser._parse_task)["negative_constraints"]["exclude_text"] == []
+
+
+def test_guarded_literals_stay_in_the_template():
+    parser, cache = _parser(), PromptTemplateCache()
+    template, slots, _ = split_prompt_template("Click on the 'Submit' button")
+    assert slots == () and "'Submit'" in template
+    cache.parse("Click on the 'Submit' button", URL, parser._parse_task)
+    parsed = cache.parse("Click on the 'Apply' button", URL, parser._parse_task)
+    assert cache.get_stats()["hits"] == 0
+    assert parsed == parser._parse_task("Click on the 'Apply' button", URL)
+
+
+def test_slot_shape_and_non_ascii_prompts_miss():
+    parser, cache = _parser(), PromptTemplateCache()
+    cache.parse("Login with username 'alice' and password 'S3cret'", URL, parser._parse_task)
+    cache.parse("Login with username 'alice' and password 'secret'", URL, parser._parse_task)  # different shape
+    cache.parse("Login with username 'zoë' and password 'S3cret'", URL, parser._parse_task)
+    stats = cache.get_stats()
+    assert (stats["hits"], stats["misses"], stats["bypassed"]) == (0, 2, 1)
@@ -0,0 +1,86 @@
+"""Selector map: registration pages, background refreshes and the persisted map location"""
+import asyncio
+import os
+
+from api.actions import generator as generator_module
+from api.actions.generator import ActionGenerator
+from api.utils import admission as admission_module
+from api.utils import selector_map as selector_map_module
+from api.utils.admission import AdmissionController
+from api.utils.selector_map import SelectorMap
+from api.utils.task_parser import TaskParser
+from config.settings import PROJECT_ROOT, settings
+
+REGISTER_URL = "https://autobooks.autoppia.com/register"
+REGISTER_PROMPT = "Register with username: user<web_agent_id> email: user<web_agent_id>@gmail.com password: Passw0rd!"
+
+
+def _candidate(role: str, element_id: str):
+    return {
+        "selector": {"type": "attributeValueSelector", "attribute": "id", "value": element_id, "caseSensitive": False},
+        "type": "input",
+        "confidence": 0.9,
+        "role": role,
+    }
+
+
+def test_registration_page_is_served_from_the_map(tmp_path):
+    task_type = TaskParser().parse_task(REGISTER_PROMPT, REGISTER_URL)["task_type"]
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    selector_map.record(REGISTER_URL, [
+        _candidate("username", "username"),
+        _candidate("email", "email"),
+        _candidate("password", "password"),
+        _candidate("submit", "register-btn"),
+    ])
+    candidates, stale = selector_map.lookup(REGISTER_URL, task_type)
+    assert not stale
+    assert [c["role"] for c in candidates] == ["username", "email", "password", "submit"]
+    assert all(c["source"] == "selector_map" for c in candidates)
+
+
+def test_registration_needs_every_required_role(tmp_path):
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    selector_map.record(REGISTER_URL, [_candidate("username", "username"), _candidate("password", "password")])
+    assert selector_map.lookup(REGISTER_URL, "form") == ([], False)
+
+
+def test_map_path_resolves_under_data_dir(monkeypatch):
+    monkeypatch.setattr(selector_map_module, "_selector_map", None)
+    monkeypatch.setattr(settings, "selector_map_enabled", True)
+    monkeypatch.setattr(settings, "data_dir", "data")
+    monkeypatch.setattr(settings, "selector_map_path", "selector_map.json")
+    selector_map = selector_map_module.get_selector_map()
+    assert selector_map.path == os.path.join(PROJECT_ROOT, "data", "selector_map.json")
+
+
+def test_stale_page_refreshes_are_coalesced(monkeypatch):
+    monkeypatch.setattr(admission_module, "_admission", AdmissionController(max_concurrent=4))
+    generator = ActionGenerator()
+    refreshes = []
+
+    async def _run_live_analysis(url, prompt_lower, task_type, deadline):
+        refreshes.append(deadline.budget)
+        await asyncio.sleep(0.05)
+        return []
+
+    monkeypatch.setattr(generator, "_run_live_analysis", _run_live_analysis)
+
+    async def _burst():
+        for _ in range(5):  # five tasks hit the same stale page at once
+            generator._refresh_selector_map(REGISTER_URL + "?next=/", "register", "form")
+        await asyncio.gather(*generator_module._late_live_tasks)
+        generator._refresh_selector_map(REGISTER_URL, "register", "form")  # the page is free again
+        await asyncio.gather(*generator_module._late_live_tasks)
+
+    asyncio.run(_burst())
+    assert refreshes == [settings.request_budget_seconds] * 2
+    assert not generator_module._refreshing_pages
+
+
+def test_prompt_dependent_tasks_bypass_the_map(tmp_path):
+    url = "https://autocalendar.autoppia.com/"
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    selector_map.record(url, [_candidate("submit", "save-event"), _candidate("email", "email")])
+    assert selector_map.lookup(url, "booking") == ([], False)
+    assert selector_map.lookup(url, "click") == ([], False)
@@ -0,0 +1,56 @@
+"""Interned selectors: immutable through action_optimizer and response_quality, shared by strategies"""
+import copy
+import pickle
+
+import pytest
+
+from api.actions.selectors import Selector, SelectorStrategy, create_selector
+from api.utils.action_optimizer import ActionOptimizer
+from api.utils.response_quality import ResponseQualityEnhancer
+
+
+def test_equal_arguments_share_one_frozen_selector():
+    selector = create_selector("attributeValueSelector", "username", attribute="id")
+    assert selector is create_selector("attributeValueSelector", "username", attribute="id")
+    assert selector == {"type": "attributeValueSelector", "attribute": "id", "value": "username", "caseSensitive": False}
+    for mutate in (
+        lambda: selector.__setitem__("value", "x"),
+        lambda: selector.update(value="x"),
+        lambda: selector.pop("value"),
+        lambda: selector.setdefault("extra", 1),
+    ):
+        with pytest.raises(TypeError):
+            mutate()
+    assert copy.copy(selector) is selector and copy.deepcopy(selector) is selector
+    restored = pickle.loads(pickle.dumps(selector))
+    assert isinstance(restored, Selector) and restored == selector
+
+
+def test_optimizer_and_quality_enhancer_pass_interned_selectors_through():
+    selector = create_selector("attributeValueSelector", "password", attribute="id")
+    actions = [{"type": "TypeAction", "selector": selector, "text": "secret"}]
+    actions = ActionOptimizer().enhance_selectors(actions)
+    actions = ResponseQualityEnhancer().enhance_action_sequence(actions)
+    assert actions[0]["selector"] is selector
+    assert dict(selector) == {"type": "attributeValueSelector", "attribute": "id", "value": "password", "caseSensitive": False}
+
+
+def test_plain_selectors_are_still_canonicalized():
+    legacy = {"type": "attributeValueSelector", "value": "#login", "case_sensitive": True}
+    actions = ResponseQualityEnhancer().enhance_action_sequence([{"type": "ClickAction", "selector": legacy}])
+    assert actions[0]["selector"] == {"type": "attributeValueSelector", "attribute": "id", "value": "login", "caseSensitive": True}
+    assert legacy == {"type": "attributeValueSelector", "value": "#login", "case_sensitive": True}  # caller's dict untouched
+
+    partial = {"type": "attributeValueSelector", "value": ".cta"}
+    ActionOptimizer().enhance_selectors([{"type": "ClickAction", "selector": partial}])
+    assert partial == {"type": "attributeValueSelector", "attribute": "class", "value": "cta", "caseSensitive": False}
+
+
+def test_strategies_are_fresh_lists_of_shared_selectors():
+    strategy = SelectorStrategy()
+    first = strategy.get_strategies("button", "Submit")
+    second = strategy.get_strategies("button", "Submit")
+    assert first is not second and first == second
+    assert all(a is b for a, b in zip(first, second))
+    first.append({"type": "tagContainsSelector", "value": "extra"})
+    assert len(strategy.get_strategies("button", "Submit")) == len(second)
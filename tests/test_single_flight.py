@@ -0,0 +1,81 @@
+"""Single-flight: concurrent identical work shares one task"""
+import asyncio
+
+import pytest
+
+from api.utils.single_flight import SingleFlight
+
+
+def test_concurrent_callers_share_one_run():
+    flight = SingleFlight()
+    runs = []
+
+    async def _work():
+        runs.append(1)
+        await asyncio.sleep(0.05)
+        return ["plan"]
+
+    async def _callers():
+        return await asyncio.gather(*(flight.do("task", _work) for _ in range(5)))
+
+    results = asyncio.run(_callers())
+    assert results == [["plan"]] * 5
+    assert len(runs) == 1
+    assert flight.get_stats() == {"in_flight": 0, "leaders": 1, "coalesced": 4}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_flight():
+    flight = SingleFlight()
+    finished = []
+
+    async def _work():
+        await asyncio.sleep(0.1)
+        finished.append(True)
+        return "plan"
+
+    async def _callers():
+        leader = asyncio.ensure_future(flight.do("task", _work))
+        follower = asyncio.ensure_future(flight.do("task", _work))
+        await asyncio.sleep(0.01)
+        leader.cancel()  # the leader's request times out / disconnects
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(_callers()) == "plan"
+    assert finished == [True]
+
+
+def test_timed_out_caller_leaves_the_flight_running_for_later_joiners():
+    flight = SingleFlight()
+    runs = []
+
+    async def _work():
+        runs.append(1)
+        await asyncio.sleep(0.1)
+        return "plan"
+
+    async def _callers():
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(flight.do("task", _work), timeout=0.01)
+        assert flight.in_flight() == 1
+        return await flight.do("task", _work)  # joins the same flight instead of starting over
+
+    assert asyncio.run(_callers()) == "plan"
+    assert runs == [1]
+    assert flight.in_flight() == 0
+
+
+def test_failed_flight_is_forgotten():
+    flight = SingleFlight()
+
+    async def _fail():
+        raise RuntimeError("generation failed")
+
+    async def _call():
+        with pytest.raises(RuntimeError):
+            await flight.do("task", _fail)
+        await asyncio.sleep(0)  # done callback runs
+        return flight.in_flight()
+
+    assert asyncio.run(_call()) == 0
@@ -0,0 +1,101 @@
+"""Page snapshot cache: TTL, stale-while-revalidate and LRU bounds"""
+import asyncio
+
+import pytest
+
+from api.utils import browser_analyzer as browser_analyzer_module
+from api.utils.browser_analyzer import BrowserAnalyzer, SnapshotCache, normalize_snapshot_url
+
+URL = "https://autobooks.autoppia.com/login/"
+ELEMENTS = [{"type": "button", "tag": "button", "text": "Log in", "selector": "#login"}]
+
+
+class Clock:
+    """Stand-in for the time module inside browser_analyzer"""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def monotonic(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    fake = Clock()
+    monkeypatch.setattr(browser_analyzer_module, "time", fake)
+    return fake
+
+
+def _analyzer(monkeypatch, cache: SnapshotCache):
+    """Analyzer whose live fetches are counted and return a fresh snapshot each time"""
+    monkeypatch.setattr(browser_analyzer_module, "_snapshot_cache", cache)
+    analyzer = BrowserAnalyzer(None)
+    fetches = []
+
+    async def _fetch_page_live(url, timeout=15.0, lease_timeout=None):
+        fetches.append(url)
+        return {"url": url, "title": f"fetch {len(fetches)}", "elements": [dict(e) for e in ELEMENTS]}
+
+    monkeypatch.setattr(analyzer, "_fetch_page_live", _fetch_page_live)
+    return analyzer, fetches
+
+
+def test_normalized_url_is_served_until_the_ttl(clock, monkeypatch):
+    analyzer, fetches = _analyzer(monkeypatch, SnapshotCache(ttl=300.0))
+
+    async def _run():
+        first = await analyzer.fetch_page(URL)
+        clock.now += 299.0
+        second = await analyzer.fetch_page("https://AUTOBOOKS.autoppia.com/login#form")
+        clock.now += 2.0  # past the TTL, no stale window
+        third = await analyzer.fetch_page(URL)
+        return first, second, third
+
+    first, second, third = asyncio.run(_run())
+    assert len(fetches) == 2
+    assert second["title"] == "fetch 1" and third["title"] == "fetch 2"
+
+
+def test_stale_entry_is_served_while_one_refresh_runs(clock, monkeypatch):
+    cache = SnapshotCache(ttl=300.0, stale_seconds=60.0)
+    analyzer, fetches = _analyzer(monkeypatch, cache)
+
+    async def _run():
+        await analyzer.fetch_page(URL)
+        clock.now += 330.0  # stale, inside the stale window
+        stale = await asyncio.gather(*(analyzer.fetch_page(URL) for _ in range(3)))
+        await asyncio.gather(*cache._refresh_tasks)
+        refreshed = await analyzer.fetch_page(URL)
+        return stale, refreshed
+
+    stale, refreshed = asyncio.run(_run())
+    assert [snapshot["title"] for snapshot in stale] == ["fetch 1"] * 3  # no caller waited on the fetch
+    assert refreshed["title"] == "fetch 2"
+    assert len(fetches) == 2  # three stale hits, one background refresh
+    stats = cache.get_stats()
+    assert stats["stale_hits"] == 3 and stats["refreshes"] == 1
+
+
+def test_entry_past_the_stale_window_is_refetched(clock):
+    cache = SnapshotCache(ttl=300.0, stale_seconds=60.0)
+    key = normalize_snapshot_url(URL)
+    cache.put(key, {"url": URL, "elements": ELEMENTS})
+    clock.now += 361.0
+    assert cache.get(key) == (None, False)
+    assert not cache.contains(key)
+    assert cache.get_stats()["size"] == 0
+
+
+def test_callers_get_copies_and_lru_evicts_the_oldest(clock):
+    cache = SnapshotCache(max_entries=2)
+    cache.put("a", {"elements": ELEMENTS})
+    snapshot, _ = cache.get("a")
+    snapshot["elements"][0]["text"] = "mutated"
+    assert cache.get("a")[0]["elements"][0]["text"] == "Log in"
+
+    cache.put("b", {"elements": []})
+    cache.get("a")  # a is now the most recently used
+    cache.put("c", {"elements": []})
+    assert cache.contains("a") and cache.contains("c") and not cache.contains("b")
+    assert cache.get_stats()["evictions"] == 1
@@ -0,0 +1,51 @@
+"""Solve cache agent-id templating and pre-encoded hits"""
+import json
+
+from api.utils.response_encoder import encode_cached_response, encode_solve_response, normalize_actions
+from api.utils.solve_cache import SolveCache, make_solve_key, templatize_actions, personalize_actions
+
+PROMPT = "Login with username: user<web_agent_id> and password: PASSWORD"
+
+
+def _plan(agent_id: str):
+    return [
+        {"type": "NavigateAction", "url": "http://localhost:8042/login?next=/42"},
+        {"type": "TypeAction", "text": f"user{agent_id}", "selector": {"type": "attributeValueSelector",
+                                                                    "attribute": "id", "value": "username"}},
+        {"type": "TypeAction", "text": "order 42", "selector": {"type": "attributeValueSelector",
+                                                             "attribute": "id", "value": "note"}},
+    ]
+
+
+def test_uuid_prefix_agent_id_is_templatized_and_personalized():
+    cache = SolveCache()
+    key = make_solve_key(PROMPT, "http://localhost:8042", "1")
+    cache.put(key, _plan("1be0c85d"), "1be0c85d", "login")
+    actions, task_type = cache.get(key, "9f3a2b7c")
+    assert task_type == "login"
+    assert actions == _plan("9f3a2b7c")
+
+
+def test_short_agent_id_in_url_is_not_cached():
+    cache = SolveCache()
+    key = make_solve_key(PROMPT, "http://localhost:8042", "1")
+    plan = _plan("42")
+    cache.put(key, plan, "42", "login")
+    assert len(cache) == 0
+    assert cache.get(key, "42") is None
+    assert cache.get_stats()["untemplatable"] == 1
+    # Never rewritten: the URL, path and typed text keep their "42"
+    assert templatize_actions(plan, "42") == plan
+    assert personalize_actions(plan, "7") == plan
+
+
+def test_hit_body_matches_a_freshly_encoded_response():
+    cache = SolveCache()
+    key = make_solve_key(PROMPT, "http://localhost:8042", "1")
+    normalized = normalize_actions(_plan("1be0c85d"), "http://localhost:8042")
+    cache.put(key, normalized, "1be0c85d", "login")
+    actions_json, task_type = cache.get_encoded(key, "9f3a2b7c")
+    task_id = "9f3a2b7c-5e8a-4ccf-b4a2-93eebdc39507"
+    expected = encode_solve_response(normalize_actions(_plan("9f3a2b7c")), task_id)
+    assert encode_cached_response(actions_json, task_id) == expected
+    assert json.loads(encode_cached_response(actions_json, 'id "quoted"'))["web_agent_id"] == 'id "quoted"'
@@ -0,0 +1,68 @@
+"""/solve_tasks pipelining: results stream back while the request body is still open"""
+import asyncio
+import json
+
+import pytest
+from fastapi import Response
+
+from api import endpoints
+from api.server import app
+
+
+@pytest.fixture(autouse=True)
+def fake_solve_task(monkeypatch):
+    async def _solve_task(request, http_request):
+        body = json.dumps({"actions": [{"type": "ScreenshotAction"}], "web_agent_id": request.id, "recording": ""})
+        return Response(content=body.encode("utf-8"), media_type="application/json")
+    monkeypatch.setattr(endpoints, "solve_task", _solve_task)
+
+
+def _task_line(task_id: str) -> bytes:
+    return json.dumps({"id": task_id, "prompt": "Take a screenshot", "url": "https://example.com"}).encode() + b"\n"
+
+
+async def _first_line_before_body_closed(spec_version: str):
+    scope = {
+        "type": "http", "asgi": {"version": "3.0", "spec_version": spec_version}, "http_version": "1.1",
+        "method": "POST", "scheme": "http", "path": "/solve_tasks", "raw_path": b"/solve_tasks",
+        "query_string": b"", "root_path": "", "headers": [(b"content-type", b"application/x-ndjson")],
+        "client": ("127.0.0.1", 1234), "server": ("testserver", 80),
+    }
+    messages = [
+        {"type": "http.request", "body": _task_line("first"), "more_body": True},
+        {"type": "http.request", "body": _task_line("second"), "more_body": False},
+    ]
+    release_rest = asyncio.Event()
+    body_closed = False
+    first_line = asyncio.get_running_loop().create_future()
+    chunks = []
+
+    async def receive():
+        nonlocal body_closed
+        if len(messages) == 1:
+            await release_rest.wait()  # client keeps the upload open until it saw a result
+            body_closed = True
+        if messages:
+            return messages.pop(0)
+        await asyncio.Event().wait()  # no disconnect while the response is streaming
+
+    async def send(message):
+        if message["type"] == "http.response.body" and message.get("body"):
+            chunks.append(message["body"])
+            if not first_line.done():
+                first_line.set_result(body_closed)
+
+    app_task = asyncio.create_task(app(scope, receive, send))
+    closed_when_first_line_arrived = await asyncio.wait_for(first_line, timeout=10)
+    release_rest.set()
+    await asyncio.wait_for(app_task, timeout=10)
+    lines = [json.loads(line) for line in b"".join(chunks).splitlines()]
+    return closed_when_first_line_arrived, lines
+
+
+@pytest.mark.parametrize("spec_version", ["2.0", "2.4"])
+def test_first_result_streams_before_body_is_closed(spec_version):
+    closed, lines = asyncio.run(_first_line_before_body_closed(spec_version))
+    assert closed is False
+    assert lines[0]["id"] == "first" and lines[0]["index"] == 0
+    assert sorted(line["id"] for line in lines) == ["first", "second"]
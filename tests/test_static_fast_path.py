@@ -0,0 +1,70 @@
+"""Static fast path: skipped for known JS shells and pages already in the browser snapshot cache"""
+import asyncio
+
+import pytest
+
+from api.actions import generator as generator_module
+from api.actions.generator import ActionGenerator
+from api.utils import browser_analyzer as browser_analyzer_module
+from api.utils.browser_analyzer import SnapshotCache, normalize_snapshot_url
+from api.utils.deadline import Deadline
+from api.utils.live_analyzer import StaticAnalyzer
+from api.utils.page_elements import score_elements
+from config.settings import settings
+
+URL = "https://autocinema.autoppia.com/"
+SHELL_HTML = "<html><head><script src='/app.js'></script></head><body><div id='root'></div></body></html>"
+ELEMENTS = [{"type": "button", "tag": "button", "text": "Submit", "id": "submit", "selector": "#submit"}]
+
+
+@pytest.fixture
+def static_analyzer(monkeypatch):
+    analyzer = StaticAnalyzer()
+    fetched = []
+
+    async def _fetch_page(url, timeout=None):
+        fetched.append(url)
+        return SHELL_HTML
+
+    monkeypatch.setattr(analyzer, "fetch_page", _fetch_page)
+    monkeypatch.setattr(generator_module, "live_analyzer", analyzer)
+    monkeypatch.setattr(settings, "static_analysis_enabled", True)
+    return fetched
+
+
+def _analyze():
+    return asyncio.run(ActionGenerator()._analyze_live_page(URL, "click submit", "click", Deadline(5.0)))
+
+
+def test_known_js_shell_skips_the_static_fetch(static_analyzer, monkeypatch):
+    monkeypatch.setattr(settings, "enable_browser_automation", False)
+    assert _analyze() == []
+    assert _analyze() == []
+    assert static_analyzer == [URL]  # second request went straight past the static fetch
+    assert generator_module.live_analyzer.get_stats()["js_shell_skips"] == 1
+
+
+def test_warm_browser_snapshot_skips_the_static_fetch(static_analyzer, monkeypatch):
+    cache = SnapshotCache()
+    cache.put(normalize_snapshot_url(URL), {"url": URL, "elements": ELEMENTS})
+
+    class FakeBrowserAnalyzer:
+        async def fetch_page(self, url, timeout=15.0, lease_timeout=None):
+            snapshot, _ = cache.get(normalize_snapshot_url(url))
+            return snapshot
+
+        def analyze_dom(self, page_data, intent, task_type):
+            return score_elements(page_data, intent, task_type)
+
+    async def _get_browser_analyzer():
+        return FakeBrowserAnalyzer()
+
+    monkeypatch.setattr(settings, "enable_browser_automation", True)
+    monkeypatch.setattr(browser_analyzer_module, "_snapshot_cache", cache)
+    monkeypatch.setattr(generator_module, "PLAYWRIGHT_AVAILABLE", True)
+    monkeypatch.setattr(generator_module, "get_browser_analyzer", _get_browser_analyzer)
+
+    candidates = _analyze()
+    assert [c["role"] for c in candidates] == ["submit"]
+    assert static_analyzer == []
+    assert cache.get_stats()["hits"] == 1  # contains() itself is not counted as a lookup
@@ -0,0 +1,44 @@
+"""TaskParser.parse_task against the golden corpus (scripts/golden/task_parser.json)"""
+import json
+import os
+
+from api.utils.task_parser import PromptTemplateCache, TaskParser
+from config.settings import PROJECT_ROOT
+
+GOLDEN_PATH = os.path.join(PROJECT_ROOT, "scripts", "golden", "task_parser.json")
+
+
+def _golden():
+    with open(GOLDEN_PATH) as f:
+        return json.load(f)
+
+
+def _mismatches(parser: TaskParser):
+    return [
+        entry["prompt"]
+        for entry in _golden()
+        if json.loads(json.dumps(parser.parse_task(entry["prompt"], entry["url"]))) != entry["parsed"]
+    ]
+
+
+def test_trigger_gated_patterns_match_the_golden_output():
+    parser = TaskParser()
+    parser.template_cache = None
+    assert _mismatches(parser) == []
+
+
+def test_template_cache_matches_the_golden_output_cold_and_warm():
+    parser = TaskParser()
+    parser.template_cache = PromptTemplateCache()
+    assert _mismatches(parser) == []
+    assert _mismatches(parser) == []  # second pass re-bound from cached templates
+    assert parser.template_cache.get_stats()["hits"] > 0
+
+
+def test_non_ascii_prompts_run_every_pattern():
+    # Under IGNORECASE 'ſ' matches 's', so the ASCII trigger "username" is absent from the lowered
+    # prompt while the pattern still matches - gating here would lose the credentials
+    parser = TaskParser()
+    parser.template_cache = None
+    parsed = parser.parse_task("Login with uſername: ſtefan and paſſword: geheim")
+    assert parsed["credentials"] == {"username": "ſtefan", "password": "geheim"}
@@ -0,0 +1,53 @@
+"""Startup warmup: warmed pages leave provisional selector map entries"""
+import asyncio
+
+from api.utils import selector_map as selector_map_module
+from api.utils import warmup
+from api.utils.page_elements import score_elements
+from api.utils.selector_map import SelectorMap
+
+LOGIN_URL = "https://autobooks.autoppia.com/login"
+
+LOGIN_ELEMENTS = [
+    {"type": "text", "tag": "input", "input_type": "text", "id": "username", "name": "username", "selector": "#username"},
+    {"type": "password", "tag": "input", "input_type": "password", "id": "password", "name": "password", "selector": "#password"},
+    {"type": "button", "tag": "button", "text": "Log in", "input_type": "submit", "id": "login-btn", "selector": "#login-btn"},
+]
+
+
+class FakeAnalyzer:
+    async def fetch_page(self, url, timeout=None):
+        return {"url": url, "elements": LOGIN_ELEMENTS}
+
+    def analyze_dom(self, page_data, intent, task_type):
+        return score_elements(page_data, intent, task_type)
+
+
+def test_warmed_site_records_selector_roles(tmp_path, monkeypatch):
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    monkeypatch.setattr(selector_map_module, "_selector_map", selector_map)
+    monkeypatch.setitem(warmup._state, "selector_roles", {})
+
+    result = asyncio.run(warmup._warm_site(FakeAnalyzer(), LOGIN_URL, 5.0, asyncio.Semaphore(1)))
+
+    assert result == "ok"
+    assert {"username", "password", "submit"} <= set(warmup.get_warmup_state()["selector_roles"][LOGIN_URL])
+    # Generic-intent picks never stand in for a prompt-scored analysis...
+    assert selector_map.lookup(LOGIN_URL, "login") == ([], False)
+    # ...only for requests that cannot run live analysis (degraded)
+    candidates, stale = selector_map.lookup(LOGIN_URL, "login", include_provisional=True)
+    assert not stale
+    assert {c["role"] for c in candidates} >= {"username", "password"}
+
+
+def test_provisional_entries_yield_to_real_analysis(tmp_path):
+    selector_map = SelectorMap(str(tmp_path / "selector_map.json"))
+    live = score_elements({"elements": LOGIN_ELEMENTS}, "fill the username and password", "form")
+    selector_map.record(LOGIN_URL, [dict(c, confidence=1.0) for c in live], provisional=True)
+    selector_map.record(LOGIN_URL, live)  # first real analysis takes the entries over
+    candidates, _ = selector_map.lookup(LOGIN_URL, "login")
+    assert candidates and all(c["confidence"] < 1.0 for c in candidates)
+
+    selector_map.record(LOGIN_URL, [dict(c, confidence=1.0) for c in live], provisional=True)  # next warmup
+    candidates, _ = selector_map.lookup(LOGIN_URL, "login")
+    assert candidates and all(c["confidence"] < 1.0 for c in candidates)